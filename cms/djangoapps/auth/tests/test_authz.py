@@ -5,13 +5,15 @@ import mock
 
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.core.cache import get_cache
 from xmodule.modulestore import Location
 from django.core.exceptions import PermissionDenied
 
 from auth.authz import add_user_to_creator_group, remove_user_from_creator_group, is_user_in_creator_group,\
     create_all_course_groups, add_user_to_course_group, STAFF_ROLE_NAME, INSTRUCTOR_ROLE_NAME,\
     is_user_in_course_group_role, remove_user_from_course_group, get_users_with_staff_role,\
-    get_users_with_instructor_role
+    get_users_with_instructor_role, get_course_groupname_for_role
+from student.models import user_group_names
 
 
 class CreatorGroupTest(TestCase):
@@ -169,6 +171,21 @@ class CourseGroupTest(TestCase):
         remove_user_from_course_group(self.creator, self.creator, self.location, INSTRUCTOR_ROLE_NAME)
         self.assertFalse(is_user_in_course_group_role(self.creator, self.location, INSTRUCTOR_ROLE_NAME))
 
+    @mock.patch('student.models.cache', get_cache('django.core.cache.backends.locmem.LocMemCache'))
+    def test_course_group_changes_invalidate_cached_group_names(self):
+        """
+        Verifies that course team edits made in Studio invalidate the group names the LMS caches.
+        """
+        create_all_course_groups(self.creator, self.location)
+        staff_group = get_course_groupname_for_role(self.location, STAFF_ROLE_NAME).lower()
+        self.assertNotIn(staff_group, user_group_names(User.objects.get(id=self.staff.id)))
+
+        add_user_to_course_group(self.creator, self.staff, self.location, STAFF_ROLE_NAME)
+        self.assertIn(staff_group, user_group_names(User.objects.get(id=self.staff.id)))
+
+        remove_user_from_course_group(self.creator, self.staff, self.location, STAFF_ROLE_NAME)
+        self.assertNotIn(staff_group, user_group_names(User.objects.get(id=self.staff.id)))
+
     def test_remove_user_from_course_group_permission_denied(self):
         """
         Verifies PermissionDenied if caller of remove_user_from_course_group is not instructor role.
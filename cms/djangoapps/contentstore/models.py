@@ -0,0 +1,88 @@
+"""
+Models for contentstore
+"""
+from django.contrib.auth.models import User
+from django.db import models, transaction
+
+
+class CourseImportStatus(models.Model):
+    """
+    The progress of importing an uploaded course tarball, which is done by
+    the `contentstore.tasks.import_course` task and polled by the import
+    page.
+
+    There is one entry per course and tarball name, reset every time that
+    tarball is uploaded again.
+    """
+    # Stages of an import, in the order they're reached. The import page
+    # shows the same stages.
+    UPLOADING = 0
+    EXTRACTING = 1
+    VALIDATING = 2
+    IMPORTING = 3
+    COMPLETE = 4
+
+    course_id = models.CharField(max_length=255, db_index=True)
+    filename = models.CharField(max_length=255)
+    user = models.ForeignKey(User)
+
+    # The stage reached, and the number of modules imported so far
+    stage = models.IntegerField(default=UPLOADING)
+    items_processed = models.IntegerField(default=0)
+    # If set, the import failed at `stage` with this error
+    error = models.TextField(blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('course_id', 'filename'),)
+
+    def __repr__(self):
+        return 'CourseImportStatus<%r>' % ({
+            'course_id': self.course_id,
+            'filename': self.filename,
+            'stage': self.stage,
+            'items_processed': self.items_processed,
+            'error': self.error,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+    @classmethod
+    def start(cls, course_id, filename, user):
+        """
+        Returns the CourseImportStatus of uploading the tarball `filename` to
+        `course_id`, reset to the UPLOADING stage.
+        """
+        import_status, __ = cls.objects.get_or_create(
+            course_id=course_id,
+            filename=filename,
+            defaults={'user': user},
+        )
+        import_status.user = user
+        import_status.stage = cls.UPLOADING
+        import_status.items_processed = 0
+        import_status.error = ''
+        import_status.save_now()
+        return import_status
+
+    def update(self, **fields):
+        """
+        Sets the given fields (stage, items_processed or error), and saves
+        them immediately so that the import page sees them.
+        """
+        for name, value in fields.iteritems():
+            setattr(self, name, value)
+        self.save_now()
+
+    @transaction.autocommit
+    def save_now(self):
+        """
+        Writes the CourseImportStatus immediately, ensuring the transaction is committed.
+
+        When called from a view wrapped by TransactionMiddleware, this commits
+        any pending transaction, so that the import task can read the entry.
+        """
+        self.save()
@@ -0,0 +1,113 @@
+"""
+Background tasks of Studio.
+"""
+import logging
+import os
+import shutil
+import tarfile
+
+from celery.task import task
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.utils.translation import ugettext as _
+from path import path
+
+from auth.authz import create_all_course_groups
+from contentstore.models import CourseImportStatus
+from extract_tar import safetar_extractall
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore import Location
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.xml_importer import import_from_xml
+
+log = logging.getLogger(__name__)
+
+# How many modules are imported between updates of an import's progress
+IMPORT_PROGRESS_INTERVAL = 100
+
+
+def _get_dir_for_fname(directory, filename):
+    """
+    Returns the dirpath for the first file found in the directory with the
+    given name. If there is no file in the directory with the specified
+    name, return None.
+    """
+    for dirpath, _dirnames, filenames in os.walk(directory):
+        if filename in filenames:
+            return path(dirpath)
+    return None
+
+
+@task()
+def import_course(import_status_id, course_location, course_subdir):
+    """
+    Extracts, validates and imports an uploaded course tarball into the
+    course at `course_location` (a Location url), recording each stage in
+    the CourseImportStatus with id `import_status_id`.
+
+    The tarball was uploaded to `course_subdir` of the data root, which is
+    removed once the import is done.
+    """
+    import_status = CourseImportStatus.objects.get(pk=import_status_id)
+    old_location = Location(course_location)
+    course_dir = path(settings.GITHUB_REPO_ROOT) / course_subdir
+    temp_filepath = course_dir / import_status.filename
+
+    try:
+        import_status.update(stage=CourseImportStatus.EXTRACTING)
+        tar_file = tarfile.open(temp_filepath)
+        try:
+            safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
+        except SuspiciousOperation as exc:
+            log.warning("Unsafe tar file %s imported to %s: %s", import_status.filename, old_location, exc.args[0])
+            import_status.update(error=_('Unsafe tar file. Aborting import.'))
+            return
+        finally:
+            tar_file.close()
+
+        # find the 'course.xml' file
+        import_status.update(stage=CourseImportStatus.VALIDATING)
+        dirpath = _get_dir_for_fname(course_dir, "course.xml")
+        if not dirpath:
+            import_status.update(error=_('Could not find the course.xml file in the package.'))
+            return
+
+        log.debug('found course.xml at {0}'.format(dirpath))
+
+        if dirpath != course_dir:
+            for fname in os.listdir(dirpath):
+                shutil.move(dirpath / fname, course_dir)
+
+        import_status.update(stage=CourseImportStatus.IMPORTING)
+
+        def report_progress(modules_imported):
+            """Count the modules imported, saving the count every so often"""
+            import_status.items_processed = modules_imported
+            if modules_imported % IMPORT_PROGRESS_INTERVAL == 0:
+                import_status.save_now()
+
+        _module_store, course_items = import_from_xml(
+            modulestore('direct'),
+            settings.GITHUB_REPO_ROOT,
+            [course_subdir],
+            load_error_modules=False,
+            static_content_store=contentstore(),
+            target_location_namespace=old_location,
+            draft_store=modulestore(),
+            progress_callback=report_progress,
+        )
+
+        log.debug('new course at {0}'.format(course_items[0].location))
+
+        create_all_course_groups(import_status.user, course_items[0].location)
+        log.debug('created all course groups at {0}'.format(course_items[0].location))
+
+        import_status.update(stage=CourseImportStatus.COMPLETE)
+
+    # Record errors with the stage at which they occurred.
+    except Exception as exception:   # pylint: disable=W0703
+        log.exception("Error importing %s to %s", import_status.filename, old_location)
+        import_status.update(error=unicode(exception) or _('Unknown error'))
+
+    finally:
+        shutil.rmtree(course_dir)
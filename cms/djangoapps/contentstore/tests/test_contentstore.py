@@ -621,6 +621,35 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         #
         # self.assertIsNotNone(thumbnail)
 
+    def test_asset_reimport(self):
+        '''
+        This test validates that re-importing a course doesn't rewrite its unchanged assets
+        '''
+        content_store = contentstore()
+        module_store = modulestore('direct')
+        course_location = CourseDescriptor.id_to_location('edX/toy/2012_Fall')
+
+        import_from_xml(module_store, 'common/test/data/', ['toy'], static_content_store=content_store)
+        upload_dates = dict(
+            (Location(asset['_id']).name, asset['uploadDate'])
+            for asset in content_store.get_all_content_for_course(course_location)
+        )
+        self.assertGreater(len(upload_dates), 0)
+
+        # an asset whose attributes have been edited gets them back
+        location = StaticContent.get_location_from_path('/c4x/edX/toy/asset/sample_static.txt')
+        content_store.set_attr(location, 'locked', True)
+
+        import_from_xml(module_store, 'common/test/data/', ['toy'], static_content_store=content_store)
+        self.assertEqual(
+            dict(
+                (Location(asset['_id']).name, asset['uploadDate'])
+                for asset in content_store.get_all_content_for_course(course_location)
+            ),
+            upload_dates
+        )
+        self.assertFalse(content_store.get_attr(location, 'locked'))
+
     def test_asset_delete_and_restore(self):
         '''
         This test will exercise the soft delete/restore functionality of the assets
@@ -6,6 +6,7 @@ import shutil
 import tarfile
 import tempfile
 import copy
+from StringIO import StringIO
 from path import path
 import json
 import logging
@@ -71,6 +72,20 @@ class ImportTestCase(CourseTestCase):
         MongoClient().drop_database(TEST_DATA_CONTENTSTORE['DOC_STORE_CONFIG']['db'])
         _CONTENTSTORE.clear()
 
+    def _import_status(self, tarpath):
+        """
+        Returns the status that `import_status` reports for the import of
+        the tarball at `tarpath`.
+        """
+        resp_status = self.client.get(
+            self.new_location.url_reverse(
+                'import_status',
+                os.path.split(tarpath)[1]
+            )
+        )
+        self.assertEquals(resp_status.status_code, 200)
+        return json.loads(resp_status.content)
+
     def test_no_coursexml(self):
         """
         Check that the response for a tar.gz import without a course.xml is
@@ -83,17 +98,13 @@ class ImportTestCase(CourseTestCase):
                     "name": self.bad_tar,
                     "course-data": [btar]
                 })
-        self.assertEquals(resp.status_code, 415)
+        # The import is done in the background, so is accepted
+        self.assertEquals(resp.status_code, 200)
         # Check that `import_status` returns the appropriate stage (i.e., the
-        # stage at which import failed).
-        resp_status = self.client.get(
-            self.new_location.url_reverse(
-                'import_status',
-                os.path.split(self.bad_tar)[1]
-            )
-        )
-
-        self.assertEquals(json.loads(resp_status.content)["ImportStatus"], 2)
+        # stage at which import failed), with the error.
+        status = self._import_status(self.bad_tar)
+        self.assertEquals(status["ImportStatus"], 2)
+        self.assertIn("course.xml", status["ErrMsg"])
 
     def test_with_coursexml(self):
         """
@@ -105,6 +116,35 @@ class ImportTestCase(CourseTestCase):
             resp = self.client.post(self.url, args)
 
         self.assertEquals(resp.status_code, 200)
+        status = self._import_status(self.good_tar)
+        self.assertEquals(status["ImportStatus"], 4)
+        self.assertNotIn("ErrMsg", status)
+        # The course module was imported
+        self.assertGreater(status["ItemsProcessed"], 0)
+
+    def test_import_then_export(self):
+        """
+        Check that a course can be exported once a tarball has been imported
+        into it.
+        """
+        with open(self.good_tar) as gtar:
+            args = {"name": self.good_tar, "course-data": [gtar]}
+            self.client.post(self.url, args)
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], 4)
+
+        resp = self.client.get(self.new_location.url_reverse('export/', ''), HTTP_ACCEPT='application/x-tgz')
+        self.assertEquals(resp.status_code, 200)
+        self.assertTrue(resp.get('Content-Disposition').startswith('attachment'))
+        with tarfile.open(fileobj=StringIO(resp.content), mode='r:gz') as tar:
+            names = tar.getnames()
+        self.assertIn('{0}/course.xml'.format(self.course.location.name), names)
+
+    def test_no_import_status(self):
+        """
+        Check that `import_status` returns 0 when no import of the file has
+        been started.
+        """
+        self.assertEquals(self._import_status(self.good_tar), {"ImportStatus": 0})
 
     ## Unsafe tar methods #####################################################
     # Each of these methods creates a tarfile with a single type of unsafe
@@ -180,24 +220,17 @@ class ImportTestCase(CourseTestCase):
             with open(tarpath) as tar:
                 args = { "name": tarpath, "course-data": [tar] }
                 resp = self.client.post(self.url, args)
-            self.assertEquals(resp.status_code, 400)
-            self.assertTrue("SuspiciousFileOperation" in resp.content)
+            self.assertEquals(resp.status_code, 200)
+            # Check that `import_status` reports the import failed while
+            # extracting the file
+            status = self._import_status(tarpath)
+            self.assertEquals(status["ImportStatus"], 1)
+            self.assertIn("Unsafe tar file", status["ErrMsg"])
 
         try_tar(self._fifo_tar())
         try_tar(self._symlink_tar())
         try_tar(self._outside_tar())
         try_tar(self._outside_tar2())
-        # Check that `import_status` returns the appropriate stage (i.e.,
-        # either 3, indicating all previous steps are completed, or 0,
-        # indicating no upload in progress)
-        resp_status = self.client.get(
-            self.new_location.url_reverse(
-                'import_status',
-                os.path.split(self.good_tar)[1]
-            )
-        )
-        import_status = json.loads(resp_status.content)["ImportStatus"]
-        self.assertIn(import_status, (0, 3))
 
 
 @override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
@@ -246,6 +279,11 @@ class ExportTestCase(CourseTestCase):
         """ Export success helper method. """
         self.assertEquals(resp.status_code, 200)
         self.assertTrue(resp.get('Content-Disposition').startswith('attachment'))
+        # The streamed tarball holds the exported course
+        with tarfile.open(fileobj=StringIO(resp.content), mode='r:gz') as tar:
+            names = tar.getnames()
+        self.assertIn('Robot_Super_Course/course.xml', names)
+        self.assertIn('Robot_Super_Course/policies/assets.json', names)
 
     def test_export_failure_top_level(self):
         """
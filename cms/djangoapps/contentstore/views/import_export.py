@@ -4,29 +4,22 @@ courses
 """
 import logging
 import os
-import tarfile
-import shutil
 import re
-from tempfile import mkdtemp
 from path import path
 
 from django.conf import settings
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
 from django_future.csrf import ensure_csrf_cookie
-from django.core.servers.basehttp import FileWrapper
-from django.core.files.temp import NamedTemporaryFile
-from django.core.exceptions import SuspiciousOperation, PermissionDenied
+from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseNotFound
 from django.views.decorators.http import require_http_methods, require_GET
 from django.utils.translation import ugettext as _
 
 from edxmako.shortcuts import render_to_response
-from auth.authz import create_all_course_groups
 
-from xmodule.modulestore.xml_importer import import_from_xml
 from xmodule.contentstore.django import contentstore
-from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_exporter import export_to_tarball
 from xmodule.modulestore.django import modulestore, loc_mapper
 from xmodule.exceptions import SerializationError
 
@@ -34,7 +27,9 @@ from xmodule.modulestore.locator import BlockUsageLocator
 from .access import has_access
 
 from util.json_request import JsonResponse
-from extract_tar import safetar_extractall
+
+from contentstore.models import CourseImportStatus
+from contentstore.tasks import import_course
 
 
 __all__ = ['import_handler', 'import_status_handler', 'export_handler']
@@ -101,6 +96,8 @@ def import_handler(request, tag=None, package_id=None, branch=None, version_guid
             # stream out the uploaded files in chunks to disk
             if int(content_range['start']) == 0:
                 mode = "wb+"
+                # Forget about any previous import of this file
+                CourseImportStatus.start(old_location.course_id, filename, request.user)
             else:
                 mode = "ab+"
                 size = os.path.getsize(temp_filepath)
@@ -146,107 +143,14 @@ def import_handler(request, tag=None, package_id=None, branch=None, version_guid
 
             else:   # This was the last chunk.
 
-                # Use sessions to keep info about import progress
-                session_status = request.session.setdefault("import_status", {})
-                key = location.package_id + filename
-                session_status[key] = 1
-                request.session.modified = True
-
-                # Do everything from now on in a try-finally block to make sure
-                # everything is properly cleaned up.
-                try:
-
-                    tar_file = tarfile.open(temp_filepath)
-                    try:
-                        safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
-                    except SuspiciousOperation as exc:
-                        return JsonResponse(
-                            {
-                                'ErrMsg': 'Unsafe tar file. Aborting import.',
-                                'SuspiciousFileOperationMsg': exc.args[0],
-                                'Stage': 1
-                            },
-                            status=400
-                        )
-                    finally:
-                        tar_file.close()
-
-                    session_status[key] = 2
-                    request.session.modified = True
-
-                    # find the 'course.xml' file
-                    def get_all_files(directory):
-                        """
-                        For each file in the directory, yield a 2-tuple of (file-name,
-                        directory-path)
-                        """
-                        for dirpath, _dirnames, filenames in os.walk(directory):
-                            for filename in filenames:
-                                yield (filename, dirpath)
-
-                    def get_dir_for_fname(directory, filename):
-                        """
-                        Returns the dirpath for the first file found in the directory
-                        with the given name.  If there is no file in the directory with
-                        the specified name, return None.
-                        """
-                        for fname, dirpath in get_all_files(directory):
-                            if fname == filename:
-                                return dirpath
-                        return None
-
-                    fname = "course.xml"
-
-                    dirpath = get_dir_for_fname(course_dir, fname)
-
-                    if not dirpath:
-                        return JsonResponse(
-                            {
-
-                                'ErrMsg': _('Could not find the course.xml file in the package.'),
-                                'Stage': 2
-                            },
-                            status=415
-                        )
-
-                    logging.debug('found course.xml at {0}'.format(dirpath))
-
-                    if dirpath != course_dir:
-                        for fname in os.listdir(dirpath):
-                            shutil.move(dirpath / fname, course_dir)
-
-                    _module_store, course_items = import_from_xml(
-                        modulestore('direct'),
-                        settings.GITHUB_REPO_ROOT,
-                        [course_subdir],
-                        load_error_modules=False,
-                        static_content_store=contentstore(),
-                        target_location_namespace=old_location,
-                        draft_store=modulestore()
-                    )
-
-                    logging.debug('new course at {0}'.format(course_items[0].location))
-
-                    session_status[key] = 3
-                    request.session.modified = True
-
-                    create_all_course_groups(request.user, course_items[0].location)
-                    logging.debug('created all course groups at {0}'.format(course_items[0].location))
-
-                # Send errors to client with stage at which error occured.
-                except Exception as exception:   # pylint: disable=W0703
-                    return JsonResponse(
-                        {
-                            'ErrMsg': str(exception),
-                            'Stage': session_status[key]
-                        },
-                        status=400
-                    )
-
-                finally:
-                    shutil.rmtree(course_dir)
+                # Extract, validate and import the course in the background,
+                # as that can take longer than a request is allowed to. The
+                # import page polls import_status_handler for its progress.
+                import_status = CourseImportStatus.start(old_location.course_id, filename, request.user)
+                import_status.update(stage=CourseImportStatus.EXTRACTING)
+                import_course.delay(import_status.id, old_location.url(), course_subdir)
 
-                return JsonResponse({'Status': 'OK'})
+                return JsonResponse({'ImportStatus': CourseImportStatus.EXTRACTING})
     elif request.method == 'GET':  # assume html
         course_module = modulestore().get_item(old_location)
         return render_to_response('import.html', {
@@ -265,23 +169,32 @@ def import_status_handler(request, tag=None, package_id=None, branch=None, versi
     """
     Returns an integer corresponding to the status of a file import. These are:
 
-        0 : No status info found (import done or upload still in progress)
+        0 : No status info found (upload still in progress)
         1 : Extracting file
         2 : Validating.
         3 : Importing to mongo
+        4 : Import complete
 
+    along with the number of modules imported so far, and the error the
+    import failed with at that stage, if it failed.
     """
     location = BlockUsageLocator(package_id=package_id, branch=branch, version_guid=version_guid, block_id=block)
     if not has_access(request.user, location):
         raise PermissionDenied()
 
+    old_location = loc_mapper().translate_locator_to_location(location)
     try:
-        session_status = request.session["import_status"]
-        status = session_status[location.package_id + filename]
-    except KeyError:
-        status = 0
+        import_status = CourseImportStatus.objects.get(course_id=old_location.course_id, filename=filename)
+    except CourseImportStatus.DoesNotExist:
+        return JsonResponse({"ImportStatus": CourseImportStatus.UPLOADING})
 
-    return JsonResponse({"ImportStatus": status})
+    status = {
+        "ImportStatus": import_status.stage,
+        "ItemsProcessed": import_status.items_processed,
+    }
+    if import_status.error:
+        status["ErrMsg"] = import_status.error
+    return JsonResponse(status)
 
 
 @ensure_csrf_cookie
@@ -315,11 +228,10 @@ def export_handler(request, tag=None, package_id=None, branch=None, version_guid
     export_url = location.url_reverse('export') + '?_accept=application/x-tgz'
     if 'application/x-tgz' in requested_format:
         name = old_location.name
-        export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-        root_dir = path(mkdtemp())
 
         try:
-            export_to_xml(modulestore('direct'), contentstore(), old_location, root_dir, name, modulestore())
+            # The modules are exported now, and the assets as the tarball is streamed
+            tarball = export_to_tarball(modulestore('direct'), contentstore(), old_location, name, modulestore())
 
         except SerializationError, e:
             logging.exception('There was an error exporting course {0}. {1}'.format(course_module.location, unicode(e)))
@@ -362,18 +274,8 @@ def export_handler(request, tag=None, package_id=None, branch=None, version_guid
                 'export_url': export_url
             })
 
-        logging.debug('tar file being generated at {0}'.format(export_file.name))
-        tar_file = tarfile.open(name=export_file.name, mode='w:gz')
-        tar_file.add(root_dir / name, arcname=name)
-        tar_file.close()
-
-        # remove temp dir
-        shutil.rmtree(root_dir / name)
-
-        wrapper = FileWrapper(export_file)
-        response = HttpResponse(wrapper, content_type='application/x-tgz')
-        response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(export_file.name)
-        response['Content-Length'] = os.path.getsize(export_file.name)
+        response = HttpResponse(tarball, content_type='application/x-tgz')
+        response['Content-Disposition'] = 'attachment; filename=%s.tar.gz' % name
         return response
 
     elif 'text/html' in requested_format:
@@ -41,22 +41,32 @@ define(
 
         /**
          * Check for import status updates every `timeout` milliseconds, and update
-         * the page accordingly.
+         * the page accordingly, until the import is complete or has failed.
          * @param {string} url Url to call for status updates.
          * @param {int} timeout Number of milliseconds to wait in between ajax calls
          *     for new updates.
          * @param {int} stage Starting stage.
+         * @param {function} onError Called with the stage and error message if
+         *     the import fails.
          */
-        var getStatus = function (url, timeout, stage) {
+        var getStatus = function (url, timeout, stage, onError) {
             var currentStage = stage || 0;
             if (CourseImport.stopGetStatus) { return ;}
+            if (currentStage == 4) {
+                CourseImport.displayFinishedImport();
+                return;
+            }
             updateStage(currentStage);
-            if (currentStage == 3 ) { return ;}
             var time = timeout || 1000;
             $.getJSON(url,
                 function (data) {
+                    if (data.ErrMsg) {
+                        CourseImport.stopGetStatus = true;
+                        onError(data.ImportStatus, data.ErrMsg);
+                        return;
+                    }
                     setTimeout(function () {
-                        getStatus(url, time, data.ImportStatus);
+                        getStatus(url, time, data.ImportStatus, onError);
                     }, time);
                 }
             );
@@ -112,12 +122,14 @@ define(
              * Entry point for server feedback. Makes status list visible and starts
              * sending requests to the server for status updates.
              * @param {string} url The url to send Ajax GET requests for updates.
+             * @param {function} onError Called with the stage and error message if
+             *     the import fails.
              */
-            startServerFeedback: function (url){
+            startServerFeedback: function (url, onError){
                 this.stopGetStatus = false;
                 $('div.wrapper-status').removeClass('is-hidden');
                 $('.status-info').show();
-                getStatus(url, 500, 0);
+                getStatus(url, 500, 0, onError || this.stageError);
             },
 
 
@@ -48,7 +48,7 @@ class StaticContentServer(object):
                 if not hasattr(request, "user") or not request.user.is_authenticated():
                     return HttpResponseForbidden('Unauthorized')
                 course_partial_id = "/".join([loc.org, loc.course])
-                if not request.user.is_staff and not CourseEnrollment.is_enrolled_by_partial(
+                if not request.user.is_staff and not CourseEnrollment.is_enrolled_by_partial_cached(
                         request.user, course_partial_id):
                     return HttpResponseForbidden('Unauthorized')
 
@@ -112,3 +112,16 @@ class CourseModeModelTest(TestCase):
 
         modes = CourseMode.modes_for_course('second_test_course')
         self.assertEqual([CourseMode.DEFAULT_MODE], modes)
+
+    def test_modes_for_courses(self):
+        mode1 = Mode(u'honor', u'Honor Code Certificate', 0, '', 'usd', None)
+        mode2 = Mode(u'verified', u'Verified Certificate', 0, '', 'usd', None)
+        for mode in (mode1, mode2):
+            self.create_mode(mode.slug, mode.name, mode.min_price, mode.suggested_prices)
+
+        modes = CourseMode.modes_for_courses([self.course_id, 'second_test_course'])
+        self.assertEqual(
+            {self.course_id: [mode1, mode2], 'second_test_course': [CourseMode.DEFAULT_MODE]},
+            modes
+        )
+        self.assertEqual(CourseMode.modes_for_course(self.course_id), modes[self.course_id])
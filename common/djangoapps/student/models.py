@@ -20,7 +20,7 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db import models, IntegrityError
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver, Signal
 import django.dispatch
 from django.forms import ModelForm, forms
@@ -32,6 +32,7 @@ from pytz import UTC
 import crum
 
 from track import contexts
+from util.cache import cache
 from track.views import server_track
 from eventtracking import tracker
 
@@ -283,6 +284,11 @@ class PendingEmailChange(models.Model):
 EVENT_NAME_ENROLLMENT_ACTIVATED = 'edx.course.enrollment.activated'
 EVENT_NAME_ENROLLMENT_DEACTIVATED = 'edx.course.enrollment.deactivated'
 
+# How long (in seconds) a user's set of enrolled course_ids is kept in the cache.
+# Entries are explicitly invalidated whenever an enrollment changes, so this
+# is only a safety net.
+ENROLLED_COURSE_IDS_CACHE_TIMEOUT = 60 * 60
+
 
 class CourseEnrollment(models.Model):
     """
@@ -551,6 +557,52 @@ class CourseEnrollment(models.Model):
         except cls.DoesNotExist:
             return False
 
+    @classmethod
+    def enrolled_course_ids_cache_key(cls, user_id):
+        """Returns the cache key for the set of course_ids `user_id` is enrolled in."""
+        return u"student.courseenrollment.enrolled_course_ids.{}".format(user_id)
+
+    @classmethod
+    def enrolled_course_ids(cls, user):
+        """
+        Returns the set of course_ids the user is actively enrolled in.
+
+        The set is cached per user and invalidated whenever one of the user's
+        `CourseEnrollment` records is saved or deleted (e.g. through
+        `update_enrollment()`), so it is cheap to call this on every request.
+
+        `user` is a Django User object.
+        """
+        if user.id is None:
+            return frozenset()
+
+        cache_key = cls.enrolled_course_ids_cache_key(user.id)
+        course_ids = cache.get(cache_key)
+        if course_ids is None:
+            course_ids = frozenset(
+                CourseEnrollment.objects.filter(
+                    user=user, is_active=1
+                ).values_list('course_id', flat=True)
+            )
+            cache.set(cache_key, course_ids, ENROLLED_COURSE_IDS_CACHE_TIMEOUT)
+        return course_ids
+
+    @classmethod
+    def is_enrolled_by_partial_cached(cls, user, course_id_partial):
+        """
+        Same as `is_enrolled_by_partial()`, but answered from the cached set of
+        course_ids returned by `enrolled_course_ids()` instead of issuing a
+        `LIKE` query every time. Use this on hot paths such as serving locked
+        static assets.
+
+        `course_id_partial` is a starting substring for a fully qualified
+               course_id (e.g. "edX/Test101/").
+        """
+        return any(
+            course_id.startswith(course_id_partial)
+            for course_id in cls.enrolled_course_ids(user)
+        )
+
     @classmethod
     def enrollment_mode_for_user(cls, user, course_id):
         """
@@ -606,6 +658,16 @@ class CourseEnrollment(models.Model):
             return True
 
 
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def invalidate_enrolled_course_ids_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the cached set of enrolled course_ids for the enrollment's user, so
+    that enrolling or unenrolling is reflected immediately.
+    """
+    cache.delete(CourseEnrollment.enrolled_course_ids_cache_key(instance.user_id))
+
+
 class CourseEnrollmentAllowed(models.Model):
     """
     Table of users (specified by email address strings) who are allowed to enroll in a specified course.
@@ -624,6 +686,53 @@ class CourseEnrollmentAllowed(models.Model):
     def __unicode__(self):
         return "[CourseEnrollmentAllowed] %s: %s (%s)" % (self.email, self.course_id, self.created)
 
+# How long (in seconds) a user's group names are kept in the cache. Changes
+# made through `user.groups` or `group.user_set`, from the LMS or Studio,
+# invalidate it straight away; the timeout bounds staleness from anything
+# else (such as renaming or deleting a Group).
+USER_GROUP_NAMES_CACHE_TIMEOUT = 15 * 60
+
+
+def user_group_names_cache_key(user_id):
+    """
+    Return the cache key holding the group names of the user with id `user_id`
+    """
+    return u"student.user.group_names.{}".format(user_id)
+
+
+def user_group_names(user):
+    """
+    Return the set of lower-cased names of every group `user` belongs to,
+    from the cache if it's there.
+    """
+    cache_key = user_group_names_cache_key(user.id)
+    names = cache.get(cache_key)
+    if names is None:
+        names = set(name.lower() for name in user.groups.values_list('name', flat=True))
+        cache.set(cache_key, names, USER_GROUP_NAMES_CACHE_TIMEOUT)
+    return names
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_group_names_cache(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the cached group names of users whose groups change, so that course
+    team edits (in the LMS or in Studio) take effect immediately.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        # `instance` is a User, and `pk_set` holds Group ids
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        # `instance` is a Group, which is about to lose all of its users
+        user_ids = list(instance.user_set.values_list('id', flat=True))
+    else:
+        user_ids = pk_set
+
+    cache.delete_many([user_group_names_cache_key(user_id) for user_id in user_ids])
+
 # cache_relation(User.profile)
 
 #### Helper methods for use from python manage.py shell and other classes.
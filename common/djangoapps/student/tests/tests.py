@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 import pytz
 
 from django.conf import settings
+from django.core.cache import get_cache
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.test.client import RequestFactory
@@ -494,6 +495,29 @@ class EnrollInCourseTest(TestCase):
         self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
         self.assert_enrollment_event_was_emitted(user, course_id)
 
+    def test_enrolled_course_ids_cache(self):
+        user = User.objects.create(username="jack", email="jack@fake.edx.org")
+        course_id = "edX/Test101/2013"
+        course_id_partial = "edX/Test101"
+
+        with patch('student.models.cache', get_cache('django.core.cache.backends.locmem.LocMemCache')):
+            with self.assertNumQueries(1):
+                self.assertFalse(CourseEnrollment.is_enrolled_by_partial_cached(user, course_id_partial))
+                self.assertFalse(CourseEnrollment.is_enrolled_by_partial_cached(user, course_id_partial))
+
+            # Enrolling invalidates the cached set
+            CourseEnrollment.enroll(user, course_id)
+            with self.assertNumQueries(1):
+                self.assertTrue(CourseEnrollment.is_enrolled_by_partial_cached(user, course_id_partial))
+                self.assertTrue(CourseEnrollment.is_enrolled_by_partial_cached(user, course_id_partial))
+            self.assertEqual(CourseEnrollment.enrolled_course_ids(user), frozenset([course_id]))
+            self.assertFalse(CourseEnrollment.is_enrolled_by_partial_cached(user, "edX/Test102"))
+
+            # ...and so does unenrolling
+            CourseEnrollment.unenroll(user, course_id)
+            self.assertFalse(CourseEnrollment.is_enrolled_by_partial_cached(user, course_id_partial))
+            self.assertEqual(CourseEnrollment.enrolled_course_ids(user), frozenset())
+
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
 class PaidRegistrationTest(ModuleStoreTestCase):
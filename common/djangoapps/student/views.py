@@ -46,7 +46,9 @@ from student.models import (
 from student.forms import PasswordResetFormNoActive
 
 from verify_student.models import SoftwareSecurePhotoVerification
-from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.models import (
+    CertificateStatuses, certificate_status_for_student, certificate_statuses_for_student
+)
 
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore.exceptions import ItemNotFoundError
@@ -55,7 +57,7 @@ from xmodule.modulestore import MONGO_MODULESTORE_TYPE
 
 from collections import namedtuple
 
-from courseware.courses import get_courses, sort_by_announcement
+from courseware.courses import get_courses, get_course_overviews, sort_by_announcement
 from courseware.access import has_access
 
 from external_auth.models import ExternalAuthMap
@@ -279,16 +281,20 @@ def register_user(request, extra_context=None):
     return render_to_response('register.html', context)
 
 
-def complete_course_mode_info(course_id, enrollment):
+def complete_course_mode_info(course_id, enrollment, modes=None):
     """
     We would like to compute some more information from the given course modes
     and the user's current enrollment
 
+    `modes` is the dict of the course's modes returned by
+    `CourseMode.modes_for_course_dict`, if it has already been looked up.
+
     Returns the given information:
         - whether to show the course upsell information
         - numbers of days until they can't upsell anymore
     """
-    modes = CourseMode.modes_for_course_dict(course_id)
+    if modes is None:
+        modes = CourseMode.modes_for_course_dict(course_id)
     mode_info = {'show_upsell': False, 'days_for_upsell': None}
     # we want to know if the user is already verified and if verified is an
     # option
@@ -309,14 +315,18 @@ def dashboard(request):
 
     # Build our (course, enrollment) list for the user, but ignore any courses that no
     # longer exist (because the course IDs have changed). Still, we don't delete those
-    # enrollments, because it could have been a data push snafu.
+    # enrollments, because it could have been a data push snafu. The courses are
+    # represented by cached CourseOverviews, rather than loaded from the modulestore.
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    course_overviews = get_course_overviews([enrollment.course_id for enrollment in enrollments])
     course_enrollment_pairs = []
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        try:
-            course_enrollment_pairs.append((course_from_id(enrollment.course_id), enrollment))
-        except ItemNotFoundError:
+    for enrollment in enrollments:
+        if enrollment.course_id in course_overviews:
+            course_enrollment_pairs.append((course_overviews[enrollment.course_id], enrollment))
+        else:
             log.error("User {0} enrolled in non-existent course {1}"
                       .format(user.username, enrollment.course_id))
+    course_ids = [course.id for course, _enrollment in course_enrollment_pairs]
 
     course_optouts = Optout.objects.filter(user=user).values_list('course_id', flat=True)
 
@@ -335,23 +345,37 @@ def dashboard(request):
     show_courseware_links_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
                                           if has_access(request.user, course, 'load'))
 
-    course_modes = {course.id: complete_course_mode_info(course.id, enrollment) for course, enrollment in course_enrollment_pairs}
-    cert_statuses = {course.id: cert_info(request.user, course) for course, _enrollment in course_enrollment_pairs}
-
-    # only show email settings for Mongo course and when bulk email is turned on
-    show_email_settings_for = frozenset(
-        course.id for course, _enrollment in course_enrollment_pairs if (
-            settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL'] and
-            modulestore().get_modulestore_type(course.id) == MONGO_MODULESTORE_TYPE and
-            CourseAuthorization.instructor_email_enabled(course.id)
+    all_modes = CourseMode.modes_for_courses(course_ids)
+    course_modes = {
+        course.id: complete_course_mode_info(
+            course.id, enrollment, {mode.slug: mode for mode in all_modes[course.id]}
         )
+        for course, enrollment in course_enrollment_pairs
+    }
+
+    certificate_statuses = certificate_statuses_for_student(
+        request.user, [course.id for course, _enrollment in course_enrollment_pairs if course.has_ended()]
     )
+    cert_statuses = {
+        course.id: _cert_info(request.user, course, certificate_statuses[course.id])
+        if course.id in certificate_statuses else {}
+        for course, _enrollment in course_enrollment_pairs
+    }
+
+    # only show email settings for Mongo course and when bulk email is turned on
+    show_email_settings_for = frozenset()
+    if settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL']:
+        show_email_settings_for = frozenset(CourseAuthorization.instructor_email_enabled_for_courses(
+            course.id for course, _enrollment in course_enrollment_pairs
+            if course.modulestore_type == MONGO_MODULESTORE_TYPE
+        ))
 
     # Verification Attempts
     verification_status, verification_msg = SoftwareSecurePhotoVerification.user_status(user)
 
+    # Equivalent to CourseEnrollment.refundable, using the modes looked up above
     show_refund_option_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
-                                       if _enrollment.refundable())
+                                       if any(mode.slug == 'verified' for mode in all_modes[course.id]))
 
     # get info w.r.t ExternalAuthMap
     external_auth_map = None
@@ -3,6 +3,9 @@ XASSET_SRCREF_PREFIX = 'xasset:'
 
 XASSET_THUMBNAIL_TAIL_NAME = '.jpg'
 
+# How much of an asset's stream is read at a time when exporting it
+EXPORT_CHUNK_SIZE = 256 * 1024
+
 import os
 import logging
 import StringIO
@@ -147,9 +150,9 @@ class StaticContentStream(StaticContent):
                                                   length=length, locked=locked)
         self._stream = stream
 
-    def stream_data(self):
+    def stream_data(self, chunk_size=1024):
         while True:
-            chunk = self._stream.read(1024)
+            chunk = self._stream.read(chunk_size)
             if len(chunk) == 0:
                 break
             yield chunk
@@ -8,7 +8,7 @@ from xmodule.contentstore.content import XASSET_LOCATION_TAG
 
 import logging
 
-from .content import StaticContent, ContentStore, StaticContentStream
+from .content import StaticContent, ContentStore, StaticContentStream, EXPORT_CHUNK_SIZE
 from xmodule.exceptions import NotFoundError
 from fs.osfs import OSFS
 import os
@@ -104,18 +104,45 @@ class MongoContentStore(ContentStore):
             pass
 
     def export(self, location, output_directory):
-        content = self.find(location)
+        content = self.find(location, as_stream=True)
+        try:
+            output_directory = os.path.join(output_directory, os.path.dirname(self._export_path(content)))
 
-        if content.import_path is not None:
-            output_directory = output_directory + '/' + os.path.dirname(content.import_path)
+            if not os.path.exists(output_directory):
+                os.makedirs(output_directory)
 
-        if not os.path.exists(output_directory):
-            os.makedirs(output_directory)
+            disk_fs = OSFS(output_directory)
 
-        disk_fs = OSFS(output_directory)
+            # copy the asset out of GridFS a chunk at a time rather than reading it into memory
+            with disk_fs.open(content.name, 'wb') as asset_file:
+                for chunk in content.stream_data(EXPORT_CHUNK_SIZE):
+                    asset_file.write(chunk)
+        finally:
+            content.close()
 
-        with disk_fs.open(content.name, 'wb') as asset_file:
-            asset_file.write(content.data)
+    @staticmethod
+    def _export_path(content):
+        """
+        Returns the path, relative to the static directory of an exported
+        course, that `content` is exported to.
+        """
+        if content.import_path is not None:
+            return os.path.join(os.path.dirname(content.import_path), content.name)
+        return content.name
+
+    @staticmethod
+    def _get_assets_policy(assets):
+        """
+        Returns the attributes of each of `assets` to export to the assets
+        policy file, by asset name.
+        """
+        policy = {}
+        for asset in assets:
+            asset_location = Location(asset['_id'])
+            for attr, value in asset.iteritems():
+                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize']:
+                    policy.setdefault(asset_location.name, {})[attr] = value
+        return policy
 
     def export_all_for_course(self, course_location, output_directory, assets_policy_file):
         """
@@ -127,18 +154,36 @@ class MongoContentStore(ContentStore):
         :param assets_policy_file: the filename for the policy file which should be in the same
         directory as the other policy files.
         """
-        policy = {}
         assets = self.get_all_content_for_course(course_location)
 
         for asset in assets:
-            asset_location = Location(asset['_id'])
-            self.export(asset_location, output_directory)
-            for attr, value in asset.iteritems():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize']:
-                    policy.setdefault(asset_location.name, {})[attr] = value
+            self.export(Location(asset['_id']), output_directory)
 
         with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f)
+            json.dump(self._get_assets_policy(assets), f)
+
+    def export_streams_for_course(self, course_location):
+        """
+        Returns the policy of all of this course's assets, as export_all_for_course writes it to the
+        policy file, and a generator of a (path, content) pair for each asset, where `content` is a
+        StaticContentStream of the asset and `path` where it's exported to under the static directory.
+        Each stream is closed once the next pair is requested, so that the assets can be exported a
+        chunk at a time without holding any of them in memory.
+
+        :param course_location: the Location of type 'course'
+        """
+        assets = self.get_all_content_for_course(course_location)
+
+        def asset_streams():
+            """Yields each of the assets in turn"""
+            for asset in assets:
+                content = self.find(Location(asset['_id']), as_stream=True)
+                try:
+                    yield self._export_path(content), content
+                finally:
+                    content.close()
+
+        return self._get_assets_policy(assets), asset_streams()
 
     def get_all_content_thumbnails_for_course(self, location):
         return self._get_all_content_for_course(location, get_thumbnails=True)
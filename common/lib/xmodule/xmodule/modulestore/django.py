@@ -8,6 +8,7 @@ from __future__ import absolute_import
 from importlib import import_module
 
 import re
+from uuid import uuid4
 
 from django.conf import settings
 from django.core.cache import get_cache, InvalidCacheBackendError
@@ -26,6 +27,10 @@ _MODULESTORES = {}
 
 FUNCTION_KEYS = ['render_template']
 
+# Shared by every modulestore created through this module, so that applications
+# can react to course content changes without holding a modulestore instance.
+modulestore_update_signal = Signal(providing_args=['modulestore', 'course_id', 'location'])
+
 
 def load_function(path):
     """
@@ -56,21 +61,62 @@ def create_modulestore_instance(engine, doc_store_config, options):
     else:
         request_cache = None
 
-    try:
-        metadata_inheritance_cache = get_cache('mongo_metadata_inheritance')
-    except InvalidCacheBackendError:
-        metadata_inheritance_cache = get_cache('default')
-
     return class_(
-        metadata_inheritance_cache_subsystem=metadata_inheritance_cache,
+        metadata_inheritance_cache_subsystem=_metadata_inheritance_cache(),
         request_cache=request_cache,
-        modulestore_update_signal=Signal(providing_args=['modulestore', 'course_id', 'location']),
+        modulestore_update_signal=modulestore_update_signal,
         xblock_mixins=getattr(settings, 'XBLOCK_MIXINS', ()),
         doc_store_config=doc_store_config,
         **_options
     )
 
 
+def _metadata_inheritance_cache():
+    """
+    Returns the cache that the modulestores use for metadata inheritance trees.
+    This cache is shared between Studio and the LMS.
+    """
+    try:
+        return get_cache('mongo_metadata_inheritance')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def _course_content_version_key(course_id_no_run):
+    """
+    Returns the cache key holding the content version of the course identified
+    by `course_id_no_run` (i.e. "org/course", as sent by modulestore_update_signal)
+    """
+    return u'course_content_version.{}'.format(course_id_no_run)
+
+
+def course_content_version(location):
+    """
+    Returns an opaque token for the current version of the content of the
+    course that `location` belongs to. The token changes whenever the course
+    is updated through a modulestore, so it can be used as part of the cache
+    key for data derived from the course's content.
+    """
+    cache = _metadata_inheritance_cache()
+    key = _course_content_version_key(u'/'.join([location.org, location.course]))
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_course_content_version(sender, course_id=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Receiver for modulestore_update_signal: forget the content version of the
+    updated course, so that a new one is issued on next access.
+    """
+    if course_id is not None:
+        _metadata_inheritance_cache().delete(_course_content_version_key(course_id))
+
+modulestore_update_signal.connect(invalidate_course_content_version)
+
+
 def get_default_store_name_for_current_request():
     """
     This method will return the appropriate default store mapping for the current Django request,
@@ -7,6 +7,13 @@ from django.test import TestCase
 from xmodule.modulestore.django import editable_modulestore, \
     clear_existing_modulestores
 
+# We may not always have the request_cache module available
+try:
+    from request_cache.middleware import RequestCache
+    HAS_REQUEST_CACHE = True
+except ImportError:
+    HAS_REQUEST_CACHE = False
+
 
 def mixed_store_config(data_dir, mappings):
     """
@@ -259,6 +266,11 @@ class ModuleStoreTestCase(TestCase):
         # Flush the Mongo modulestore
         ModuleStoreTestCase.drop_mongo_collection()
 
+        # Forget whatever the previous test cached for its "request", such
+        # as memoized access decisions
+        if HAS_REQUEST_CACHE:
+            RequestCache().clear_request_cache()
+
         # Call superclass implementation
         super(ModuleStoreTestCase, self)._pre_setup()
 
@@ -1,5 +1,8 @@
 import os.path
+import shutil
+import tempfile
 
+from mock import patch
 from nose.tools import assert_raises, assert_equals  # pylint: disable=E0611
 
 from xmodule.course_module import CourseDescriptor
@@ -42,3 +45,119 @@ class TestXMLModuleStore(object):
         location = CourseDescriptor.id_to_location("edX/toy/2012_Fall")
         errors = modulestore.get_item_errors(location)
         assert errors == []
+
+    def test_lazy_loading(self):
+        """Make sure that lazy stores only load courses when they are needed"""
+        store = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], lazy=True)
+        assert_equals(store.courses, {})
+
+        location = CourseDescriptor.id_to_location("edX/toy/2012_Fall")
+        assert_equals(store.get_instance("edX/toy/2012_Fall", location).location, location)
+        assert_equals(store.courses.keys(), ['toy'])
+
+        # Listing the courses doesn't load them
+        assert_equals(
+            [course.location for course in store.get_courses()],
+            [CourseDescriptor.id_to_location("edX/simple/2012_Fall"), location]
+        )
+        assert_equals(store.courses.keys(), ['toy'])
+
+        assert_equals(len(store.get_course("edX/simple/2012_Fall").get_children()), 2)
+        assert_equals(sorted(store.courses.keys()), ['simple', 'toy'])
+
+    def test_max_resident_courses(self):
+        """Make sure that lazy stores unload the least recently used courses"""
+        store = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], lazy=True, max_resident_courses=1)
+
+        toy_location = CourseDescriptor.id_to_location("edX/toy/2012_Fall")
+        simple_location = CourseDescriptor.id_to_location("edX/simple/2012_Fall")
+        assert store.has_item("edX/toy/2012_Fall", toy_location)
+        assert store.has_item("edX/simple/2012_Fall", simple_location)
+        assert_equals(store.courses.keys(), ['simple'])
+        assert_equals(store.modules.keys(), ["edX/simple/2012_Fall"])
+
+        # Unloaded courses are loaded again when they are next needed
+        assert_equals(store.get_instance("edX/toy/2012_Fall", toy_location).location, toy_location)
+        assert_equals(store.courses.keys(), ['toy'])
+
+    def test_get_courses_within_max_resident_courses(self):
+        """Make sure that listing the courses of a lazy store doesn't load or unload any"""
+        store = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], lazy=True, max_resident_courses=1)
+
+        simple_location = CourseDescriptor.id_to_location("edX/simple/2012_Fall")
+        assert store.has_item("edX/simple/2012_Fall", simple_location)
+
+        courses = store.get_courses()
+        assert_equals(
+            [course.location for course in courses],
+            [simple_location, CourseDescriptor.id_to_location("edX/toy/2012_Fall")]
+        )
+        assert_equals(len(courses[0].get_children()), 2)
+        # Courses that aren't loaded are listed with their policy, but no children
+        assert_equals(courses[1].display_name, "Toy Course")
+        assert_equals(courses[1].get_children(), [])
+        assert_equals(store.courses.keys(), ['simple'])
+        assert_equals(store.modules.keys(), ["edX/simple/2012_Fall"])
+
+    def test_unloaded_during_lookup(self):
+        """Make sure that a course unloaded by another thread while it is being looked up is still found"""
+        store = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], lazy=True, max_resident_courses=1)
+        ensure_course_loaded = store._ensure_course_loaded  # pylint: disable=protected-access
+        unloaded = []
+
+        def ensure_course_loaded_then_unload(course_id):
+            """Load the course, then load another one in its place, as another thread could"""
+            course_state = ensure_course_loaded(course_id)
+            if not unloaded:
+                unloaded.append(course_id)
+                ensure_course_loaded("edX/simple/2012_Fall")
+            return course_state
+
+        toy_location = CourseDescriptor.id_to_location("edX/toy/2012_Fall")
+        chapter_location = toy_location.replace(category='chapter', name='Overview')
+        lookups = [
+            lambda: assert_equals(store.get_instance("edX/toy/2012_Fall", toy_location).location, toy_location),
+            lambda: assert_equals(store.get_parent_locations(chapter_location, "edX/toy/2012_Fall"), [toy_location]),
+        ]
+        for lookup in lookups:
+            del unloaded[:]
+            with patch.object(store, '_ensure_course_loaded', side_effect=ensure_course_loaded_then_unload):
+                lookup()
+            assert_equals(store.courses.keys(), ['simple'])
+
+    def test_course_snapshots(self):
+        """Make sure that courses are loaded from their snapshots when unchanged"""
+        snapshot_dir = tempfile.mkdtemp()
+        try:
+            store = XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir)
+            assert_equals(len(os.listdir(snapshot_dir)), 1)
+
+            with patch.object(XMLModuleStore, 'load_course', side_effect=Exception("Not loaded from snapshot")):
+                snapshot_store = XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir)
+
+            assert_equals(
+                sorted(snapshot_store.modules["edX/toy/2012_Fall"].keys()),
+                sorted(store.modules["edX/toy/2012_Fall"].keys())
+            )
+            course = snapshot_store.get_courses()[0]
+            assert_equals(course.location, store.get_courses()[0].location)
+            assert_equals(course.grade_cutoffs, store.get_courses()[0].grade_cutoffs)
+            assert_equals(
+                [child.location for child in course.get_children()],
+                [child.location for child in store.get_courses()[0].get_children()]
+            )
+            check_path_to_location(snapshot_store)
+        finally:
+            shutil.rmtree(snapshot_dir)
+
+    def test_parallel_loading(self):
+        """Make sure that courses can be loaded in several processes"""
+        snapshot_dir = tempfile.mkdtemp()
+        try:
+            store = XMLModuleStore(
+                DATA_DIR, course_dirs=['toy', 'simple'], snapshot_dir=snapshot_dir, load_processes=2
+            )
+            assert_equals(len(os.listdir(snapshot_dir)), 2)
+            assert_equals(sorted(store.courses.keys()), ['simple', 'toy'])
+        finally:
+            shutil.rmtree(snapshot_dir)
@@ -1,13 +1,18 @@
+import copy
+import cPickle
 import hashlib
 import json
 import logging
+import multiprocessing
 import os
 import re
 import sys
 import glob
+import threading
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from cStringIO import StringIO
+from functools import partial
 from fs.osfs import OSFS
 from importlib import import_module
 from lxml import etree
@@ -18,16 +23,18 @@ from xmodule.errortracker import make_error_tracker, exc_info_to_str
 from xmodule.course_module import CourseDescriptor
 from xmodule.mako_module import MakoDescriptorSystem
 from xmodule.x_module import XMLParsingSystem, XModuleDescriptor
+from xmodule.xml_module import is_pointer_tag, name_to_pathname
 
 from xmodule.html_module import HtmlDescriptor
 from xblock.core import XBlock
 from xblock.fields import ScopeIds
 from xblock.field_data import DictFieldData
+from xblock.runtime import DbModel
 
 from . import ModuleStoreReadBase, Location, XML_MODULESTORE_TYPE
 
 from .exceptions import ItemNotFoundError
-from .inheritance import compute_inherited_metadata
+from .inheritance import compute_inherited_metadata, InheritanceKeyValueStore
 
 edx_xml_parser = etree.XMLParser(dtd_validation=False, load_dtd=False,
                                  remove_comments=True, remove_blank_text=True)
@@ -36,6 +43,10 @@ etree.set_default_parser(edx_xml_parser)
 
 log = logging.getLogger(__name__)
 
+# Bump this whenever the format of course snapshots changes, so that old
+# snapshots are ignored
+SNAPSHOT_FORMAT_VERSION = 1
+
 
 # VS[compat]
 # TODO (cpennington): Remove this once all fall 2012 courses have been imported
@@ -292,11 +303,25 @@ class ParentTracker(object):
         return list(self._parents[child])
 
 
+def _build_course_snapshot(store_options, course_dir):
+    """
+    Load `course_dir` into a new XMLModuleStore created with `store_options`,
+    so that its snapshot is written. Run in a worker process by
+    XMLModuleStore, to load several courses in parallel.
+    """
+    try:
+        XMLModuleStore(course_dirs=[], **store_options).try_load_course(course_dir)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Failed to build a snapshot of course '%s'", course_dir)
+
+
 class XMLModuleStore(ModuleStoreReadBase):
     """
     An XML backed ModuleStore
     """
-    def __init__(self, data_dir, default_class=None, course_dirs=None, load_error_modules=True, **kwargs):
+    def __init__(self, data_dir, default_class=None, course_dirs=None, load_error_modules=True,
+                 lazy=False, max_resident_courses=None, warm_up=False,
+                 snapshot_dir=None, load_processes=None, **kwargs):
         """
         Initialize an XMLModuleStore from data_dir
 
@@ -307,6 +332,24 @@ class XMLModuleStore(ModuleStoreReadBase):
 
         course_dirs: If specified, the list of course_dirs to load. Otherwise,
             load all course dirs
+
+        lazy: If True, only read the course id of each course up front, and
+            load a course the first time it is asked for
+
+        max_resident_courses: If set (and lazy is True), the number of courses
+            to keep loaded. The least recently used courses are unloaded beyond
+            this, and will be loaded again when next needed
+
+        warm_up: If True (and lazy is True), load courses, up to
+            max_resident_courses of them, in a background thread
+
+        snapshot_dir: If specified, a directory in which to keep a snapshot
+            of each loaded course. Courses whose files haven't changed since
+            their snapshot was taken are loaded from it instead of from xml
+
+        load_processes: If specified (and snapshot_dir is too), the number of
+            processes to load courses that don't have a snapshot yet in, in
+            parallel, before they are loaded from their snapshots
         """
         super(XMLModuleStore, self).__init__(**kwargs)
 
@@ -316,6 +359,7 @@ class XMLModuleStore(ModuleStoreReadBase):
         self.errored_courses = {}  # course_dir -> errorlog, for dirs that failed to load
 
         self.load_error_modules = load_error_modules
+        self.snapshot_dir = path(snapshot_dir) if snapshot_dir else None
 
         if default_class is None:
             self.default_class = None
@@ -326,6 +370,14 @@ class XMLModuleStore(ModuleStoreReadBase):
 
         self.parent_trackers = defaultdict(ParentTracker)
 
+        self.lazy = lazy
+        self.max_resident_courses = max_resident_courses
+        self._course_dirs_by_id = {}  # course_id -> course_dir, for every course found
+        self._resident_course_ids = OrderedDict()  # course_id -> course_dir, least recently used first
+        self._course_roots = {}  # course_id -> XBlock for just the root of a course that isn't resident
+        self._loading_course_dirs = set()
+        self._load_lock = threading.RLock()
+
         # If we are specifically asked for missing courses, that should
         # be an error.  If we are asked for "all" courses, find the ones
         # that have a course.xml. We sort the dirs in alpha order so we always
@@ -334,8 +386,25 @@ class XMLModuleStore(ModuleStoreReadBase):
         if course_dirs is None:
             course_dirs = sorted([d for d in os.listdir(self.data_dir) if
                                   os.path.exists(self.data_dir / d / "course.xml")])
+        if load_processes and self.snapshot_dir and not lazy:
+            self._build_course_snapshots(course_dirs, load_processes, dict(
+                data_dir=data_dir,
+                default_class=default_class,
+                load_error_modules=load_error_modules,
+                snapshot_dir=snapshot_dir,
+                xblock_mixins=self.xblock_mixins,
+            ))
+
         for course_dir in course_dirs:
-            self.try_load_course(course_dir)
+            if lazy:
+                self._add_course_dir(course_dir)
+            else:
+                self.try_load_course(course_dir)
+
+        if lazy and warm_up:
+            warm_up_thread = threading.Thread(target=self._warm_up, name='XMLModuleStore warm-up')
+            warm_up_thread.daemon = True
+            warm_up_thread.start()
 
     def try_load_course(self, course_dir):
         '''
@@ -348,7 +417,13 @@ class XMLModuleStore(ModuleStoreReadBase):
         errorlog = make_error_tracker()
         course_descriptor = None
         try:
-            course_descriptor = self.load_course(course_dir, errorlog.tracker)
+            snapshot_key = self._course_snapshot_key(course_dir) if self.snapshot_dir else None
+            if snapshot_key is not None:
+                course_descriptor = self._load_course_snapshot(course_dir, snapshot_key, errorlog)
+            if course_descriptor is None:
+                course_descriptor = self.load_course(course_dir, errorlog.tracker)
+                if snapshot_key is not None and not isinstance(course_descriptor, ErrorDescriptor):
+                    self._save_course_snapshot(course_dir, snapshot_key, course_descriptor, errorlog)
         except Exception as e:
             msg = "ERROR: Failed to load course '{0}': {1}".format(course_dir.encode("utf-8"),
                     unicode(e))
@@ -359,10 +434,307 @@ class XMLModuleStore(ModuleStoreReadBase):
             self.courses[course_dir] = course_descriptor
             self._location_errors[course_descriptor.location] = errorlog
             self.parent_trackers[course_descriptor.id].make_known(course_descriptor.location)
+            self._course_dirs_by_id[course_descriptor.id] = course_dir
+            if self.lazy:
+                self._mark_course_resident(course_descriptor.id, course_dir)
         else:
             # Didn't load course.  Instead, save the errors elsewhere.
             self.errored_courses[course_dir] = errorlog
 
+    def _build_course_snapshots(self, course_dirs, processes, store_options):
+        """
+        Load each of `course_dirs` that doesn't have an up to date snapshot in
+        a pool of `processes` worker processes, writing their snapshots.
+        """
+        course_dirs = [
+            course_dir for course_dir in course_dirs
+            if not os.path.exists(self._course_snapshot_path(course_dir, self._course_snapshot_key(course_dir)))
+        ]
+        if len(course_dirs) < 2:
+            return
+
+        log.info('Loading %d courses in %d processes', len(course_dirs), processes)
+        pool = multiprocessing.Pool(processes)
+        try:
+            pool.map(partial(_build_course_snapshot, store_options), course_dirs)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _course_snapshot_key(self, course_dir):
+        """
+        Return a hash of the contents of `course_dir`, and of the settings that
+        affect how it is loaded, identifying its snapshot.
+        """
+        digest = hashlib.sha1()
+        digest.update(repr((SNAPSHOT_FORMAT_VERSION, self.default_class, self.load_error_modules)))
+
+        root = self.data_dir / course_dir
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            # Static files aren't read while loading the course, and can be large
+            if path(dirpath) == root and 'static' in dirnames:
+                dirnames.remove('static')
+            for filename in sorted(filenames):
+                filepath = path(dirpath) / filename
+                digest.update(root.relpathto(filepath) + '\0')
+                with open(filepath, 'rb') as snapshot_input:
+                    for chunk in iter(lambda: snapshot_input.read(65536), ''):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
+    def _course_snapshot_path(self, course_dir, snapshot_key):
+        """
+        Return the path of the snapshot of `course_dir` with `snapshot_key`
+        """
+        return self.snapshot_dir / '{0}.{1}.snapshot'.format(course_dir, snapshot_key)
+
+    def _save_course_snapshot(self, course_dir, snapshot_key, course_descriptor, errorlog):
+        """
+        Write a snapshot of the course `course_descriptor` that was just loaded
+        from `course_dir`, from which it can later be loaded without parsing
+        its xml.
+
+        The snapshot holds the field data of each of the course's modules,
+        along with its parent pointers and the errors from loading it.
+        """
+        course_id = course_descriptor.id
+        modules = []
+        for descriptor in self.modules[course_id].itervalues():
+            # Make sure any computed fields are in the field data
+            descriptor.save()
+            field_data = descriptor._field_data  # pylint: disable=protected-access
+            if isinstance(field_data, DbModel) and isinstance(field_data._kvs, InheritanceKeyValueStore):  # pylint: disable=protected-access
+                kvs = field_data._kvs  # pylint: disable=protected-access
+                data = ('kvs', kvs._fields, kvs.inherited_settings)  # pylint: disable=protected-access
+            elif isinstance(field_data, DictFieldData):
+                data = ('dict', field_data._data, None)  # pylint: disable=protected-access
+            else:
+                log.info("Not snapshotting course '%s': can't snapshot %r", course_dir, descriptor)
+                return
+
+            unmixed_class = getattr(descriptor, 'unmixed_class', None)
+            modules.append((
+                unmixed_class or descriptor.__class__,
+                unmixed_class is not None,
+                descriptor.scope_ids,
+                getattr(descriptor, 'data_dir', None),
+                data,
+            ))
+
+        snapshot = {
+            'course_id': course_id,
+            'course_location': course_descriptor.location,
+            'modules': modules,
+            'parents': self.parent_trackers[course_id]._parents,  # pylint: disable=protected-access
+            'errors': errorlog.errors,
+        }
+
+        snapshot_path = self._course_snapshot_path(course_dir, snapshot_key)
+        # Write to a temporary file first, so that other processes never see
+        # a partial snapshot
+        temp_path = snapshot_path + '.{0}.tmp'.format(os.getpid())
+        try:
+            if not self.snapshot_dir.exists():
+                self.snapshot_dir.makedirs_p()
+            with open(temp_path, 'wb') as snapshot_output:
+                cPickle.dump(snapshot, snapshot_output, cPickle.HIGHEST_PROTOCOL)
+            os.rename(temp_path, snapshot_path)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Failed to write a snapshot of course '%s'", course_dir)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _load_course_snapshot(self, course_dir, snapshot_key, errorlog):
+        """
+        Load the course in `course_dir` from its snapshot with `snapshot_key`.
+
+        Returns the CourseDescriptor, or None if there is no usable snapshot.
+        """
+        snapshot_path = self._course_snapshot_path(course_dir, snapshot_key)
+        if not os.path.exists(snapshot_path):
+            return None
+
+        try:
+            with open(snapshot_path, 'rb') as snapshot_input:
+                snapshot = cPickle.load(snapshot_input)
+
+            course_id = snapshot['course_id']
+            system = ImportSystem(
+                xmlstore=self,
+                course_id=course_id,
+                course_dir=course_dir,
+                error_tracker=errorlog.tracker,
+                parent_tracker=self.parent_trackers[course_id],
+                load_error_modules=self.load_error_modules,
+                policy={},
+                mixins=self.xblock_mixins,
+            )
+
+            modules = {}
+            for block_class, mixed, scope_ids, data_dir, (kind, fields, inherited_settings) in snapshot['modules']:
+                if mixed:
+                    block_class = system.mixologist.mix(block_class)
+                if kind == 'kvs':
+                    field_data = DbModel(InheritanceKeyValueStore(
+                        initial_values=fields,
+                        inherited_settings=inherited_settings
+                    ))
+                else:
+                    field_data = DictFieldData(fields)
+
+                descriptor = system.construct_xblock_from_class(block_class, scope_ids, field_data)
+                descriptor.data_dir = data_dir
+                modules[descriptor.location] = descriptor
+
+            course_descriptor = modules[snapshot['course_location']]
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Failed to load the snapshot of course '%s', loading it from xml", course_dir)
+            return None
+
+        log.debug("Loaded course '%s' from its snapshot", course_dir)
+        self.modules[course_id].update(modules)
+        for child, parents in snapshot['parents'].iteritems():
+            for parent in parents:
+                self.parent_trackers[course_id].add_parent(child, parent)
+        errorlog.errors.extend(snapshot['errors'])
+        return course_descriptor
+
+    def _add_course_dir(self, course_dir):
+        """
+        Find the id of the course in course_dir without loading it, so that it
+        can be loaded when first needed. Courses whose course.xml can't be
+        read are loaded straight away, to record their errors.
+        """
+        try:
+            with open(self.data_dir / course_dir / "course.xml") as course_file:
+                course_data = etree.parse(
+                    StringIO(clean_out_mako_templating(course_file.read())),
+                    parser=edx_xml_parser
+                ).getroot()
+        except Exception:  # pylint: disable=broad-except
+            self.try_load_course(course_dir)
+            return
+
+        # These match the defaults used by load_course
+        url_name = course_data.get('url_name', course_data.get('slug'))
+        if not url_name and course_data.get('name'):
+            url_name = Location.clean(course_data.get('name'))
+        if not url_name:
+            self.try_load_course(course_dir)
+            return
+
+        course_id = CourseDescriptor.make_id(
+            course_data.get('org', 'edx'),
+            course_data.get('course', course_dir),
+            url_name
+        )
+        self._course_dirs_by_id[course_id] = course_dir
+
+    def _ensure_course_loaded(self, course_id):
+        """
+        If this store is lazy, load the course `course_id` if it isn't
+        already loaded, and mark it as the most recently used course.
+
+        Returns the course's dict of location -> XBlock and its ParentTracker.
+        Use these rather than self.modules and self.parent_trackers, which
+        lose the course if another thread unloads it in the meantime.
+        """
+        if not self.lazy:
+            return self.modules[course_id], self.parent_trackers[course_id]
+
+        if course_id in self._resident_course_ids and self.max_resident_courses is None:
+            return self.modules[course_id], self.parent_trackers[course_id]
+
+        with self._load_lock:
+            if course_id in self._resident_course_ids:
+                self._mark_course_resident(course_id, self._resident_course_ids[course_id])
+                return self.modules[course_id], self.parent_trackers[course_id]
+
+            course_dir = self._course_dirs_by_id.get(course_id)
+            # The course itself looks up its modules while it is loading
+            if course_dir is None or course_dir in self._loading_course_dirs:
+                return self.modules[course_id], self.parent_trackers[course_id]
+
+            self._loading_course_dirs.add(course_dir)
+            try:
+                self.try_load_course(course_dir)
+            finally:
+                self._loading_course_dirs.discard(course_dir)
+            # Remember courses that failed to load too, rather than retrying
+            # them on every request
+            self._mark_course_resident(course_id, course_dir)
+            return self.modules[course_id], self.parent_trackers[course_id]
+
+    def _get_course_root(self, course_id, course_dir):
+        """
+        Returns the course descriptor of `course_id` if the course is loaded.
+        Otherwise, returns a descriptor of just the root of the course, without
+        its children, which doesn't count towards max_resident_courses.
+
+        Returns None if the course failed to load.
+        """
+        with self._load_lock:
+            if course_id in self._resident_course_ids or course_dir in self._loading_course_dirs:
+                return self.courses.get(course_dir)
+
+            if course_id not in self._course_roots:
+                errorlog = make_error_tracker()
+                try:
+                    course_root = self.load_course(course_dir, errorlog.tracker, root_only=True)
+                except Exception:  # pylint: disable=broad-except
+                    log.exception("Failed to load the root of course '%s'", course_dir)
+                    course_root = None
+                finally:
+                    # The modules of a course are only kept once it is loaded in full
+                    self.modules.pop(course_id, None)
+                    self.parent_trackers.pop(course_id, None)
+
+                if course_root is None or isinstance(course_root, ErrorDescriptor):
+                    # Load the whole course, to record its errors
+                    self._ensure_course_loaded(course_id)
+                    return self.courses.get(course_dir)
+                self._course_roots[course_id] = course_root
+
+            return self._course_roots[course_id]
+
+    def _mark_course_resident(self, course_id, course_dir):
+        """
+        Record that `course_id` is loaded and the most recently used course,
+        unloading the least recently used courses beyond max_resident_courses
+        """
+        with self._load_lock:
+            self._resident_course_ids.pop(course_id, None)
+            self._resident_course_ids[course_id] = course_dir
+
+            while (self.max_resident_courses is not None and
+                   len(self._resident_course_ids) > max(self.max_resident_courses, 1)):
+                evicted_id, evicted_dir = self._resident_course_ids.popitem(last=False)
+                self._unload_course(evicted_id, evicted_dir)
+
+    def _unload_course(self, course_id, course_dir):
+        """
+        Drop everything loaded for the course `course_id` in `course_dir`
+        """
+        log.debug('Unloading course %s from %s', course_id, course_dir)
+        course_descriptor = self.courses.pop(course_dir, None)
+        if course_descriptor is not None:
+            self._location_errors.pop(course_descriptor.location, None)
+        self.errored_courses.pop(course_dir, None)
+        self.modules.pop(course_id, None)
+        self.parent_trackers.pop(course_id, None)
+
+    def _warm_up(self):
+        """
+        Load courses in the background, stopping once max_resident_courses
+        are loaded
+        """
+        course_ids = sorted(self._course_dirs_by_id, key=self._course_dirs_by_id.get)
+        if self.max_resident_courses is not None:
+            course_ids = course_ids[:self.max_resident_courses]
+        for course_id in course_ids:
+            self._ensure_course_loaded(course_id)
+
     def __unicode__(self):
         '''
         String representation - for debugging
@@ -388,10 +760,12 @@ class XMLModuleStore(ModuleStoreReadBase):
             log.warning(msg + " " + str(err))
         return {}
 
-    def load_course(self, course_dir, tracker):
+    def load_course(self, course_dir, tracker, root_only=False):
         """
         Load a course into this module store
         course_path: Course directory name
+        root_only: If True, only load the course descriptor itself, without
+            its children or the course's info, tabs and about pages
 
         returns a CourseDescriptor for the course
         """
@@ -450,6 +824,9 @@ class XMLModuleStore(ModuleStoreReadBase):
                     raise ValueError("Can't load a course without a 'url_name' "
                                      "(or 'name') set.  Set url_name.")
 
+            if root_only:
+                course_data = self._course_root_xml(course_dir, course_data, url_name)
+
             course_id = CourseDescriptor.make_id(org, course, url_name)
             system = ImportSystem(
                 xmlstore=self,
@@ -473,6 +850,8 @@ class XMLModuleStore(ModuleStoreReadBase):
             # (actually, in addition to, for now), we do a final inheritance pass
             # after we have the course descriptor.
             compute_inherited_metadata(course_descriptor)
+            if root_only:
+                return course_descriptor
 
             # now import all pieces of course_info which is expected to be stored
             # in <content_dir>/info or <content_dir>/info/<url_name>
@@ -489,6 +868,31 @@ class XMLModuleStore(ModuleStoreReadBase):
             log.debug('========> Done with course import from {0}'.format(course_dir))
             return course_descriptor
 
+    def _course_root_xml(self, course_dir, course_data, url_name):
+        """
+        Returns a copy of the xml of the course root `course_data` in
+        course_dir, read from the course's own file if it is a pointer, with
+        all its children removed.
+        """
+        if is_pointer_tag(course_data):
+            filepath = self.data_dir / course_dir / CourseDescriptor._format_filepath(
+                'course', name_to_pathname(url_name)
+            )
+            with open(filepath) as course_file:
+                root_data = etree.parse(
+                    StringIO(clean_out_mako_templating(course_file.read())),
+                    parser=edx_xml_parser
+                ).getroot()
+            root_data.set('url_name', url_name)
+        else:
+            root_data = copy.deepcopy(course_data)
+
+        # Textbooks and the wiki are part of the course's own definition
+        for child in list(root_data):
+            if child.tag not in ('textbook', 'wiki'):
+                root_data.remove(child)
+        return root_data
+
     def load_extra_content(self, system, course_descriptor, category, base_dir, course_dir, url_name):
         self._load_extra_content(system, course_descriptor, category, base_dir, course_dir)
 
@@ -547,8 +951,9 @@ class XMLModuleStore(ModuleStoreReadBase):
         location: Something that can be passed to Location
         """
         location = Location(location)
+        modules, _parent_tracker = self._ensure_course_loaded(course_id)
         try:
-            return self.modules[course_id][location]
+            return modules[location]
         except KeyError:
             raise ItemNotFoundError(location)
 
@@ -557,7 +962,8 @@ class XMLModuleStore(ModuleStoreReadBase):
         Returns True if location exists in this ModuleStore.
         """
         location = Location(location)
-        return location in self.modules[course_id]
+        modules, _parent_tracker = self._ensure_course_loaded(course_id)
+        return location in modules
 
     def get_item(self, location, depth=0):
         """
@@ -585,10 +991,21 @@ class XMLModuleStore(ModuleStoreReadBase):
                     items.append(module)
 
         if course_id is None:
-            for _, modules in self.modules.iteritems():
-                _add_get_items(self, location, modules)
+            if self.lazy:
+                location = Location(location)
+                course_ids = [
+                    known_id for known_id in self._course_dirs_by_id
+                    if all(goal is None or goal == value for goal, value in
+                           zip((location.org, location.course), known_id.split('/')))
+                ]
+            else:
+                course_ids = self.modules.keys()
         else:
-            _add_get_items(self, location, self.modules[course_id])
+            course_ids = [course_id]
+
+        for modules_course_id in course_ids:
+            modules, _parent_tracker = self._ensure_course_loaded(modules_course_id)
+            _add_get_items(self, location, modules)
 
         return items
 
@@ -596,9 +1013,35 @@ class XMLModuleStore(ModuleStoreReadBase):
         """
         Returns a list of course descriptors.  If there were errors on loading,
         some of these may be ErrorDescriptors instead.
+
+        If this store is lazy, courses that aren't loaded are returned without
+        their children, and aren't loaded in full: use get_course for that.
         """
+        if self.lazy:
+            courses = []
+            for course_id, course_dir in sorted(self._course_dirs_by_id.items()):
+                course = self._get_course_root(course_id, course_dir)
+                if course is not None:
+                    courses.append(course)
+            return courses
+
         return self.courses.values()
 
+    def get_course(self, course_id):
+        """
+        Returns the course descriptor of `course_id`, or None if there's no
+        such course or it failed to load.
+        """
+        if not self.lazy:
+            return super(XMLModuleStore, self).get_course(course_id)
+
+        modules, _parent_tracker = self._ensure_course_loaded(course_id)
+        try:
+            course = modules.get(CourseDescriptor.id_to_location(course_id))
+        except ValueError:
+            return None
+        return course if isinstance(course, CourseDescriptor) else None
+
     def get_errored_courses(self):
         """
         Return a dictionary of course_dir -> [(msg, exception_str)], for each
@@ -644,10 +1087,11 @@ class XMLModuleStore(ModuleStoreReadBase):
         be empty if there are no parents.
         '''
         location = Location.ensure_fully_specified(location)
-        if not self.parent_trackers[course_id].is_known(location):
+        _modules, parent_tracker = self._ensure_course_loaded(course_id)
+        if not parent_tracker.is_known(location):
             raise ItemNotFoundError("{0} not in {1}".format(location, course_id))
 
-        return self.parent_trackers[course_id].parents(location)
+        return parent_tracker.parents(location)
 
     def get_modulestore_type(self, course_id):
         """
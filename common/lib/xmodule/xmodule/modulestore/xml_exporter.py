@@ -2,9 +2,16 @@
 Methods for exporting course data to XML
 """
 
+import calendar
 import logging
+import os
+import tarfile
+import time
+from cStringIO import StringIO
+from xmodule.contentstore.content import EXPORT_CHUNK_SIZE
 from xmodule.modulestore import Location
 from xmodule.modulestore.inheritance import own_metadata
+from fs.memoryfs import MemoryFS
 from fs.osfs import OSFS
 from json import dumps
 import json
@@ -45,19 +52,12 @@ def export_to_xml(modulestore, contentstore, course_location, root_dir, course_d
     `draft_modulestore`: An optional `DraftModuleStore` that contains draft content, which will be exported
         alongside the public content in the course.
     """
-
-    course_id = course_location.course_id
-    course = modulestore.get_course(course_id)
-
     fs = OSFS(root_dir)
     export_fs = fs.makeopendir(course_dir)
 
-    xml = course.export_to_xml(export_fs)
-    with export_fs.open('course.xml', 'w') as course_xml:
-        course_xml.write(xml)
+    export_modules_to_fs(modulestore, course_location, export_fs, draft_modulestore)
 
     # export the static assets
-    policies_dir = export_fs.makeopendir('policies')
     if contentstore:
         contentstore.export_all_for_course(
             course_location,
@@ -65,6 +65,122 @@ def export_to_xml(modulestore, contentstore, course_location, root_dir, course_d
             root_dir + '/' + course_dir + '/policies/assets.json',
         )
 
+
+def export_to_tarball(modulestore, contentstore, course_location, course_dir, draft_modulestore=None):
+    """
+    Export a course as `export_to_xml` does, but as a gzipped tarball of
+    `course_dir`, without writing anything to disk.
+
+    The course's modules are exported into memory straight away, so that
+    any error exporting them is raised here. Returns an iterator over the
+    pieces of the tarball, which reads the course's assets from
+    `contentstore` a chunk at a time as it goes, so that the tarball can be
+    streamed to a client or to storage.
+
+    The arguments are those of `export_to_xml`.
+    """
+    export_fs = MemoryFS()
+    export_modules_to_fs(modulestore, course_location, export_fs, draft_modulestore)
+
+    assets = []
+    if contentstore:
+        assets_policy, assets = contentstore.export_streams_for_course(course_location)
+        export_fs.setcontents('policies/assets.json', dumps(assets_policy))
+
+    return _stream_tarball(export_fs, assets, course_dir)
+
+
+class _TarballBuffer(object):
+    """
+    A write-only file that keeps what's written to it until it's taken.
+    """
+    def __init__(self):
+        self._pieces = []
+
+    def write(self, data):
+        self._pieces.append(data)
+
+    def take(self):
+        """Returns and forgets everything written since last taken"""
+        data = ''.join(self._pieces)
+        self._pieces = []
+        return data
+
+
+def _stream_tarball(export_fs, assets, course_dir):
+    """
+    Yields the pieces of a gzipped tarball of `course_dir`, containing the
+    files of `export_fs` and, for each (path, StaticContentStream) pair of
+    `assets`, the asset at that path of its static directory.
+    """
+    tarball = _TarballBuffer()
+    tar = tarfile.open(mode='w|gz', fileobj=tarball)
+    now = time.time()
+
+    for dirpath, filenames in export_fs.walk():
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            data = export_fs.getcontents(file_path)
+            tarinfo = tarfile.TarInfo(course_dir + file_path)
+            tarinfo.size = len(data)
+            tarinfo.mtime = now
+            tar.addfile(tarinfo, StringIO(data))
+        yield tarball.take()
+
+    for asset_path, asset in assets:
+        tarinfo = tarfile.TarInfo(os.path.join(course_dir, 'static', asset_path))
+        tarinfo.size = asset.length
+        tarinfo.mtime = calendar.timegm(asset.last_modified_at.utctimetuple()) if asset.last_modified_at else now
+        for piece in _add_stream_to_tar(tar, tarinfo, asset.stream_data(EXPORT_CHUNK_SIZE), tarball):
+            yield piece
+
+    tar.close()
+    yield tarball.take()
+
+
+def _add_stream_to_tar(tar, tarinfo, chunks, tarball):
+    """
+    Adds the file described by `tarinfo` to `tar` as `tar.addfile` would,
+    but with its contents read from the iterable `chunks`, yielding what's
+    been written to `tarball` after each chunk rather than all at once.
+    """
+    # Write just the header, then the contents, padded to a whole block
+    tar.addfile(tarinfo)
+    written = 0
+    for chunk in chunks:
+        tar.fileobj.write(chunk)
+        written += len(chunk)
+        # gzip holds on to what it's given until it has enough to compress
+        piece = tarball.take()
+        if piece:
+            yield piece
+
+    if written != tarinfo.size:
+        raise IOError("{0} was {1} bytes long rather than {2}".format(tarinfo.name, written, tarinfo.size))
+
+    blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+    if remainder > 0:
+        tar.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+        blocks += 1
+    tar.offset += blocks * tarfile.BLOCKSIZE
+
+
+def export_modules_to_fs(modulestore, course_location, export_fs, draft_modulestore=None):
+    """
+    Export all modules of the course at `course_location` from `modulestore`
+    as xml to the filesystem `export_fs`, leaving out its static assets.
+
+    The arguments are otherwise those of `export_to_xml`.
+    """
+    course_id = course_location.course_id
+    course = modulestore.get_course(course_id)
+
+    xml = course.export_to_xml(export_fs)
+    with export_fs.open('course.xml', 'w') as course_xml:
+        course_xml.write(xml)
+
+    policies_dir = export_fs.makeopendir('policies')
+
     # export the static tabs
     export_extra_content(export_fs, modulestore, course_id, course_location, 'static_tab', 'tabs', '.html')
 
@@ -1,6 +1,8 @@
+import hashlib
 import logging
 import os
 import mimetypes
+from multiprocessing.pool import ThreadPool
 from path import path
 import json
 
@@ -16,10 +18,99 @@ from .store_utilities import rewrite_nonportable_content_links
 log = logging.getLogger(__name__)
 
 
+# How many static assets are imported at once
+STATIC_IMPORT_WORKERS = 4
+
+# How much of a static asset is read at a time
+STATIC_IMPORT_CHUNK_SIZE = 256 * 1024
+
+
+def _read_chunks(file_path):
+    """
+    Yields the contents of the file at `file_path` a chunk at a time.
+    """
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(STATIC_IMPORT_CHUNK_SIZE), ''):
+            yield chunk
+
+
+def _import_static_file(static_content_store, content, content_path, stored_asset):
+    """
+    Saves `content`, read from `content_path`, to `static_content_store`
+    unless `stored_asset` (the stored GridFS file of it, if any) already has
+    the same contents, in which case just its attributes are updated.
+
+    Returns whether the asset's contents were saved, or None if the file
+    couldn't be read and should be skipped.
+    """
+    try:
+        md5 = hashlib.md5()
+        for chunk in _read_chunks(content_path):
+            md5.update(chunk)
+    except IOError:
+        if os.path.basename(content_path).startswith('._'):
+            # OS X "companion files". See
+            # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+            return None
+        # Not a 'hidden file', then re-raise exception
+        raise
+
+    if stored_asset is not None and stored_asset.get('md5') == md5.hexdigest():
+        attrs = {
+            'displayname': content.name,
+            'contentType': content.content_type,
+            'import_path': content.import_path,
+            'locked': content.locked,
+        }
+        changed_attrs = dict(
+            (attr, value) for attr, value in attrs.iteritems() if stored_asset.get(attr) != value
+        )
+        if changed_attrs:
+            static_content_store.set_attrs(content.location, changed_attrs)
+        return False
+
+    # the thumbnail is generated separately, once the asset is saved
+    if content.content_type is not None and content.content_type.split('/')[0] == 'image':
+        content.thumbnail_location = StaticContent.compute_location(
+            content.location.org, content.location.course,
+            StaticContent.generate_thumbnail_name(content.location.name), is_thumbnail=True
+        )
+
+    # then commit the content, which streams it from the file
+    try:
+        static_content_store.save(content)
+    except Exception as err:
+        log.exception('Error importing {0}, error={1}'.format(
+            content.import_path, err
+        ))
+        return False
+    return True
+
+
+def _import_static_thumbnail(static_content_store, content, content_path):
+    """
+    Generates the thumbnail of the saved asset `content` from the file at
+    `content_path`, removing its thumbnail location if that fails.
+    """
+    thumbnail_content, _thumbnail_location = static_content_store.generate_thumbnail(
+        content, tempfile_path=content_path
+    )
+    if thumbnail_content is None:
+        static_content_store.set_attr(content.location, 'thumbnail_location', None)
+
+
 def import_static_content(
         modules, course_loc, course_data_path, static_content_store,
         target_location_namespace, subpath='static', verbose=False):
+    """
+    Imports the static assets under `subpath` of `course_data_path` into
+    `static_content_store`, returning a dict mapping the path of each to
+    the name it's stored under.
 
+    Assets are imported by a pool of STATIC_IMPORT_WORKERS threads. Those
+    whose contents are already stored (as found by their md5) aren't saved
+    again, and thumbnails are generated once each image has been saved.
+    """
     remap_dict = {}
 
     # now import all static assets
@@ -34,62 +125,69 @@ def import_static_content(
 
     verbose = True
 
-    for dirname, _, filenames in os.walk(static_dir):
-        for filename in filenames:
-
-            content_path = os.path.join(dirname, filename)
-            if verbose:
-                log.debug('importing static content %s...', content_path)
-
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
-
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            content_loc = StaticContent.compute_location(
-                target_location_namespace.org, target_location_namespace.course,
-                fullname_with_subpath
-            )
+    # the assets already stored, so that unchanged ones aren't rewritten
+    stored_assets = dict(
+        (Location(asset['_id']).name, asset)
+        for asset in static_content_store.get_all_content_for_course(target_location_namespace)
+    )
 
-            policy_ele = policy.get(content_loc.name, {})
-            displayname = policy_ele.get('displayname', filename)
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get(
-                'contentType',
-                mimetypes.guess_type(filename)[0]
-            )
-            content = StaticContent(
-                content_loc, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
+    pool = ThreadPool(STATIC_IMPORT_WORKERS)
+    try:
+        imports = []
+        for dirname, _, filenames in os.walk(static_dir):
+            for filename in filenames:
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+                content_path = os.path.join(dirname, filename)
+                if verbose:
+                    log.debug('importing static content %s...', content_path)
+
+                # strip away leading path from the name
+                fullname_with_subpath = content_path.replace(static_dir, '')
+                if fullname_with_subpath.startswith('/'):
+                    fullname_with_subpath = fullname_with_subpath[1:]
+                content_loc = StaticContent.compute_location(
+                    target_location_namespace.org, target_location_namespace.course,
+                    fullname_with_subpath
+                )
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+                policy_ele = policy.get(content_loc.name, {})
+                displayname = policy_ele.get('displayname', filename)
+                locked = policy_ele.get('locked', False)
+                mime_type = policy_ele.get(
+                    'contentType',
+                    mimetypes.guess_type(filename)[0]
+                )
+                # the file is only read if its content needs saving
+                content = StaticContent(
+                    content_loc, displayname, mime_type, _read_chunks(content_path),
+                    import_path=fullname_with_subpath, locked=locked
+                )
 
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception('Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
+                saved = pool.apply_async(
+                    _import_static_file,
+                    (static_content_store, content, content_path, stored_assets.get(content_loc.name))
+                )
+                imports.append((content, content_path, saved))
+
+        thumbnails = []
+        for content, content_path, saved in imports:
+            was_saved = saved.get()
+            if was_saved is None:
+                continue
+            if was_saved and content.thumbnail_location is not None:
+                thumbnails.append(pool.apply_async(
+                    _import_static_thumbnail, (static_content_store, content, content_path)
                 ))
 
             # store the remapping information which will be needed
             # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = content_loc.name
+            remap_dict[content.import_path] = content.location.name
+
+        for thumbnail in thumbnails:
+            thumbnail.get()
+    finally:
+        pool.close()
+        pool.join()
 
     return remap_dict
 
@@ -99,7 +197,7 @@ def import_from_xml(
         default_class='xmodule.raw_module.RawDescriptor',
         load_error_modules=True, static_content_store=None,
         target_location_namespace=None, verbose=False, draft_store=None,
-        do_import_static=True):
+        do_import_static=True, progress_callback=None):
     """
     Import the specified xml data_dir into the "store" modulestore,
     using org and course as the location org and course.
@@ -122,6 +220,10 @@ def import_from_xml(
         time the course is loaded. Static content for some courses may also be
         served directly by nginx, instead of going through django.
 
+    :param progress_callback:
+        if given, called with the number of modules imported so far after
+        each module is imported, so that long imports can report progress.
+
     """
 
     xml_module_store = XMLModuleStore(
@@ -137,6 +239,7 @@ def import_from_xml(
     # of course modules. It will be left as a TBD to implement that
     # method on XmlModuleStore.
     course_items = []
+    modules_imported = 0
     for course_id in xml_module_store.modules.keys():
 
         if target_location_namespace is not None:
@@ -209,6 +312,9 @@ def import_from_xml(
                         target_location_namespace or course_location,
                         do_import_static=do_import_static
                     )
+                    modules_imported += 1
+                    if progress_callback is not None:
+                        progress_callback(modules_imported)
 
                     course_items.append(module)
 
@@ -277,6 +383,9 @@ def import_from_xml(
                     target_location_namespace if target_location_namespace else course_location,
                     do_import_static=do_import_static
                 )
+                modules_imported += 1
+                if progress_callback is not None:
+                    progress_callback(modules_imported)
 
             # now import any 'draft' items
             if draft_store is not None:
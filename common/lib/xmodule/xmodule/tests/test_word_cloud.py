@@ -47,3 +47,6 @@ class WordCloudModuleTest(LogicTest):
             100.0,
             sum(i['percent'] for i in response['top_words']))
 
+        # The top words are picked from all_words, rather than stored
+        self.assertDictEqual({'cat': 10, 'dog': 5, 'dad': 2}, self.xmodule.top_words)
+
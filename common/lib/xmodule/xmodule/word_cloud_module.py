@@ -73,6 +73,8 @@ class WordCloudFields(object):
         help="All possible words from all students.",
         scope=Scope.user_state_summary
     )
+    # No longer written: the top words are picked from all_words when
+    # they're shown, so that submitting doesn't rewrite a shared field.
     top_words = Dict(
         help="Top num_top_words words for word cloud.",
         scope=Scope.user_state_summary
@@ -94,7 +96,8 @@ class WordCloudModule(WordCloudFields, XModule):
     def get_state(self):
         """Return success json answer for client."""
         if self.submitted:
-            total_count = sum(self.all_words.itervalues())
+            all_words = self.all_words
+            total_count = sum(all_words.itervalues())
             return json.dumps({
                 'status': 'success',
                 'submitted': True,
@@ -102,10 +105,13 @@ class WordCloudModule(WordCloudFields, XModule):
                     self.display_student_percents
                 ),
                 'student_words': {
-                    word: self.all_words[word] for word in self.student_words
+                    word: all_words.get(word, 0) for word in self.student_words
                 },
                 'total_count': total_count,
-                'top_words': self.prepare_words(self.top_words, total_count)
+                'top_words': self.prepare_words(
+                    self.top_dict(all_words, self.num_top_words),
+                    total_count
+                )
             })
         else:
             return json.dumps({
@@ -208,12 +214,6 @@ class WordCloudModule(WordCloudFields, XModule):
             for word in self.student_words:
                 temp_all_words[word] = temp_all_words.get(word, 0) + 1
 
-            # Update top_words.
-            self.top_words = self.top_dict(
-                temp_all_words,
-                self.num_top_words
-            )
-
             # Save all_words in database.
             self.all_words = temp_all_words
 
@@ -5,6 +5,8 @@ import logging
 from datetime import datetime, timedelta
 from functools import partial
 
+import crum
+
 from django.conf import settings
 from django.contrib.auth.models import Group, AnonymousUser
 
@@ -15,16 +17,24 @@ from xmodule.x_module import XModule, XModuleDescriptor
 
 from student.models import CourseEnrollmentAllowed
 from external_auth.models import ExternalAuthMap
+from courseware.course_overview import CourseOverview, TocEntry
 from courseware.masquerade import is_masquerading_as_student
 from django.utils.timezone import UTC
 from student.models import CourseEnrollment
 from courseware.roles import (
     GlobalStaff, CourseStaffRole, CourseInstructorRole,
-    OrgStaffRole, OrgInstructorRole, CourseBetaTesterRole
+    OrgStaffRole, OrgInstructorRole, CourseBetaTesterRole,
+    ACCESS_DECISIONS_CACHE_KEY
 )
+from request_cache.middleware import RequestCache
 
 DEBUG_ACCESS = False
 
+# The actions whose decisions are memoized for the rest of a request. Other
+# actions (such as 'enroll' and 'load_forum') depend on state, like
+# enrollment, that a request may change after checking it.
+MEMOIZED_ACTIONS = ('load', 'staff', 'instructor')
+
 log = logging.getLogger(__name__)
 
 
@@ -61,19 +71,56 @@ def has_access(user, obj, action, course_context=None):
 
     Returns a bool.  It is up to the caller to actually deny access in a way
     that makes sense in context.
+
+    Decisions for MEMOIZED_ACTIONS are remembered for the rest of the
+    request, keyed on the user, the object's location, the action and the
+    user's masquerade state. Outside of a request (in celery tasks and
+    management commands, where nothing clears the request cache), and for
+    objects without a location, nothing is memoized.
     """
     # Just in case user is passed in as None, make them anonymous
     if not user:
         user = AnonymousUser()
 
+    location = obj if isinstance(obj, (Location, basestring)) else getattr(obj, 'location', None)
+    if action not in MEMOIZED_ACTIONS or location is None or crum.get_current_request() is None:
+        return _has_access(user, obj, action, course_context)
+
+    key = (
+        user.id,
+        type(obj),
+        location,
+        action,
+        course_context,
+        is_masquerading_as_student(user),
+    )
+    decisions = RequestCache.get_request_cache().data.setdefault(ACCESS_DECISIONS_CACHE_KEY, {})
+    if key not in decisions:
+        decisions[key] = _has_access(user, obj, action, course_context)
+    return decisions[key]
+
+
+def _has_access(user, obj, action, course_context):
+    """
+    Check whether a user has the access to do action on obj, without
+    memoization. See `has_access`.
+    """
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
     if isinstance(obj, CourseDescriptor):
         return _has_access_course_desc(user, obj, action)
 
+    if isinstance(obj, CourseOverview):
+        return _has_access_course_overview(user, obj, action)
+
     if isinstance(obj, ErrorDescriptor):
         return _has_access_error_desc(user, obj, action, course_context)
 
+    if isinstance(obj, TocEntry):
+        if obj.is_error:
+            return _has_access_error_desc(user, obj, action, course_context)
+        return _has_access_descriptor(user, obj, action, course_context)
+
     # NOTE: any descriptor access checkers need to go above this
     if isinstance(obj, XModuleDescriptor):
         return _has_access_descriptor(user, obj, action, course_context)
@@ -200,6 +247,23 @@ def _has_access_course_desc(user, course, action):
     return _dispatch(checkers, action, user, course)
 
 
+def _has_access_course_overview(user, overview, action):
+    """
+    Check if user has access to a course, given its CourseOverview.
+
+    Valid actions:
+
+    'load' -- load the courseware, see inside the course
+    'staff' -- staff access to course.
+    """
+    checkers = {
+        'load': lambda: _has_access_descriptor(user, overview, 'load'),
+        'staff': lambda: _has_staff_access_to_descriptor(user, overview),
+        }
+
+    return _dispatch(checkers, action, user, overview)
+
+
 def _has_access_error_desc(user, descriptor, action, course_context):
     """
     Only staff should see error descriptors.
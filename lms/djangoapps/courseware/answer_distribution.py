@@ -0,0 +1,246 @@
+"""
+Incrementally maintained answer distributions.
+
+`courseware.grades.answer_distributions` normally counts the answers of a
+course by reading the state of every submitted problem. Once a course has
+been backfilled (see the `backfill_answer_distributions` management
+command), the counts are instead kept in AnswerDistributionCount: every
+time a StudentModule of the course is saved or deleted, the counts of the
+answers it stops and starts counting towards are moved, and the report
+becomes a simple read.
+
+The counts are moved by the `apply_answer_count_changes` task once the
+request that saved the StudentModules has finished, so that the heavily
+shared count rows aren't locked for the rest of its transaction. Changes
+made by a request whose transaction is rolled back are discarded (see
+`courseware.middleware.AnswerCountsMiddleware`).
+
+Only the student's current answers are counted, as with the full scan: a
+problem's answers count once it has been submitted (so has a grade), and
+are replaced when the student submits new ones.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import defaultdict
+
+import crum
+from django.core.signals import request_finished
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+from courseware.models import AnswerDistributionCount, AnswerDistributionBackfill, StudentModule
+from util.cache import cache
+
+log = logging.getLogger(__name__)
+
+# How long whether a course's answer counts are maintained is cached
+BACKFILLED_CACHE_TIMEOUT = 60 * 60
+
+# How many counts are inserted at once by a backfill
+BACKFILL_BATCH_SIZE = 1000
+
+_pending = threading.local()
+
+
+def _backfilled_cache_key(course_id):
+    """Return the cache key for whether the answer counts of `course_id` are maintained"""
+    return u'courseware.answer_distribution.backfilled.{}'.format(course_id)
+
+
+def counts_maintained(course_id):
+    """
+    Returns whether the AnswerDistributionCounts of `course_id` have been
+    backfilled, and so are kept up to date.
+    """
+    cache_key = _backfilled_cache_key(course_id)
+    maintained = cache.get(cache_key)
+    if maintained is None:
+        maintained = AnswerDistributionBackfill.objects.filter(course_id=course_id).exists()
+        cache.set(cache_key, maintained, BACKFILLED_CACHE_TIMEOUT)
+    return maintained
+
+
+def answers_from_state(state):
+    """
+    Return a dict mapping each problem part id in the StudentModule state
+    `state` to the student's answer to it, as unicode.
+
+    Raises ValueError if the state can't be parsed.
+    """
+    state_dict = json.loads(state) if state else {}
+    # Convert whatever raw answers we have (numbers, unicode, None, etc.)
+    # to be unicode values.
+    return dict(
+        (problem_part_id, unicode(raw_answer))
+        for problem_part_id, raw_answer in state_dict.get("student_answers", {}).iteritems()
+    )
+
+
+def _safe_answers_from_state(student_module_id, state):
+    """
+    Like `answers_from_state`, but logs unparseable state and counts none of it
+    """
+    try:
+        return answers_from_state(state)
+    except ValueError:
+        log.error("Answer Distribution: Could not parse module state for StudentModule id=%s", student_module_id)
+        return {}
+
+
+def _answer_hash(answer):
+    """Return the hash by which `answer` is indexed"""
+    return hashlib.sha1(answer.encode('utf-8')).hexdigest()
+
+
+def _pending_changes():
+    """
+    Returns the dict of (course_id, module_state_key, problem part id,
+    answer) -> change in count, queued on this thread
+    """
+    if not hasattr(_pending, 'changes'):
+        _pending.changes = defaultdict(int)
+    return _pending.changes
+
+
+def update_answer_counts(student_module_id, old_answers, new_answers):
+    """
+    Move the answer counts of a StudentModule from the answers it used to
+    count towards to the ones it counts towards now. `old_answers` and
+    `new_answers` are each None, if no answers are counted, or a tuple of
+    the module's (course_id, module_state_key, state).
+
+    Answers are only counted for courses whose counts are maintained. The
+    changes are queued for the background task when the current request
+    finishes. Outside of a request, they're queued right away.
+    """
+    changes = _pending_changes()
+    for answers, delta in ((old_answers, -1), (new_answers, 1)):
+        if answers is None:
+            continue
+        course_id, module_state_key, state = answers
+        if not counts_maintained(course_id):
+            continue
+        for problem_part_id, answer in _safe_answers_from_state(student_module_id, state).iteritems():
+            changes[(course_id, module_state_key, problem_part_id, answer)] += delta
+
+    if crum.get_current_request() is None:
+        flush_answer_counts()
+
+
+@receiver(request_finished)
+def flush_answer_counts_on_request_finished(sender, **kwargs):  # pylint: disable=unused-argument
+    """Hand the answer count changes made during the request to the background task"""
+    flush_answer_counts()
+
+
+def discard_answer_counts():
+    """
+    Forget the answer count changes queued on this thread, because the
+    StudentModule changes they were made for were rolled back.
+    """
+    _pending.changes = defaultdict(int)
+
+
+def flush_answer_counts():
+    """
+    Apply all the answer count changes queued on this thread, in the
+    background.
+    """
+    changes = [key + (delta,) for key, delta in _pending_changes().iteritems() if delta]
+    _pending.changes = defaultdict(int)
+    if not changes:
+        return
+
+    # Imported here to avoid a circular import
+    from courseware.tasks import apply_answer_count_changes
+    try:
+        apply_answer_count_changes.delay(changes)
+        return
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to queue %d answer count changes, applying them now", len(changes))
+    apply_answer_counts(changes)
+
+
+def apply_answer_counts(changes):
+    """
+    Add each (course_id, module_state_key, problem part id, answer, delta)
+    of `changes` to the count of that answer.
+
+    The counts are updated in a fixed order, so that concurrent updates
+    lock their rows in the same order rather than deadlocking.
+    """
+    for course_id, module_state_key, problem_part_id, answer, delta in sorted(changes):
+        counts = AnswerDistributionCount.objects.filter(
+            module_state_key=module_state_key,
+            part_id=problem_part_id,
+            answer_hash=_answer_hash(answer),
+        )
+        if counts.update(count=F('count') + delta):
+            continue
+
+        # The answer isn't counted yet. If it's being inserted concurrently,
+        # ours fails, and the row that won is updated instead.
+        savepoint = transaction.savepoint()
+        try:
+            AnswerDistributionCount.objects.create(
+                course_id=course_id,
+                module_state_key=module_state_key,
+                part_id=problem_part_id,
+                answer=answer,
+                answer_hash=_answer_hash(answer),
+                count=delta,
+            )
+            transaction.savepoint_commit(savepoint)
+        except IntegrityError:
+            transaction.savepoint_rollback(savepoint)
+            counts.update(count=F('count') + delta)
+
+
+def stored_answer_counts(course_id):
+    """
+    Yield (module_state_key, problem part id, answer, count) for every
+    answer counted for `course_id`.
+    """
+    counts = AnswerDistributionCount.objects.filter(course_id=course_id, count__gt=0)
+    for count in counts.values_list('module_state_key', 'part_id', 'answer', 'count').iterator():
+        yield count
+
+
+def backfill_answer_counts(course_id):
+    """
+    Count the answers of every submitted problem of `course_id`, replacing
+    any counts it already had, and maintain its counts from now on.
+
+    Answers submitted while the backfill is reading StudentModules may be
+    missed; running it again corrects them. Returns the number of distinct
+    answers counted.
+    """
+    counts = defaultdict(int)
+    submitted = StudentModule.all_submitted_problems_read_only(course_id)
+    for student_module_id, module_state_key, state in submitted.values_list('id', 'module_state_key', 'state').iterator():
+        for problem_part_id, answer in _safe_answers_from_state(student_module_id, state).iteritems():
+            counts[(module_state_key, problem_part_id, answer)] += 1
+
+    rows = [
+        AnswerDistributionCount(
+            course_id=course_id,
+            module_state_key=module_state_key,
+            part_id=problem_part_id,
+            answer=answer,
+            answer_hash=_answer_hash(answer),
+            count=count,
+        )
+        for (module_state_key, problem_part_id, answer), count in counts.iteritems()
+    ]
+
+    with transaction.commit_on_success():
+        AnswerDistributionCount.objects.filter(course_id=course_id).delete()
+        for start in xrange(0, len(rows), BACKFILL_BATCH_SIZE):
+            AnswerDistributionCount.objects.bulk_create(rows[start:start + BACKFILL_BATCH_SIZE])
+        AnswerDistributionBackfill.objects.get_or_create(course_id=course_id)
+
+    cache.set(_backfilled_cache_key(course_id), True, BACKFILLED_CACHE_TIMEOUT)
+    return len(rows)
@@ -0,0 +1,82 @@
+"""
+Compact, cacheable summaries of courses and their blocks, for pages (such
+as the student dashboard and the courseware accordion) that list many of
+them but only need a few facts about each.
+"""
+from datetime import datetime
+
+from django.utils.timezone import UTC
+
+from xmodule.error_module import ErrorDescriptor
+
+
+class CourseOverview(object):
+    """
+    The facts about a course needed to list it, copied from its
+    CourseDescriptor so that they can be cached without it.
+
+    Quacks enough like a CourseDescriptor for listing templates, and for
+    `courseware.access.has_access` to check whether it can be loaded.
+    """
+    def __init__(self, course, course_image_url, modulestore_type):
+        self.id = course.id  # pylint: disable=invalid-name
+        self.location = course.location
+        self.number = course.number
+        self.display_name_with_default = course.display_name_with_default
+        self.display_number_with_default = course.display_number_with_default
+        self.display_org_with_default = course.display_org_with_default
+        self.start = course.start
+        self.end = course.end
+        self.days_early_for_beta = course.days_early_for_beta
+        self.start_date_text = course.start_date_text
+        self.end_date_text = course.end_date_text
+        self.end_of_course_survey_url = course.end_of_course_survey_url
+        self.course_image_url = course_image_url
+        self.modulestore_type = modulestore_type
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the course end date.
+        Returns False if there is no end date specified.
+        """
+        if self.end is None:
+            return False
+
+        return datetime.now(UTC()) > self.end
+
+    def has_started(self):
+        """
+        Returns True if the current time is after the course start date.
+        """
+        return datetime.now(UTC()) > self.start
+
+    def __repr__(self):
+        return 'CourseOverview<%r>' % self.id
+
+
+class TocEntry(object):
+    """
+    The facts about a chapter or section needed to show it in a course's
+    table of contents, copied from its descriptor so that they can be
+    cached without it.
+
+    Carries enough of the descriptor (location, start and
+    days_early_for_beta) for `courseware.access.has_access` to check
+    whether a user can load it, and records whether it failed to load
+    (`is_error`), as only staff can see those.
+    """
+    def __init__(self, descriptor, children=()):
+        self.location = descriptor.location
+        self.is_error = isinstance(descriptor, ErrorDescriptor)
+        self.url_name = descriptor.url_name
+        self.display_name_with_default = descriptor.display_name_with_default
+        self.format = descriptor.format
+        self.due = descriptor.due
+        self.graded = descriptor.graded
+        self.hide_from_toc = descriptor.hide_from_toc
+        self.start = descriptor.start
+        self.days_early_for_beta = descriptor.days_early_for_beta
+        self.children = list(children)
+
+    def __repr__(self):
+        return 'TocEntry<%r>' % self.location
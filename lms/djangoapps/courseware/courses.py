@@ -10,16 +10,22 @@ from django.conf import settings
 from .module_render import get_module
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore import Location, XML_MODULESTORE_TYPE
-from xmodule.modulestore.django import modulestore, loc_mapper
+from xmodule.modulestore.django import modulestore, loc_mapper, course_content_version
 from xmodule.contentstore.content import StaticContent
 from xmodule.modulestore.exceptions import ItemNotFoundError, InvalidLocationError
+from courseware.course_overview import CourseOverview
 from courseware.model_data import FieldDataCache
 from static_replace import replace_static_urls
 from courseware.access import has_access
+from util.cache import cache
 import branding
 
 log = logging.getLogger(__name__)
 
+# How long course overviews are cached. They are also rebuilt whenever the
+# course content changes.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 60 * 60
+
 
 def get_request_for_thread():
     """Walk up the stack, return the nearest first argument named "request"."""
@@ -111,6 +117,47 @@ def course_image_url(course):
         return _path
 
 
+def get_course_overviews(course_ids):
+    """
+    Return a dict mapping each of `course_ids` to a CourseOverview of that
+    course. Courses that can't be found are left out.
+
+    Overviews are cached per version of the course content, so a course is
+    only loaded from the modulestore when it has changed since its
+    overview was built.
+    """
+    cache_keys = {}
+    for course_id in course_ids:
+        try:
+            course_loc = CourseDescriptor.id_to_location(course_id)
+        except InvalidLocationError:
+            continue
+        cache_keys[u'course_overview.{}.{}'.format(course_id, course_content_version(course_loc))] = course_id
+
+    overviews = dict(
+        (cache_keys[cache_key], overview)
+        for cache_key, overview in cache.get_many(cache_keys.keys()).iteritems()
+    )
+
+    new_overviews = {}
+    for cache_key, course_id in cache_keys.iteritems():
+        if course_id in overviews:
+            continue
+        try:
+            course = get_course(course_id)
+        except ValueError:
+            continue
+        overviews[course_id] = new_overviews[cache_key] = CourseOverview(
+            course,
+            course_image_url(course),
+            modulestore().get_modulestore_type(course_id),
+        )
+
+    if new_overviews:
+        cache.set_many(new_overviews, COURSE_OVERVIEW_CACHE_TIMEOUT)
+    return overviews
+
+
 def find_file(filesystem, dirs, filename):
     """
     Looks for a filename in a list of dirs on a filesystem, in the specified order.
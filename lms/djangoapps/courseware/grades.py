@@ -15,17 +15,26 @@ from django.test.client import RequestFactory
 from dogapi import dog_stats_api
 
 from courseware import courses
+from courseware.answer_distribution import counts_maintained, stored_answer_counts
 from courseware.model_data import FieldDataCache
+from util.cache import cache
 from xblock.fields import Scope
 from xmodule import graders
 from xmodule.graders import Score
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import modulestore, course_content_version
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from .models import StudentModule
 from .module_render import get_module, get_module_for_descriptor
 
 log = logging.getLogger("edx.courseware")
 
+# How long grading contexts are cached. They are also rebuilt whenever the
+# course content changes.
+GRADING_CONTEXT_CACHE_TIMEOUT = 60 * 60
+
+# In-process cache of grading contexts: course_id -> (content version, grading context)
+_grading_contexts = {}
+
 
 def yield_dynamic_descriptor_descendents(descriptor, module_creator):
     """
@@ -50,6 +59,63 @@ def yield_dynamic_descriptor_descendents(descriptor, module_creator):
         yield next_descriptor
 
 
+def _problem_info_finder(course_id):
+    """
+    Return a function that, for a given module_state_key of `course_id`,
+    returns the problem's url and display_name.
+    """
+    # dict: { module.module_state_key : (url_name, display_name) }
+    state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
+
+    def url_and_display_name(module_state_key):
+        """
+        For a given module_state_key, return the problem's url and display_name.
+        Handle modulestore access and caching. This method ignores permissions.
+        May throw an ItemNotFoundError if there is no content that corresponds
+        to this module_state_key.
+        """
+        problem_store = modulestore()
+        if module_state_key not in state_keys_to_problem_info:
+            problems = problem_store.get_items(module_state_key, course_id=course_id, depth=1)
+            if not problems:
+                # Likely means that the problem was deleted from the course
+                # after the student had answered. We log this suspicion where
+                # this exception is caught.
+                raise ItemNotFoundError(
+                    "Answer Distribution: Module {} not found for course {}"
+                    .format(module_state_key, course_id)
+                )
+            problem = problems[0]
+            problem_info = (problem.url_name, problem.display_name_with_default)
+            state_keys_to_problem_info[module_state_key] = problem_info
+
+        return state_keys_to_problem_info[module_state_key]
+
+    return url_and_display_name
+
+
+def label_answer_counts(course_id, answer_counts):
+    """
+    Given an iterable of (module_state_key, problem_id, answer, count) for
+    `course_id`, return its answer distributions, in the form returned by
+    `answer_distributions`. Answers to problems that are no longer in the
+    course are omitted.
+    """
+    url_and_display_name = _problem_info_finder(course_id)
+    distributions = defaultdict(lambda: defaultdict(int))
+    for module_state_key, problem_part_id, answer, count in answer_counts:
+        try:
+            url, display_name = url_and_display_name(module_state_key)
+        except ItemNotFoundError:
+            log.warning(
+                "Answer Distribution: Item %s in course %s not found; its answers will be "
+                "omitted from the answer distribution CSV.", module_state_key, course_id
+            )
+            continue
+        distributions[(url, display_name, problem_part_id)][answer] += count
+    return distributions
+
+
 def answer_distributions(course_id):
     """
     Given a course_id, return answer distributions in the form of a dictionary
@@ -78,37 +144,23 @@ def answer_distributions(course_id):
     generate the report.
 
     This method will try to use a read-replica database if one is available.
-    """
-    # dict: { module.module_state_key : (url_name, display_name) }
-    state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
+    For large courses, the `calculate_answer_distribution_csv` instructor task
+    counts the same answers in parallel subtasks.
 
-    def url_and_display_name(module_state_key):
-        """
-        For a given module_state_key, return the problem's url and display_name.
-        Handle modulestore access and caching. This method ignores permissions.
-        May throw an ItemNotFoundError if there is no content that corresponds
-        to this module_state_key.
-        """
-        problem_store = modulestore()
-        if module_state_key not in state_keys_to_problem_info:
-            problems = problem_store.get_items(module_state_key, course_id=course_id, depth=1)
-            if not problems:
-                # Likely means that the problem was deleted from the course
-                # after the student had answered. We log this suspicion where
-                # this exception is caught.
-                raise ItemNotFoundError(
-                    "Answer Distribution: Module {} not found for course {}"
-                    .format(module_state_key, course_id)
-                )
-            problem = problems[0]
-            problem_info = (problem.url_name, problem.display_name_with_default)
-            state_keys_to_problem_info[module_state_key] = problem_info
+    Once a course's answer counts have been backfilled, they are kept up to
+    date as students answer (see courseware.answer_distribution), and are
+    read from there instead.
+    """
+    # If the course's answer counts are maintained as students answer, just
+    # read them
+    if counts_maintained(course_id):
+        return label_answer_counts(course_id, stored_answer_counts(course_id))
 
-        return state_keys_to_problem_info[module_state_key]
+    url_and_display_name = _problem_info_finder(course_id)
+    answer_counts = defaultdict(lambda: defaultdict(int))
 
     # Iterate through all problems submitted for this course in no particular
     # order, and build up our answer_counts dict that we will eventually return
-    answer_counts = defaultdict(lambda: defaultdict(int))
     for module in StudentModule.all_submitted_problems_read_only(course_id):
         try:
             state_dict = json.loads(module.state) if module.state else {}
@@ -146,6 +198,59 @@ def answer_distributions(course_id):
 
     return answer_counts
 
+def grading_context_for_course(course):
+    """
+    Return a compact version of `course.grading_context`, which refers to
+    blocks by location rather than holding their descriptors:
+
+    graded_sections - A dictionary keyed by section format. The values
+        are lists of dictionaries containing
+            "section_location" : The location of the section
+            "section_name" : The display name of the section
+            "scored_locations" : The locations of the blocks with scores
+                that could possibly be in the section, for any student
+            "always_recalculate_grades" : Whether any of those blocks must
+                always be graded, even if the student hasn't touched them
+
+    It is built once per version of the course content, and cached both
+    in this process and in the general cache.
+    """
+    version = course_content_version(course.location)
+    cached = _grading_contexts.get(course.id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    cache_key = u'courseware.grading_context.{}.{}'.format(course.id, version)
+    grading_context = cache.get(cache_key)
+    if grading_context is None:
+        grading_context = _compute_grading_context(course)
+        cache.set(cache_key, grading_context, GRADING_CONTEXT_CACHE_TIMEOUT)
+
+    _grading_contexts[course.id] = (version, grading_context)
+    return grading_context
+
+
+def _compute_grading_context(course):
+    """
+    Build the grading context returned by `grading_context_for_course`
+    by walking the course's descriptors.
+    """
+    graded_sections = {}
+    for section_format, sections in course.grading_context['graded_sections'].iteritems():
+        graded_sections[section_format] = [
+            {
+                'section_location': section['section_descriptor'].location,
+                'section_name': section['section_descriptor'].display_name_with_default,
+                'scored_locations': [descriptor.location for descriptor in section['xmoduledescriptors']],
+                'always_recalculate_grades': any(
+                    descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+                ),
+            }
+            for section in sections
+        ]
+    return {'graded_sections': graded_sections}
+
+
 @transaction.commit_manually
 def grade(student, request, course, keep_raw_scores=False):
     """
@@ -177,36 +282,39 @@ def _grade(student, request, course, keep_raw_scores):
 
     More information on the format is in the docstring for CourseGrader.
     """
-    grading_context = course.grading_context
+    grading_context = grading_context_for_course(course)
     raw_scores = []
 
+    # The locations in this course that the student has state for, so that
+    # sections they haven't touched can be skipped without a query each
+    with manual_transaction():
+        touched_locations = set(StudentModule.objects.filter(
+            student=student,
+            course_id=course.id
+        ).values_list('module_state_key', flat=True))
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
     for section_format, sections in grading_context['graded_sections'].iteritems():
         format_scores = []
         for section in sections:
-            section_descriptor = section['section_descriptor']
-            section_name = section_descriptor.display_name_with_default
+            section_name = section['section_name']
 
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
-                descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
-            )
+            should_grade_section = section['always_recalculate_grades']
 
             # If we haven't seen a single problem in the section, we don't have to grade it at all! We can assume 0%
             if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
+                should_grade_section = any(
+                    location.url() in touched_locations for location in section['scored_locations']
+                )
 
             if should_grade_section:
+                # Only now do we need the section's descriptor
+                section_descriptor = course.runtime.get_block(section['section_location'])
                 scores = []
 
                 def create_module(descriptor):
@@ -247,7 +355,7 @@ def _grade(student, request, course, keep_raw_scores):
                 format_scores.append(graded_total)
             else:
                 log.exception("Unable to grade a section with a total possible score of zero. " +
-                              str(section_descriptor.location))
+                              str(section['section_location']))
 
         totaled_scores[section_format] = format_scores
 
@@ -471,7 +579,7 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_id, students):
+def iterate_grades_for(course_id, students, keep_raw_scores=False):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -487,7 +595,7 @@ def iterate_grades_for(course_id, students):
         up the grade. (For display)
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
-    - raw_scores: contains scores for every graded module
+    - raw_scores: contains scores for every graded module, if keep_raw_scores is True
     """
     course = courses.get_course_by_id(course_id)
 
@@ -505,7 +613,7 @@ def iterate_grades_for(course_id, students):
                 # It's not pretty, but untangling that is currently beyond the
                 # scope of this feature.
                 request.session = {}
-                gradeset = grade(student, request, course)
+                gradeset = grade(student, request, course, keep_raw_scores=keep_raw_scores)
                 yield student, gradeset, ""
             except Exception as exc:  # pylint: disable=broad-except
                 # Keep marching on even if this student couldn't be graded for
@@ -0,0 +1,109 @@
+"""
+Asynchronous, compressed storage of StudentModule history.
+
+When the ENABLE_COMPRESSED_STUDENT_MODULE_HISTORY feature is on, saving a
+StudentModule only appends a history record to an in-memory, per-thread
+queue. The queue is handed to the `write_student_module_history` task
+once the request is finished, which inserts all of its records into
+CompressedStudentModuleHistory with a single bulk insert.
+
+`get_history_entries` reads the history of a StudentModule from both
+StudentModuleHistory and CompressedStudentModuleHistory, so that callers
+do not need to know which storage was in use when a record was written.
+"""
+import logging
+import threading
+
+import crum
+from dateutil.parser import parse as parse_datetime
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+from courseware.models import StudentModuleHistory, CompressedStudentModuleHistory
+
+log = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def _pending_records():
+    """Returns the list of history records queued on this thread"""
+    if not hasattr(_pending, 'records'):
+        _pending.records = []
+    return _pending.records
+
+
+def record_history(student_module):
+    """
+    Queue a history record for the current state of `student_module`.
+
+    Records are written when the current request finishes. Outside of a
+    request (e.g. in a celery task or a management command), they are
+    written right away.
+    """
+    _pending_records().append({
+        'student_module_id': student_module.id,
+        'created': student_module.modified.isoformat(),
+        'state': student_module.state,
+        'grade': student_module.grade,
+        'max_grade': student_module.max_grade,
+    })
+    if crum.get_current_request() is None:
+        flush_history(asynchronous=False)
+
+
+@receiver(request_finished)
+def flush_history_on_request_finished(sender, **kwargs):  # pylint: disable=unused-argument
+    """Hand the history records queued during the request to the background task"""
+    flush_history()
+
+
+def flush_history(asynchronous=True):
+    """
+    Write out all the history records queued on this thread, in the
+    background unless `asynchronous` is False.
+    """
+    records = _pending_records()
+    if not records:
+        return
+    _pending.records = []
+
+    if asynchronous:
+        # Imported here to avoid a circular import
+        from courseware.tasks import write_student_module_history
+        try:
+            write_student_module_history.delay(records)
+            return
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to queue %d StudentModule history records, writing them now", len(records))
+    write_history_records(records)
+
+
+def write_history_records(records):
+    """
+    Insert the history `records` (as queued by `record_history`) into
+    CompressedStudentModuleHistory, with a single query.
+    """
+    CompressedStudentModuleHistory.objects.bulk_create([
+        CompressedStudentModuleHistory(
+            student_module_id=record['student_module_id'],
+            version=None,
+            created=parse_datetime(record['created']),
+            compressed_state=CompressedStudentModuleHistory.compress(record['state']),
+            grade=record['grade'],
+            max_grade=record['max_grade'],
+        )
+        for record in records
+    ])
+
+
+def get_history_entries(student_module):
+    """
+    Returns all the history entries of `student_module`, most recent first,
+    whichever storage they were written to. Every entry has `created`,
+    `state`, `grade` and `max_grade` attributes.
+    """
+    entries = list(StudentModuleHistory.objects.filter(student_module=student_module))
+    entries.extend(CompressedStudentModuleHistory.objects.filter(student_module=student_module))
+    entries.sort(key=lambda entry: (entry.created, entry.id), reverse=True)
+    return entries
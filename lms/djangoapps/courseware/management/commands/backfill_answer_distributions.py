@@ -0,0 +1,29 @@
+# pylint: disable=missing-docstring
+
+from textwrap import dedent
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courseware.answer_distribution import backfill_answer_counts
+
+
+class Command(BaseCommand):
+    """
+    Count the answers already submitted to the problems of the given
+    courses, and keep their answer distributions up to date from then on.
+
+    Running it again for a course recounts its answers from scratch.
+    """
+    help = dedent(__doc__).strip()
+    args = '<course_id course_id ...>'
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError("At least one course_id must be given")
+
+        output = []
+        for course_id in args:
+            num_counts = backfill_answer_counts(course_id)
+            output.append("{}: counted {} distinct answers".format(course_id, num_counts))
+
+        return '\n'.join(output) + '\n'
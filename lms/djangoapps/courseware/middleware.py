@@ -0,0 +1,17 @@
+"""
+Middleware for the courseware
+"""
+from courseware.answer_distribution import discard_answer_counts
+
+
+class AnswerCountsMiddleware(object):
+    """
+    Discards the answer count changes queued by a request whose transaction
+    is rolled back, instead of applying them when the request finishes.
+
+    It must come just before django.middleware.transaction.TransactionMiddleware
+    in MIDDLEWARE_CLASSES, so that its process_exception is called whenever,
+    and right after, TransactionMiddleware's rolls the request back.
+    """
+    def process_exception(self, request, exception):  # pylint: disable=unused-argument
+        discard_answer_counts()
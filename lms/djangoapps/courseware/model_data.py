@@ -3,25 +3,43 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
 from itertools import chain
 from .models import (
     StudentModule,
+    XModuleUserStateSummaryCounter,
     XModuleUserStateSummaryField,
     XModuleStudentPrefsField,
     XModuleStudentInfoField
 )
 import logging
 
-from django.db import DatabaseError
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
 from xblock.fields import Scope, UserScope
 
+from util.cache import cache
+
 log = logging.getLogger(__name__)
 
+# Scope.user_state_summary dict fields that tally learner responses, by block
+# category. Every learner updates these, so rather than rewriting the whole
+# dict (and serializing on, or losing updates to, a single row), each entry
+# is kept in its own XModuleUserStateSummaryCounter row and changed with an
+# atomic increment.
+SUMMARY_COUNTER_FIELDS = {
+    'poll_question': ('poll_answers',),
+    'word_cloud': ('all_words',),
+}
+
+# How long the aggregated tallies of a counter field are cached for
+SUMMARY_COUNTER_CACHE_TIMEOUT = 5
+
 
 class InvalidWriteError(Exception):
     """
@@ -38,6 +56,30 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+def get_child_descriptors(descriptor, depth, descriptor_filter):
+    """
+    Return a list of all child descriptors down to the specified depth
+    that match the descriptor filter. Includes `descriptor`
+
+    descriptor: The parent to search inside
+    depth: The number of levels to descend, or None for infinite depth
+    descriptor_filter(descriptor): A function that returns True
+        if descriptor should be included in the results
+    """
+    if descriptor_filter(descriptor):
+        descriptors = [descriptor]
+    else:
+        descriptors = []
+
+    if depth is None or depth > 0:
+        new_depth = depth - 1 if depth is not None else depth
+
+        for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
+            descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
+
+    return descriptors
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
@@ -46,7 +88,8 @@ class FieldDataCache(object):
     def __init__(self, descriptors, course_id, user, select_for_update=False):
         '''
         Find any courseware.models objects that are needed by any descriptor
-        in descriptors. Attempts to minimize the number of queries to the database.
+        in descriptors. Attempts to minimize the number of queries to the database:
+        each scope is only queried when a field in it is first looked up.
         Note: Only modules that have store_state = True or have shared
         state will have a StudentModule.
 
@@ -57,15 +100,24 @@ class FieldDataCache(object):
         select_for_update: True if rows should be locked until end of transaction
         '''
         self.cache = {}
-        self.descriptors = descriptors
+        self.descriptors = []
         self.select_for_update = select_for_update
         self.course_id = course_id
         self.user = user
 
-        if user.is_authenticated():
-            for scope, fields in self._fields_to_cache().items():
-                for field_object in self._retrieve_fields(scope, fields):
-                    self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+        # Scopes are only queried the first time a field in them is looked
+        # up, so that rendering blocks that only read (say) user_state
+        # doesn't pay for the other scopes. `_fields` maps each scope to the
+        # fields the cached descriptors declare in it.
+        self._fields = defaultdict(set)
+        self._loaded_scopes = set()
+
+        # While writes are buffered (see `buffered_writes`), maps each dirty
+        # field object to the names of the fields changed on it
+        self._write_buffer_depth = 0
+        self._dirty_field_objects = OrderedDict()
+
+        self.add_descriptors_to_cache(descriptors)
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
@@ -81,34 +133,45 @@ class FieldDataCache(object):
             should be cached
         select_for_update: Flag indicating whether the rows should be locked until end of transaction
         """
-
-        def get_child_descriptors(descriptor, depth, descriptor_filter):
-            """
-            Return a list of all child descriptors down to the specified depth
-            that match the descriptor filter. Includes `descriptor`
-
-            descriptor: The parent to search inside
-            depth: The number of levels to descend, or None for infinite depth
-            descriptor_filter(descriptor): A function that returns True
-                if descriptor should be included in the results
-            """
-            if descriptor_filter(descriptor):
-                descriptors = [descriptor]
-            else:
-                descriptors = []
-
-            if depth is None or depth > 0:
-                new_depth = depth - 1 if depth is not None else depth
-
-                for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
-                    descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
-
-            return descriptors
-
         descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
 
         return FieldDataCache(descriptors, course_id, user, select_for_update)
 
+    def add_descriptors_to_cache(self, descriptors):
+        """
+        Add `descriptors` to the set of blocks this cache holds data for.
+
+        Scopes that have already been loaded are queried for the new
+        descriptors only; the others will pick them up when they are first
+        accessed. Descriptors that are already cached are ignored, so it is
+        cheap to prefetch exactly the blocks about to be rendered.
+        """
+        cached_locations = set(descriptor.location for descriptor in self.descriptors)
+        new_descriptors = []
+        for descriptor in descriptors:
+            if descriptor.location not in cached_locations:
+                cached_locations.add(descriptor.location)
+                new_descriptors.append(descriptor)
+
+        if not new_descriptors:
+            return
+
+        self.descriptors.extend(new_descriptors)
+        new_fields = self._fields_to_cache(new_descriptors)
+        for scope, fields in new_fields.items():
+            self._fields[scope].update(fields)
+
+        for scope in self._loaded_scopes:
+            if scope in new_fields:
+                self._cache_fields(scope, new_fields[scope], new_descriptors)
+
+    def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
+        """
+        Add `descriptor` and its descendents to this cache. The arguments
+        are as for `cache_for_descriptor_descendents`.
+        """
+        self.add_descriptors_to_cache(get_child_descriptors(descriptor, depth, descriptor_filter))
+
     def _query(self, model_class, **kwargs):
         """
         Queries model_class with **kwargs, optionally adding select_for_update if
@@ -134,15 +197,16 @@ class FieldDataCache(object):
         )
         return res
 
-    def _retrieve_fields(self, scope, fields):
+    def _retrieve_fields(self, scope, fields, descriptors):
         """
         Queries the database for all of the fields in the specified scope
+        belonging to `descriptors`
         """
         if scope == Scope.user_state:
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
-                (descriptor.location.url() for descriptor in self.descriptors),
+                (descriptor.location.url() for descriptor in descriptors),
                 course_id=self.course_id,
                 student=self.user.pk,
             )
@@ -150,14 +214,14 @@ class FieldDataCache(object):
             return self._chunked_query(
                 XModuleUserStateSummaryField,
                 'usage_id__in',
-                (descriptor.location.url() for descriptor in self.descriptors),
+                (descriptor.location.url() for descriptor in descriptors),
                 field_name__in=set(field.name for field in fields),
             )
         elif scope == Scope.preferences:
             return self._chunked_query(
                 XModuleStudentPrefsField,
                 'module_type__in',
-                set(descriptor.module_class.__name__ for descriptor in self.descriptors),
+                set(descriptor.module_class.__name__ for descriptor in descriptors),
                 student=self.user.pk,
                 field_name__in=set(field.name for field in fields),
             )
@@ -170,16 +234,41 @@ class FieldDataCache(object):
         else:
             return []
 
-    def _fields_to_cache(self):
+    def _fields_to_cache(self, descriptors):
         """
         Returns a map of scopes to fields in that scope that should be cached
+        for `descriptors`
         """
         scope_map = defaultdict(set)
-        for descriptor in self.descriptors:
+        for descriptor in descriptors:
             for field in descriptor.fields.values():
                 scope_map[field.scope].add(field)
         return scope_map
 
+    def _cache_fields(self, scope, fields, descriptors):
+        """
+        Query the database for `fields` of `descriptors` in `scope`, and add
+        the results to the cache. Objects that are already cached are kept,
+        as they may have unsaved changes.
+        """
+        if not self.user.is_authenticated():
+            return
+
+        for field_object in self._retrieve_fields(scope, fields, descriptors):
+            self.cache.setdefault(self._cache_key_from_field_object(scope, field_object), field_object)
+
+    def _load_scope(self, scope):
+        """
+        Make sure the fields of every cached descriptor in `scope` have been
+        retrieved from the database
+        """
+        if scope in self._loaded_scopes:
+            return
+
+        self._loaded_scopes.add(scope)
+        if scope in self._fields:
+            self._cache_fields(scope, self._fields[scope], self.descriptors)
+
     def _cache_key_from_kvs_key(self, key):
         """
         Return the key used in the FieldDataCache for the specified KeyValueStore key
@@ -215,6 +304,7 @@ class FieldDataCache(object):
 
         returns the found object, or None if the object doesn't exist
         '''
+        self._load_scope(key.scope)
         return self.cache.get(self._cache_key_from_kvs_key(key))
 
     def find_or_create(self, key):
@@ -263,6 +353,62 @@ class FieldDataCache(object):
         self.cache[cache_key] = field_object
         return field_object
 
+    @contextmanager
+    def buffered_writes(self):
+        """
+        Context manager that defers saving field objects until the outermost
+        `buffered_writes` block exits. All changes made to a field object in
+        the meantime are coalesced into a single save (and so, for problems,
+        a single StudentModuleHistory entry).
+
+        Use this around anything that may change a block's state several
+        times, such as invoking a handler.
+        """
+        self._write_buffer_depth += 1
+        try:
+            yield
+        finally:
+            self._write_buffer_depth -= 1
+            if self._write_buffer_depth == 0:
+                self.flush()
+
+    def save(self, field_object, field_names=()):
+        """
+        Save `field_object`, whose fields `field_names` have been changed.
+
+        If writes are currently buffered, the object is only marked dirty, and
+        will be saved by `flush`.
+        """
+        if self._write_buffer_depth:
+            self._dirty_field_objects.setdefault(field_object, []).extend(field_names)
+        else:
+            field_object.save()
+
+    def discard(self, field_object):
+        """
+        Forget any buffered changes to `field_object`, e.g. because it is
+        about to be deleted.
+        """
+        self._dirty_field_objects.pop(field_object, None)
+
+    def flush(self):
+        """
+        Save every field object marked dirty while writes were buffered.
+
+        Raises a KeyValueMultiSaveError listing the fields that were saved
+        successfully if any of the saves fails.
+        """
+        saved_fields = []
+        while self._dirty_field_objects:
+            field_object, field_names = self._dirty_field_objects.popitem(last=False)
+            try:
+                field_object.save()
+                saved_fields.extend(field_names)
+            except DatabaseError:
+                log.exception('Error saving fields %r', field_names)
+                self._dirty_field_objects.clear()
+                raise KeyValueMultiSaveError(saved_fields)
+
 
 class DjangoKeyValueStore(KeyValueStore):
     """
@@ -292,11 +438,17 @@ class DjangoKeyValueStore(KeyValueStore):
 
     def __init__(self, field_data_cache):
         self._field_data_cache = field_data_cache
+        # The tallies last read from (or written to) each counter field, used
+        # to work out what to increment when the field is set
+        self._counter_values = {}
 
     def get(self, key):
         if key.scope not in self._allowed_scopes:
             raise InvalidScopeError(key)
 
+        if self._is_counter_field(key):
+            return self._get_counters(key)
+
         field_object = self._field_data_cache.find(key)
         if field_object is None:
             raise KeyError(key.field_name)
@@ -328,6 +480,15 @@ class DjangoKeyValueStore(KeyValueStore):
             if field.scope not in self._allowed_scopes:
                 raise InvalidScopeError(field)
 
+            if self._is_counter_field(field):
+                try:
+                    self._update_counters(field, kv_dict[field])
+                    saved_fields.append(field.field_name)
+                except DatabaseError:
+                    log.exception('Error saving counter field %r', field)
+                    raise KeyValueMultiSaveError(saved_fields)
+                continue
+
             # If the field is valid and isn't already in the dictionary, add it.
             field_object = self._field_data_cache.find_or_create(field)
             if field_object not in field_objects.keys():
@@ -346,12 +507,14 @@ class DjangoKeyValueStore(KeyValueStore):
                 field_object.value = json.dumps(kv_dict[field])
 
         for field_object in field_objects:
+            field_names = [field.field_name for field in field_objects[field_object]]
             try:
-                # Save the field object that we made above
-                field_object.save()
+                # Save the field object that we made above (or leave it to
+                # the FieldDataCache if it is buffering writes)
+                self._field_data_cache.save(field_object, field_names)
                 # If save is successful on this scope, add the saved fields to
                 # the list of successful saves
-                saved_fields.extend([field.field_name for field in field_objects[field_object]])
+                saved_fields.extend(field_names)
             except DatabaseError:
                 log.exception('Error saving fields %r', field_objects[field_object])
                 raise KeyValueMultiSaveError(saved_fields)
@@ -360,6 +523,10 @@ class DjangoKeyValueStore(KeyValueStore):
         if key.scope not in self._allowed_scopes:
             raise InvalidScopeError(key)
 
+        if self._is_counter_field(key):
+            self._delete_counters(key)
+            return
+
         field_object = self._field_data_cache.find(key)
         if field_object is None:
             raise KeyError(key.field_name)
@@ -368,14 +535,18 @@ class DjangoKeyValueStore(KeyValueStore):
             state = json.loads(field_object.state)
             del state[key.field_name]
             field_object.state = json.dumps(state)
-            field_object.save()
+            self._field_data_cache.save(field_object, [key.field_name])
         else:
+            self._field_data_cache.discard(field_object)
             field_object.delete()
 
     def has(self, key):
         if key.scope not in self._allowed_scopes:
             raise InvalidScopeError(key)
 
+        if self._is_counter_field(key):
+            return bool(self._get_counters(key))
+
         field_object = self._field_data_cache.find(key)
         if field_object is None:
             return False
@@ -384,3 +555,148 @@ class DjangoKeyValueStore(KeyValueStore):
             return key.field_name in json.loads(field_object.state)
         else:
             return True
+
+    def _is_counter_field(self, key):
+        """
+        Return whether `key` is one of the SUMMARY_COUNTER_FIELDS
+        """
+        return (
+            key.scope == Scope.user_state_summary and
+            key.field_name in SUMMARY_COUNTER_FIELDS.get(key.block_scope_id.category, ())
+        )
+
+    def _counters(self, key):
+        """
+        Return a queryset of the XModuleUserStateSummaryCounter rows for `key`
+        """
+        return XModuleUserStateSummaryCounter.objects.filter(
+            usage_id=key.block_scope_id.url(),
+            field_name=key.field_name,
+        )
+
+    def _counter_cache_key(self, key):
+        """
+        Return the cache key for the aggregated tallies of `key`
+        """
+        return u'summary_counters.{}.{}'.format(key.block_scope_id.url(), key.field_name)
+
+    def _get_counters(self, key):
+        """
+        Return the tallies of the counter field `key` as a dict, aggregated
+        from its rows. The result is cached briefly, so may not yet include
+        the most recent increments made by other learners.
+        """
+        cache_key = self._counter_cache_key(key)
+        counters = cache.get(cache_key)
+        if counters is None:
+            counters = dict(self._counters(key).values_list('key', 'count'))
+            if not counters:
+                counters = self._import_counters(key)
+            cache.set(cache_key, counters, SUMMARY_COUNTER_CACHE_TIMEOUT)
+
+        self._counter_values[key] = dict(counters)
+        return dict(counters)
+
+    def _import_counters(self, key):
+        """
+        Copy the tallies of `key` that were stored as a single
+        XModuleUserStateSummaryField row, before it was a counter field,
+        into counter rows. Returns the imported tallies.
+        """
+        field_object = self._field_data_cache.find(key)
+        if field_object is None:
+            return {}
+
+        counters = dict(
+            (counter_key, count)
+            for counter_key, count in (json.loads(field_object.value) or {}).iteritems()
+            if self._is_valid_counter_key(key, counter_key)
+        )
+        for counter_key, count in sorted(counters.iteritems()):
+            # Only create missing rows, so that concurrent imports can't
+            # count anything twice. A row that another import inserted
+            # first is left as it is.
+            savepoint = transaction.savepoint()
+            try:
+                self._create_counter(key, counter_key, count)
+                transaction.savepoint_commit(savepoint)
+            except IntegrityError:
+                transaction.savepoint_rollback(savepoint)
+        return counters
+
+    def _update_counters(self, key, value):
+        """
+        Atomically increment the rows of the counter field `key` by the
+        difference between `value` and the tallies last read for it.
+
+        The rows are updated in a fixed order, so that concurrent updates
+        lock them in the same order rather than deadlocking.
+        """
+        if key not in self._counter_values:
+            self._get_counters(key)
+        previous = self._counter_values[key]
+        counted = {}
+
+        for counter_key, count in sorted(value.iteritems()):
+            if not self._is_valid_counter_key(key, counter_key):
+                continue
+            counted[counter_key] = count
+
+            delta = count - previous.get(counter_key, 0)
+            if delta == 0 and counter_key in previous:
+                continue
+
+            counters = self._counters(key).filter(key=counter_key)
+            if counters.update(count=F('count') + delta):
+                continue
+
+            # The entry isn't counted yet. If it's being inserted
+            # concurrently, ours fails, and the row that won is updated
+            # instead.
+            savepoint = transaction.savepoint()
+            try:
+                self._create_counter(key, counter_key, delta)
+                transaction.savepoint_commit(savepoint)
+            except IntegrityError:
+                transaction.savepoint_rollback(savepoint)
+                counters.update(count=F('count') + delta)
+
+        self._counter_values[key] = counted
+
+    def _create_counter(self, key, counter_key, count):
+        """
+        Insert the `counter_key` row of the counter field `key`
+        """
+        XModuleUserStateSummaryCounter.objects.create(
+            usage_id=key.block_scope_id.url(),
+            field_name=key.field_name,
+            key=counter_key,
+            count=count,
+        )
+
+    def _is_valid_counter_key(self, key, counter_key):
+        """
+        Return whether `counter_key` fits in a row of the counter field
+        `key`. Longer entries aren't counted, since shortening them could
+        merge distinct entries.
+        """
+        max_length = XModuleUserStateSummaryCounter._meta.get_field('key').max_length  # pylint: disable=protected-access
+        if len(counter_key) <= max_length:
+            return True
+        log.warning('Not counting an entry of %r longer than %d characters: %r', key, max_length, counter_key)
+        return False
+
+    def _delete_counters(self, key):
+        """
+        Delete all of the tallies of the counter field `key`
+        """
+        if not self.has(key):
+            raise KeyError(key.field_name)
+
+        self._counters(key).delete()
+        field_object = self._field_data_cache.find(key)
+        if field_object is not None:
+            self._field_data_cache.discard(field_object)
+            field_object.delete()
+        cache.delete(self._counter_cache_key(key))
+        self._counter_values.pop(key, None)
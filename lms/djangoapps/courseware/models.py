@@ -12,10 +12,13 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import base64
+import zlib
+
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
 
@@ -110,6 +113,12 @@ class StudentModuleHistory(models.Model):
     @receiver(post_save, sender=StudentModule)
     def save_history(sender, instance, **kwargs):
         if instance.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES:
+            if settings.FEATURES.get('ENABLE_COMPRESSED_STUDENT_MODULE_HISTORY'):
+                # Imported here to avoid a circular import
+                from courseware.history import record_history
+                record_history(instance)
+                return
+
             history_entry = StudentModuleHistory(student_module=instance,
                                                  version=None,
                                                  created=instance.modified,
@@ -119,6 +128,48 @@ class StudentModuleHistory(models.Model):
             history_entry.save()
 
 
+class CompressedStudentModuleHistory(models.Model):
+    """
+    Alternative storage for StudentModuleHistory, used when the
+    ENABLE_COMPRESSED_STUDENT_MODULE_HISTORY feature is on. The state is
+    stored zlib compressed, and the rows are inserted in batches by a
+    background task rather than while handling the request that changed
+    the StudentModule (see courseware.history).
+    """
+
+    class Meta:
+        get_latest_by = "created"
+
+    student_module = models.ForeignKey(StudentModule, db_index=True)
+    version = models.CharField(max_length=255, null=True, blank=True)
+
+    # This should be populated from the modified field in StudentModule
+    created = models.DateTimeField(db_index=True)
+    # Base64 encoded, zlib compressed state
+    compressed_state = models.TextField(null=True, blank=True)
+    grade = models.FloatField(null=True, blank=True)
+    max_grade = models.FloatField(null=True, blank=True)
+
+    @staticmethod
+    def compress(state):
+        """Returns `state` (a unicode string, or None) in compressed form"""
+        if state is None:
+            return None
+        return base64.b64encode(zlib.compress(state.encode('utf-8')))
+
+    @staticmethod
+    def decompress(compressed_state):
+        """Inverse of `compress`"""
+        if compressed_state is None:
+            return None
+        return zlib.decompress(base64.b64decode(compressed_state)).decode('utf-8')
+
+    @property
+    def state(self):
+        """The uncompressed state, so entries read like StudentModuleHistory ones"""
+        return self.decompress(self.compressed_state)
+
+
 class XModuleUserStateSummaryField(models.Model):
     """
     Stores data set in the Scope.user_state_summary scope by an xmodule field
@@ -150,6 +201,39 @@ class XModuleUserStateSummaryField(models.Model):
         return unicode(repr(self))
 
 
+class XModuleUserStateSummaryCounter(models.Model):
+    """
+    Stores one entry of a Scope.user_state_summary dict field whose values
+    are tallies (such as the votes for each poll answer). Keeping each entry
+    on its own row lets concurrent updates be applied as atomic increments.
+    """
+
+    class Meta:
+        unique_together = (('usage_id', 'field_name', 'key'),)
+
+    # The name of the field
+    field_name = models.CharField(max_length=64)
+
+    # The definition id for the module
+    usage_id = models.CharField(max_length=255, db_index=True)
+
+    # The dict key being counted
+    key = models.CharField(max_length=255)
+
+    count = models.IntegerField(default=0)
+
+    def __repr__(self):
+        return 'XModuleUserStateSummaryCounter<%r>' % ({
+            'field_name': self.field_name,
+            'usage_id': self.usage_id,
+            'key': self.key,
+            'count': self.count,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+
 class XModuleStudentPrefsField(models.Model):
     """
     Stores data set in the Scope.preferences scope by an xmodule field
@@ -225,6 +309,7 @@ class OfflineComputedGrade(models.Model):
     updated = models.DateTimeField(auto_now=True, db_index=True)
 
     gradeset = models.TextField(null=True, blank=True)		# grades, stored as JSON
+    percent = models.FloatField(null=True, blank=True, db_index=True)  # gradeset['percent'], for sorting
 
     class Meta:
         unique_together = (('user', 'course_id'), )
@@ -249,3 +334,89 @@ class OfflineComputedGradeLog(models.Model):
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id, self.created)
+
+
+class AnswerDistributionCount(models.Model):
+    """
+    The number of students whose current answer to a part of a submitted
+    problem is `answer`. Kept up to date as StudentModules are saved, for
+    courses listed in AnswerDistributionBackfill (see
+    courseware.answer_distribution).
+    """
+
+    class Meta:
+        unique_together = (('module_state_key', 'part_id', 'answer_hash'),)
+
+    course_id = models.CharField(max_length=255, db_index=True)
+    module_state_key = models.CharField(max_length=255, db_column='module_id')
+
+    # The id of the problem part, as used in the student_answers of the problem's state
+    part_id = models.CharField(max_length=255)
+
+    # The answer, and its sha1, which is indexed in its place
+    answer = models.TextField()
+    answer_hash = models.CharField(max_length=40)
+
+    count = models.IntegerField(default=0)
+
+    def __repr__(self):
+        return 'AnswerDistributionCount<%r>' % ({
+            'course_id': self.course_id,
+            'module_state_key': self.module_state_key,
+            'part_id': self.part_id,
+            'answer': self.answer[:20],
+            'count': self.count,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+
+class AnswerDistributionBackfill(models.Model):
+    """
+    Records that the AnswerDistributionCounts of a course have been filled
+    in from its existing StudentModules, and are maintained from then on.
+    """
+    course_id = models.CharField(max_length=255, unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __unicode__(self):
+        return "[AnswerDistributionBackfill] %s: %s" % (self.course_id, self.created)
+
+
+def _counted_answers(student_module):
+    """
+    Returns (course_id, module_state_key, state) of `student_module` if its
+    answers are counted in the answer distribution (as it's a submitted
+    problem), else None
+    """
+    if student_module.module_type == 'problem' and student_module.grade is not None:
+        return (student_module.course_id, student_module.module_state_key, student_module.state)
+    return None
+
+
+@receiver(post_init, sender=StudentModule)
+def remember_counted_answers(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Remember which answers of a StudentModule are counted, as it's loaded"""
+    instance._counted_answers = _counted_answers(instance)  # pylint: disable=protected-access
+
+
+@receiver(post_save, sender=StudentModule)
+def update_answer_distribution_on_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Move the counts of the answers of a StudentModule that changed"""
+    # pylint: disable=protected-access
+    counted_answers = _counted_answers(instance)
+    if counted_answers != instance._counted_answers:
+        # Imported here to avoid a circular import
+        from courseware.answer_distribution import update_answer_counts
+        update_answer_counts(instance.id, instance._counted_answers, counted_answers)
+        instance._counted_answers = counted_answers
+
+
+@receiver(post_delete, sender=StudentModule)
+def update_answer_distribution_on_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Stop counting the answers of a deleted StudentModule"""
+    # pylint: disable=protected-access
+    if instance._counted_answers is not None:
+        from courseware.answer_distribution import update_answer_counts
+        update_answer_counts(instance.id, instance._counted_answers, None)
@@ -18,6 +18,7 @@ from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import has_access
+from courseware.course_overview import TocEntry
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache, DjangoKeyValueStore
 from lms.lib.xblock.field_data import LmsFieldData
@@ -25,6 +26,7 @@ from lms.lib.xblock.runtime import LmsModuleSystem, handler_prefix, unquote_slas
 from edxmako.shortcuts import render_to_string
 from psychometrics.psychoanalyze import make_psychometrics_data_update_handler
 from student.models import anonymous_id_for_user, user_by_anonymous_id
+from util.cache import cache as general_cache
 from util.json_request import JsonResponse
 from util.sandboxing import can_execute_unsafe_code
 from xblock.fields import Scope
@@ -34,7 +36,7 @@ from xblock.django.request import django_to_webob_request, webob_to_django_respo
 from xmodule.error_module import ErrorDescriptor, NonStaffErrorDescriptor
 from xmodule.exceptions import NotFoundError, ProcessingError
 from xmodule.modulestore import Location
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import modulestore, course_content_version
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule_modifiers import replace_course_urls, replace_jump_to_id_urls, replace_static_urls, add_histogram, wrap_xblock
 from xmodule.lti_module import LTIModule
@@ -42,6 +44,10 @@ from xmodule.lti_module import LTIModule
 
 log = logging.getLogger(__name__)
 
+# How long the table of contents of a course is cached. It is also rebuilt
+# whenever the course content changes.
+TOC_CACHE_TIMEOUT = 60 * 60
+
 
 if settings.XQUEUE_INTERFACE.get('basic_auth') is not None:
     requests_auth = HTTPBasicAuth(*settings.XQUEUE_INTERFACE['basic_auth'])
@@ -88,20 +94,23 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     NOTE: assumes that if we got this far, user has access to course.  Returns
     None if this is not the case.
 
-    field_data_cache must include data from the course module and 2 levels of its descendents
+    The structure of the table of contents is cached per version of the
+    course content (see `course_toc_entries`); only which chapters and
+    sections the user can load, and which are active, is worked out here.
+    field_data_cache is no longer needed, and is ignored.
     '''
-
-    course_module = get_module_for_descriptor(user, request, course, field_data_cache, course.id)
-    if course_module is None:
+    if not has_access(user, course, 'load'):
         return None
 
     chapters = list()
-    for chapter in course_module.get_display_items():
-        if chapter.hide_from_toc:
+    for chapter in course_toc_entries(course):
+        if not has_access(user, chapter, 'load', course.id) or chapter.hide_from_toc:
             continue
 
         sections = list()
-        for section in chapter.get_display_items():
+        for section in chapter.children:
+            if not has_access(user, section, 'load', course.id):
+                continue
 
             active = (chapter.url_name == active_chapter and
                       section.url_name == active_section)
@@ -122,6 +131,23 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     return chapters
 
 
+def course_toc_entries(course):
+    """
+    Return a list of TocEntry, one per chapter of `course`, each holding a
+    TocEntry per section of that chapter. These are the same for every
+    user, so they're cached per version of the course content.
+    """
+    cache_key = u'courseware.toc.{}.{}'.format(course.id, course_content_version(course.location))
+    entries = general_cache.get(cache_key)
+    if entries is None:
+        entries = [
+            TocEntry(chapter, children=[TocEntry(section) for section in chapter.get_display_items()])
+            for chapter in course.get_display_items()
+        ]
+        general_cache.set(cache_key, entries, TOC_CACHE_TIMEOUT)
+    return entries
+
+
 def get_module(user, request, location, field_data_cache, course_id,
                position=None, not_found_ok=False, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -308,8 +334,9 @@ def get_module_for_descriptor_internal(user, descriptor, field_data_cache, cours
         # Update the grades
         student_module.grade = event.get('value')
         student_module.max_grade = event.get('max_value')
-        # Save all changes to the underlying KeyValueStore
-        student_module.save()
+        # Save all changes to the underlying KeyValueStore (this is deferred
+        # while the field_data_cache is buffering writes)
+        field_data_cache.save(student_module)
 
         # Bin score into range and increment stats
         score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
@@ -571,7 +598,10 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, user):
 
     req = django_to_webob_request(request)
     try:
-        resp = instance.handle(handler, req, suffix)
+        # Coalesce all the state changes made by the handler into a single
+        # write per row, flushed once the handler is done
+        with field_data_cache.buffered_writes():
+            resp = instance.handle(handler, req, suffix)
 
     except NoSuchHandlerError:
         log.exception("XBlock %s attempted to access missing handler %r", instance, handler)
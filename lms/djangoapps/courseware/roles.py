@@ -6,12 +6,27 @@ adding users, removing users, and listing members
 from abc import ABCMeta, abstractmethod
 
 from django.contrib.auth.models import User, Group
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 
+from request_cache.middleware import RequestCache
+from student.models import user_group_names
 from xmodule.modulestore import Location
 from xmodule.modulestore.exceptions import InvalidLocationError, ItemNotFoundError
 from xmodule.modulestore.django import loc_mapper
 from xmodule.modulestore.locator import CourseLocator, Locator
 
+# The request cache key under which `courseware.access.has_access` memoizes
+# its decisions. They're dropped whenever a role changes.
+ACCESS_DECISIONS_CACHE_KEY = 'courseware.access_decisions'
+
+
+def clear_access_decisions():
+    """
+    Forget the access decisions made so far in this request
+    """
+    RequestCache.get_request_cache().data.pop(ACCESS_DECISIONS_CACHE_KEY, None)
+
 
 class CourseContextRequired(Exception):
     """
@@ -66,16 +81,29 @@ class GlobalStaff(AccessRole):
         for user in users:
             user.is_staff = True
             user.save()
+        clear_access_decisions()
 
     def remove_users(self, *users):
         for user in users:
             user.is_staff = False
             user.save()
+        clear_access_decisions()
 
     def users_with_role(self):
         raise Exception("This operation is un-indexed, and shouldn't be used")
 
 
+@receiver(m2m_changed, sender=User.groups.through)
+def clear_access_decisions_on_group_change(sender, action, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget this request's access decisions whenever anyone's groups change.
+    The cached group names themselves are invalidated by `student.models`,
+    which Studio loads too.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        clear_access_decisions()
+
+
 class GroupBasedRole(AccessRole):
     """
     A role based on membership to any of a set of groups.
@@ -101,7 +129,7 @@ class GroupBasedRole(AccessRole):
             return False
 
         if not hasattr(user, '_groups'):
-            user._groups = set(name.lower() for name in user.groups.values_list('name', flat=True))
+            user._groups = user_group_names(user)
 
         return len(user._groups.intersection(self._group_names)) > 0
 
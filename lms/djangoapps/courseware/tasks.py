@@ -0,0 +1,25 @@
+"""
+Background tasks for the courseware app.
+"""
+from celery import task
+
+from courseware.answer_distribution import apply_answer_counts
+from courseware.history import write_history_records
+
+
+@task()  # pylint: disable=E1102
+def write_student_module_history(records):
+    """
+    Insert a batch of StudentModule history records, as queued by
+    `courseware.history.record_history`.
+    """
+    write_history_records(records)
+
+
+@task()  # pylint: disable=E1102
+def apply_answer_count_changes(changes):
+    """
+    Apply a batch of answer count changes, as queued by
+    `courseware.answer_distribution.update_answer_counts`.
+    """
+    apply_answer_counts(changes)
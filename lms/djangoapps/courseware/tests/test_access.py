@@ -1,13 +1,17 @@
 import courseware.access as access
 import datetime
 
-from mock import Mock
+from mock import Mock, patch
 
 from django.test import TestCase
 from django.test.utils import override_settings
 
+from courseware.course_overview import TocEntry
+from courseware.roles import CourseStaffRole
 from courseware.tests.factories import UserFactory, CourseEnrollmentAllowedFactory, StaffFactory, InstructorFactory
 from student.tests.factories import AnonymousUserFactory
+from request_cache.middleware import RequestCache
+from xmodule.error_module import ErrorDescriptor
 from xmodule.modulestore import Location
 from courseware.tests.tests import TEST_DATA_MIXED_MODULESTORE
 import pytz
@@ -27,6 +31,7 @@ class AccessTestCase(TestCase):
         self.global_staff = UserFactory(is_staff=True)
         self.course_staff = StaffFactory(course=self.course)
         self.course_instructor = InstructorFactory(course=self.course)
+        RequestCache().clear_request_cache()
 
     def test__has_access_to_location(self):
         self.assertFalse(access._has_access_to_location(None, self.course, 'staff', None))
@@ -69,6 +74,21 @@ class AccessTestCase(TestCase):
         self.assertTrue(access._has_access_descriptor(u, d, 'load'))
         self.assertRaises(ValueError, access._has_access_descriptor, u, d, 'not_load_or_staff')
 
+    def test_error_toc_entry_staff_only(self):
+        yesterday = datetime.datetime.now(pytz.utc) - datetime.timedelta(days=1)
+        descriptor = Mock(
+            spec=ErrorDescriptor,
+            location=self.course.replace(category='chapter', name='Overview'),
+            start=yesterday,
+            days_early_for_beta=None,
+        )
+        entry = TocEntry(descriptor)
+        self.assertTrue(entry.is_error)
+
+        # Chapters that failed to load are only shown to staff
+        self.assertFalse(access.has_access(self.student, entry, 'load', 'edX/toy/2012_Fall'))
+        self.assertTrue(access.has_access(self.course_staff, entry, 'load', 'edX/toy/2012_Fall'))
+
     def test__has_access_course_desc_can_enroll(self):
         u = Mock()
         yesterday = datetime.datetime.now(pytz.utc) - datetime.timedelta(days=1)
@@ -102,3 +122,28 @@ class AccessTestCase(TestCase):
     def test__user_passed_as_none(self):
         """Ensure has_access handles a user being passed as null"""
         access.has_access(None, 'global', 'staff', None)
+
+    @patch('courseware.access.crum.get_current_request', Mock(return_value=object()))
+    def test_has_access_memoized(self):
+        with patch('courseware.access._has_access_location', return_value=False) as mock_check:
+            self.assertFalse(access.has_access(self.student, self.course, 'staff'))
+            self.assertFalse(access.has_access(self.student, self.course, 'staff'))
+            self.assertEqual(1, mock_check.call_count)
+
+            # Masquerading is part of the key
+            self.course_staff.masquerade_as_student = True
+            access.has_access(self.course_staff, self.course, 'staff')
+            del self.course_staff.masquerade_as_student
+            access.has_access(self.course_staff, self.course, 'staff')
+            self.assertEqual(3, mock_check.call_count)
+
+        # Changing a role forgets the memoized decisions
+        CourseStaffRole(self.course).add_users(self.student)
+        self.assertTrue(access.has_access(self.student, self.course, 'staff'))
+
+    def test_has_access_not_memoized_outside_request(self):
+        with patch('courseware.access._has_access_location', return_value=False) as mock_check:
+            access.has_access(self.student, self.course, 'staff')
+            access.has_access(self.student, self.course, 'staff')
+            self.assertEqual(2, mock_check.call_count)
+        self.assertNotIn(access.ACCESS_DECISIONS_CACHE_KEY, RequestCache.get_request_cache().data)
@@ -7,7 +7,7 @@ import mock
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from django.http import Http404
 from django.test.utils import override_settings
-from courseware.courses import get_course_by_id, get_course, get_cms_course_link
+from courseware.courses import get_course_by_id, get_course, get_cms_course_link, get_course_overviews
 from xmodule.modulestore.django import get_default_store_name_for_current_request
 from xmodule.modulestore.tests.factories import CourseFactory
 from courseware.tests.tests import TEST_DATA_MONGO_MODULESTORE
@@ -60,6 +60,26 @@ class CoursesTest(ModuleStoreTestCase):
             get_cms_course_link(self.course)
         )
 
+    @override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
+    def test_get_course_overviews(self):
+        """
+        Tests that get_course_overviews summarizes the courses it can find,
+        and leaves out the ones it can't
+        """
+        course = CourseFactory.create(
+            org='org', number='num', display_name='name'
+        )
+
+        overviews = get_course_overviews([
+            course.id, 'org/missing/course', 'MITx/foobar/statistics=introduction'
+        ])
+        self.assertEqual([course.id], overviews.keys())
+        overview = overviews[course.id]
+        self.assertEqual(course.location, overview.location)
+        self.assertEqual(course.display_name_with_default, overview.display_name_with_default)
+        self.assertEqual(course.start, overview.start)
+        self.assertEqual(course.has_ended(), overview.has_ended())
+
     @mock.patch(
         'xmodule.modulestore.django.get_current_request_hostname',
         mock.Mock(return_value='preview.localhost')
@@ -5,12 +5,14 @@ from django.http import Http404
 from django.test.utils import override_settings
 from mock import patch
 
+from courseware.tests.factories import StudentModuleFactory
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
-from courseware.grades import grade, iterate_grades_for
+from courseware.grades import grade, iterate_grades_for, grading_context_for_course
 
 
 def _grade_with_errors(student, request, course, keep_raw_scores=False):
@@ -120,3 +122,72 @@ class TestGradeIteration(ModuleStoreTestCase):
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+class TestGradingContext(ModuleStoreTestCase):
+    """
+    Test the compact, cached grading context.
+    """
+    def setUp(self):
+        """
+        Create a course with one graded section holding one problem
+        """
+        course = CourseFactory.create(display_name='grading_context_course')
+        self.chapter = ItemFactory.create(parent_location=course.location, category='chapter')
+        self.section = ItemFactory.create(
+            parent_location=self.chapter.location,
+            category='sequential',
+            display_name='Homework 1',
+            metadata={'graded': True, 'format': 'Homework'}
+        )
+        self.problem = ItemFactory.create(parent_location=self.section.location, category='problem')
+        self.course = modulestore().get_course(course.id)
+
+    def test_grading_context(self):
+        grading_context = grading_context_for_course(self.course)
+        self.assertEqual(
+            {
+                'Homework': [{
+                    'section_location': self.section.location,
+                    'section_name': 'Homework 1',
+                    'scored_locations': [self.problem.location],
+                    'always_recalculate_grades': False,
+                }]
+            },
+            grading_context['graded_sections']
+        )
+
+    def test_grading_context_cached(self):
+        grading_context = grading_context_for_course(self.course)
+        with patch('courseware.grades._compute_grading_context') as mock_compute:
+            self.assertEqual(grading_context, grading_context_for_course(self.course))
+        self.assertFalse(mock_compute.called)
+
+        # Changing the course makes a new grading context
+        ItemFactory.create(parent_location=self.section.location, category='problem')
+        grading_context = grading_context_for_course(modulestore().get_course(self.course.id))
+        self.assertEqual(2, len(grading_context['graded_sections']['Homework'][0]['scored_locations']))
+
+    @patch('courseware.grades.get_score')
+    def test_untouched_sections_skipped(self, mock_get_score):
+        untouched_section = ItemFactory.create(
+            parent_location=self.chapter.location,
+            category='sequential',
+            metadata={'graded': True, 'format': 'Homework'}
+        )
+        ItemFactory.create(parent_location=untouched_section.location, category='problem')
+        course = modulestore().get_course(self.course.id)
+
+        mock_get_score.return_value = (1, 1)
+        student = UserFactory.create()
+        StudentModuleFactory.create(
+            student=student,
+            course_id=course.id,
+            module_state_key=self.problem.location.url()
+        )
+
+        # Only the section with a problem the student has touched is graded
+        grade(student, None, course)
+        graded_locations = set(call[0][2].location for call in mock_get_score.call_args_list)
+        self.assertEqual(set([self.section.location, self.problem.location]), graded_locations)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the compressed, asynchronous StudentModule history storage
+"""
+import json
+
+from django.test import TestCase
+from mock import patch
+
+from courseware.history import get_history_entries, record_history, flush_history
+from courseware.models import StudentModuleHistory, CompressedStudentModuleHistory
+from courseware.tests.factories import StudentModuleFactory
+
+
+@patch.dict("django.conf.settings.FEATURES", {"ENABLE_COMPRESSED_STUDENT_MODULE_HISTORY": True})
+class CompressedHistoryTest(TestCase):
+    """
+    Tests of courseware.history
+    """
+    def setUp(self):
+        self.state = json.dumps({'attempts': 1, 'student_answers': {'q1': u'élève'}})
+
+    def test_compress_roundtrip(self):
+        compressed = CompressedStudentModuleHistory.compress(self.state)
+        self.assertEqual(CompressedStudentModuleHistory.decompress(compressed), self.state)
+        self.assertIsNone(CompressedStudentModuleHistory.compress(None))
+
+    def test_written_outside_of_request(self):
+        # Outside of a request, history is written right away
+        student_module = StudentModuleFactory(state=self.state, grade=1, max_grade=2)
+        self.assertFalse(StudentModuleHistory.objects.exists())
+
+        entries = get_history_entries(student_module)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].state, self.state)
+        self.assertEqual((entries[0].grade, entries[0].max_grade), (1, 2))
+
+    @patch('courseware.history.crum.get_current_request')
+    @patch('courseware.tasks.write_student_module_history.delay')
+    def test_batched_in_request(self, mock_delay, mock_get_current_request):
+        mock_get_current_request.return_value = object()
+        student_module = StudentModuleFactory(state=self.state)
+        student_module.save()
+        self.assertFalse(mock_delay.called)
+
+        flush_history()
+        self.assertEqual(mock_delay.call_count, 1)
+        records = mock_delay.call_args[0][0]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['student_module_id'], student_module.id)
+
+    def test_reads_both_storages(self):
+        student_module = StudentModuleFactory(state=self.state)
+        StudentModuleHistory.objects.create(
+            student_module=student_module,
+            created=student_module.created,
+            state=json.dumps({}),
+        )
+        record_history(student_module)
+
+        entries = get_history_entries(student_module)
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(
+            sorted(entry.state for entry in entries),
+            sorted([json.dumps({}), self.state, self.state])
+        )
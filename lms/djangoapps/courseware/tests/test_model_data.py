@@ -7,7 +7,7 @@ from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
 from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule, XModuleUserStateSummaryField
+from courseware.models import StudentModule, XModuleUserStateSummaryField, XModuleUserStateSummaryCounter
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -17,8 +17,9 @@ from courseware.tests.factories import StudentPrefsFactory, StudentInfoFactory
 
 from xblock.fields import Scope, BlockScope
 from xmodule.modulestore import Location
+from django.contrib.auth.models import AnonymousUser
 from django.test import TestCase
-from django.db import DatabaseError
+from django.db import DatabaseError, IntegrityError
 from xblock.core import KeyValueMultiSaveError
 
 
@@ -152,6 +153,89 @@ class TestStudentModuleStorage(TestCase):
                 self.kvs.set_many(kv_dict)
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
+    def test_buffered_writes(self):
+        "Test that buffered writes to Scope.user_state are coalesced into one save"
+        with patch('courseware.models.StudentModule.save') as mock_save:
+            with self.field_data_cache.buffered_writes():
+                self.kvs.set(user_state_key('a_field'), 'new_value')
+                self.kvs.set_many(self.construct_kv_dict())
+                self.kvs.delete(user_state_key('b_field'))
+                self.assertFalse(mock_save.called)
+            self.assertEquals(mock_save.call_count, 1)
+
+    def test_buffered_writes_flushed(self):
+        "Test that buffered writes to Scope.user_state reach the database"
+        with self.field_data_cache.buffered_writes():
+            self.kvs.set(user_state_key('a_field'), 'new_value')
+            self.kvs.set(user_state_key('not_a_field'), 'new_value')
+            self.assertEquals({'b_field': 'b_value', 'a_field': 'a_value'}, json.loads(StudentModule.objects.all()[0].state))
+        self.assertEquals(
+            {'b_field': 'b_value', 'a_field': 'new_value', 'not_a_field': 'new_value'},
+            json.loads(StudentModule.objects.all()[0].state)
+        )
+
+    def test_buffered_writes_failure(self):
+        "Test failures when flushing buffered writes"
+        with patch('django.db.models.Model.save', side_effect=DatabaseError):
+            with self.assertRaises(KeyValueMultiSaveError) as exception_context:
+                with self.field_data_cache.buffered_writes():
+                    self.kvs.set_many(self.construct_kv_dict())
+        self.assertEquals(len(exception_context.exception.saved_field_names), 0)
+
+
+class TestLazyScopeLoading(TestCase):
+    "Test that FieldDataCache only queries the scopes and blocks that are used"
+
+    def setUp(self):
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.assertEqual(self.user.id, 1)   # check our assumption hard-coded in the key functions above.
+        self.fields = [
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.user_state_summary, 'summary_field'),
+            mock_field(Scope.preferences, 'prefs_field'),
+        ]
+
+    def test_scopes_loaded_on_first_access(self):
+        "Test that nothing is queried until a scope is used, and then only once"
+        with self.assertNumQueries(0):
+            field_data_cache = FieldDataCache([mock_descriptor(self.fields)], course_id, self.user)
+        kvs = DjangoKeyValueStore(field_data_cache)
+
+        with self.assertNumQueries(1):
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+        with self.assertNumQueries(0):
+            self.assertTrue(kvs.has(user_state_key('a_field')))
+
+    def test_add_descriptors_to_cache(self):
+        "Test that adding descriptors only queries the new ones in scopes already loaded"
+        field_data_cache = FieldDataCache([mock_descriptor(self.fields)], course_id, self.user)
+        kvs = DjangoKeyValueStore(field_data_cache)
+        kvs.get(user_state_key('a_field'))
+
+        other_descriptor = mock_descriptor(self.fields)
+        other_descriptor.location = location('other_id')
+        StudentModuleFactory(
+            student=self.user,
+            module_state_key=other_descriptor.location.url(),
+            state=json.dumps({'a_field': 'other_value'}),
+        )
+
+        with self.assertNumQueries(1):
+            field_data_cache.add_descriptors_to_cache([mock_descriptor(self.fields), other_descriptor])
+        with self.assertNumQueries(0):
+            field_data_cache.add_descriptors_to_cache([other_descriptor])
+            self.assertEquals(
+                'other_value',
+                kvs.get(DjangoKeyValueStore.Key(Scope.user_state, 1, other_descriptor.location, 'a_field'))
+            )
+
+    def test_anonymous_user(self):
+        "Test that no queries are made for anonymous users"
+        field_data_cache = FieldDataCache([mock_descriptor(self.fields)], course_id, AnonymousUser())
+        with self.assertNumQueries(0):
+            self.assertIsNone(field_data_cache.find(user_state_key('a_field')))
+
 
 class TestMissingStudentModule(TestCase):
     def setUp(self):
@@ -309,3 +393,80 @@ class TestStudentInfoStorage(StorageTestBase, TestCase):
     scope = Scope.user_info
     key_factory = user_info_key
     storage_class = XModuleStudentInfoField
+
+
+class TestSummaryCounterStorage(TestCase):
+    "Test that tallies in counter fields are stored as atomically incremented rows"
+
+    def setUp(self):
+        self.location = Location('i4x', 'edX', 'test_course', 'poll_question', 'def_id')
+        self.key = DjangoKeyValueStore.Key(Scope.user_state_summary, None, self.location, 'poll_answers')
+        self.user = UserFactory.create(username='user')
+
+    def kvs(self):
+        "Return a new DjangoKeyValueStore, as used by a separate request"
+        descriptor = mock_descriptor([mock_field(Scope.user_state_summary, 'poll_answers')])
+        descriptor.location = self.location
+        return DjangoKeyValueStore(FieldDataCache([descriptor], course_id, self.user))
+
+    def test_concurrent_updates(self):
+        "Test that updates based on the same tallies are all counted"
+        first_kvs = self.kvs()
+        second_kvs = self.kvs()
+        self.assertFalse(first_kvs.has(self.key))
+        self.assertFalse(second_kvs.has(self.key))
+
+        first_kvs.set(self.key, {'yes': 1, 'no': 0})
+        second_kvs.set(self.key, {'yes': 1, 'no': 0})
+        self.assertEquals({'yes': 2, 'no': 0}, self.kvs().get(self.key))
+
+        first_kvs.set(self.key, {'yes': 0, 'no': 1})
+        self.assertEquals({'yes': 1, 'no': 1}, self.kvs().get(self.key))
+        self.assertEquals(0, XModuleUserStateSummaryField.objects.count())
+
+    def test_import_existing_value(self):
+        "Test that tallies stored before the field was a counter field are kept"
+        UserStateSummaryFactory.create(
+            field_name='poll_answers',
+            usage_id=self.location.url(),
+            value=json.dumps({'yes': 3}),
+        )
+        kvs = self.kvs()
+        self.assertEquals({'yes': 3}, kvs.get(self.key))
+        kvs.set(self.key, {'yes': 4})
+        self.assertEquals({'yes': 4}, self.kvs().get(self.key))
+        self.assertEquals(1, XModuleUserStateSummaryCounter.objects.count())
+
+    @patch('courseware.model_data.transaction.savepoint_rollback', Mock())
+    def test_concurrent_insert(self):
+        "Test that an entry first counted by another learner while we insert it is still counted"
+        kvs = self.kvs()
+        self.assertFalse(kvs.has(self.key))
+
+        def insert_first(key, counter_key, count):  # pylint: disable=unused-argument
+            "Insert the row as another learner would, and fail as the unique constraint would"
+            XModuleUserStateSummaryCounter.objects.create(
+                usage_id=self.location.url(), field_name='poll_answers', key=counter_key, count=1,
+            )
+            raise IntegrityError()
+
+        with patch.object(kvs, '_create_counter', Mock(side_effect=insert_first)):
+            kvs.set(self.key, {'yes': 1})
+        self.assertEquals({'yes': 2}, self.kvs().get(self.key))
+
+    def test_long_keys_not_counted(self):
+        "Test that entries too long to store aren't shortened, which could merge distinct entries"
+        long_key = 'a' * 300
+        kvs = self.kvs()
+        kvs.set(self.key, {'yes': 1, long_key: 1, long_key + 'b': 1})
+        self.assertEquals({'yes': 1}, self.kvs().get(self.key))
+        self.assertEquals(1, XModuleUserStateSummaryCounter.objects.count())
+
+    def test_delete(self):
+        "Test that deleting a counter field removes all of its tallies"
+        kvs = self.kvs()
+        self.assertRaises(KeyError, kvs.delete, self.key)
+        kvs.set(self.key, {'yes': 1, 'no': 2})
+        kvs.delete(self.key)
+        self.assertFalse(self.kvs().has(self.key))
+        self.assertEquals(0, XModuleUserStateSummaryCounter.objects.count())
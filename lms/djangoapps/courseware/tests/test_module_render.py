@@ -8,6 +8,7 @@ import json
 from django.http import Http404, HttpResponse
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from django.core.cache import get_cache
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
@@ -367,6 +368,15 @@ class TestTOC(TestCase):
         for toc_section in expected:
             self.assertIn(toc_section, actual)
 
+    @patch('courseware.module_render.general_cache', get_cache('django.core.cache.backends.locmem.LocMemCache'))
+    def test_toc_structure_cached(self):
+        expected = render.toc_for_course(self.portal_user, None, self.toy_course, 'Overview', 'Welcome', None)
+
+        # The structure now comes from the cache, rather than the course
+        with patch.object(self.toy_course, 'get_display_items', side_effect=AssertionError):
+            actual = render.toc_for_course(self.portal_user, None, self.toy_course, 'Overview', 'Welcome', None)
+        self.assertEqual(expected, actual)
+
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
 class TestHtmlModifiers(ModuleStoreTestCase):
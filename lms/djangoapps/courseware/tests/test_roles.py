@@ -2,13 +2,16 @@
 Tests of courseware.roles
 """
 
+from django.contrib.auth.models import Group, User
+from django.core.cache import get_cache
 from django.test import TestCase
+from mock import patch
 
 from xmodule.modulestore import Location
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
 from student.tests.factories import AnonymousUserFactory
 
-from courseware.roles import GlobalStaff, CourseRole
+from courseware.roles import GlobalStaff, CourseRole, CourseStaffRole
 
 
 class RolesTestCase(TestCase):
@@ -45,3 +48,47 @@ class RolesTestCase(TestCase):
         self.assertTrue(CourseRole("role", lowercase_loc).has_user(uppercase_user))
         self.assertTrue(CourseRole("role", uppercase_loc).has_user(uppercase_user))
 
+
+
+@patch('student.models.cache', get_cache('django.core.cache.backends.locmem.LocMemCache'))
+class RoleCacheTestCase(TestCase):
+    """
+    Tests of the cross-request cache of users' groups
+    """
+
+    def setUp(self):
+        self.course = Location('i4x://edX/toy/course/2012_Fall')
+        self.user = UserFactory()
+
+    def fresh_user(self):
+        """
+        Return a new copy of `self.user`, as a new request would see it
+        """
+        return User.objects.get(id=self.user.id)
+
+    def test_cached_across_requests(self):
+        self.assertFalse(CourseStaffRole(self.course).has_user(self.fresh_user()))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertFalse(CourseStaffRole(self.course).has_user(user))
+
+    def test_add_and_remove_users_invalidate(self):
+        role = CourseStaffRole(self.course)
+        self.assertFalse(role.has_user(self.fresh_user()))
+
+        role.add_users(self.fresh_user())
+        self.assertTrue(role.has_user(self.fresh_user()))
+
+        role.remove_users(self.fresh_user())
+        self.assertFalse(role.has_user(self.fresh_user()))
+
+    def test_direct_group_changes_invalidate(self):
+        role = CourseStaffRole(self.course)
+        group, _ = Group.objects.get_or_create(name='staff_edX/toy/2012_Fall')
+        self.assertFalse(role.has_user(self.fresh_user()))
+
+        self.fresh_user().groups.add(group)
+        self.assertTrue(role.has_user(self.fresh_user()))
+
+        group.user_set.clear()
+        self.assertFalse(role.has_user(self.fresh_user()))
@@ -7,18 +7,23 @@ import json
 import os
 from textwrap import dedent
 
-from mock import patch
+from mock import patch, Mock
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db.models.query import QuerySet
 from django.test.client import RequestFactory
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
 
 # Need access to internal func to put users in the right group
 from courseware import grades
+from courseware.answer_distribution import (
+    apply_answer_counts, backfill_answer_counts, flush_answer_counts, update_answer_counts
+)
+from courseware.middleware import AnswerCountsMiddleware
 from courseware.model_data import FieldDataCache
-from courseware.models import StudentModule
+from courseware.models import AnswerDistributionCount, StudentModule
 
 from xmodule.modulestore.django import modulestore, editable_modulestore
 
@@ -1009,3 +1014,91 @@ class TestAnswerDistributions(TestSubmittingProblems):
                     },
                 }
             )
+
+
+class TestMaintainedAnswerDistributions(TestAnswerDistributions):
+    """
+    Check that answer distributions kept up to date as problems are
+    submitted match those counted from the submitted problems.
+    """
+
+    def setUp(self):
+        super(TestMaintainedAnswerDistributions, self).setUp()
+        backfill_answer_counts(self.course.id)
+
+    def test_backfill(self):
+        # Answers submitted before the course was backfilled are counted by it
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        AnswerDistributionCount.objects.all().delete()
+        self.assertFalse(grades.answer_distributions(self.course.id))
+
+        self.assertEqual(backfill_answer_counts(self.course.id), 1)
+        self.assertEqual(
+            grades.answer_distributions(self.course.id),
+            {
+                ('p1', 'p1', 'i4x-MITx-100-problem-p1_2_1'): {
+                    'Correct': 1
+                },
+            }
+        )
+
+    def test_resubmission(self):
+        # A student's previous answer stops being counted once they submit another
+        self.submit_question_answer('p1', {'2_1': u'Incorrect'})
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+
+        self.assertEqual(
+            grades.answer_distributions(self.course.id),
+            {
+                ('p1', 'p1', 'i4x-MITx-100-problem-p1_2_1'): {
+                    'Correct': 1
+                },
+            }
+        )
+
+    def test_deleted_state(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+
+        StudentModule.objects.get(
+            course_id=self.course.id,
+            student_id=self.student_user.id,
+            module_state_key=self.problem_location('p1'),
+        ).delete()
+
+        self.assertEqual(
+            grades.answer_distributions(self.course.id),
+            {
+                ('p2', 'p2', 'i4x-MITx-100-problem-p2_2_1'): {
+                    'Incorrect': 1
+                },
+            }
+        )
+
+    @patch('courseware.answer_distribution.crum.get_current_request', Mock(return_value=object()))
+    def test_rolled_back_request(self):
+        # The changes queued by a request whose transaction is rolled back are dropped
+        state = json.dumps({'student_answers': {'i4x-MITx-100-problem-p1_2_1': u'Correct'}})
+        update_answer_counts(None, None, (self.course.id, self.problem_location('p1'), state))
+        AnswerCountsMiddleware().process_exception(None, Exception())
+        flush_answer_counts()
+        self.assertFalse(AnswerDistributionCount.objects.exists())
+
+    def test_answer_counted_concurrently(self):
+        # Another process counts the same new answer between our update and insert
+        apply_answer_counts([(self.course.id, 'i4x://MITx/100/problem/p1', 'p1_2_1', u'Correct', 1)])
+        real_update = QuerySet.update
+        updates = []
+
+        def update_missing_row(queryset, **kwargs):
+            """Update nothing the first time, as if the row wasn't inserted yet"""
+            updates.append(kwargs)
+            if len(updates) == 1:
+                return 0
+            return real_update(queryset, **kwargs)
+
+        with patch.object(QuerySet, 'update', update_missing_row):
+            apply_answer_counts([(self.course.id, 'i4x://MITx/100/problem/p1', 'p1_2_1', u'Correct', 2)])
+
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(AnswerDistributionCount.objects.get(part_id='p1_2_1').count, 3)
@@ -25,7 +25,8 @@ import courseware.tabs as tabs
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache
 from .module_render import toc_for_course, get_module_for_descriptor, get_module
-from courseware.models import StudentModule, StudentModuleHistory
+from courseware.history import get_history_entries, flush_history
+from courseware.models import StudentModule
 from course_modes.models import CourseMode
 
 from student.models import UserTestGroup, CourseEnrollment
@@ -306,14 +307,14 @@ def index(request, course_id, chapter=None, section=None,
             section_descriptor = modulestore().get_instance(course.id, section_descriptor.location, depth=None)
 
             # Load all descendants of the section, because we're going to display its
-            # html, which in general will need all of its children
-            section_field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-                course_id, user, section_descriptor, depth=None)
+            # html, which in general will need all of its children. Only the blocks
+            # that aren't already in the course cache are queried for.
+            field_data_cache.add_descriptor_descendents(section_descriptor, depth=None)
 
             section_module = get_module_for_descriptor(request.user,
                 request,
                 section_descriptor,
-                section_field_data_cache,
+                field_data_cache,
                 course_id,
                 position
             )
@@ -682,16 +683,14 @@ def submission_history(request, course_id, student_username, location):
     except StudentModule.DoesNotExist:
         return HttpResponse(escape("{0} has never accessed problem {1}".format(student_username, location)))
 
-    history_entries = StudentModuleHistory.objects.filter(
-        student_module=student_module
-    ).order_by('-id')
+    history_entries = get_history_entries(student_module)
 
     # If no history records exist, let's force a save to get history started.
     if not history_entries:
         student_module.save()
-        history_entries = StudentModuleHistory.objects.filter(
-            student_module=student_module
-        ).order_by('-id')
+        # Make sure the history record is written before reading it back
+        flush_history(asynchronous=False)
+        history_entries = get_history_entries(student_module)
 
     context = {
         'history_entries': history_entries,
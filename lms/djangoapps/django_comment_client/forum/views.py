@@ -240,9 +240,12 @@ def single_thread(request, course_id, discussion_id, thread_id):
 
     course = get_course_with_access(request.user, course_id, 'load_forum')
     cc_user = cc.User.from_django_user(request.user)
-    user_info = cc_user.to_dict()
 
-    thread = cc.Thread.find(thread_id).retrieve(recursive=True, user_id=request.user.id)
+    # The user and the thread are independent requests to the comments service
+    user_info, thread = cc.utils.perform_concurrently(
+        cc_user.to_dict,
+        lambda: cc.Thread.find(thread_id).retrieve(recursive=True, user_id=request.user.id),
+    )
 
     if request.is_ajax():
         with newrelic.agent.FunctionTrace(nr_transaction, "get_annotated_content_infos"):
@@ -332,6 +335,7 @@ def user_profile(request, course_id, user_id):
     #TODO: Allow sorting?
     course = get_course_with_access(request.user, course_id, 'load_forum')
     try:
+        django_user = User.objects.get(id=user_id)
         profiled_user = cc.User(id=user_id, course_id=course_id)
 
         query_params = {
@@ -339,10 +343,20 @@ def user_profile(request, course_id, user_id):
             'per_page': THREADS_PER_PAGE,   # more than threads_per_page to show more activities
         }
 
-        threads, page, num_pages = profiled_user.active_threads(query_params)
+        # Fetch the profiled user's threads, the current user's info and (for
+        # full page renders) the profiled user's info from the comments
+        # service concurrently
+        calls = [
+            lambda: profiled_user.active_threads(query_params),
+            cc.User.from_django_user(request.user).to_dict,
+        ]
+        if not request.is_ajax():
+            calls.append(profiled_user.retrieve)
+        results = cc.utils.perform_concurrently(*calls)
+        threads, page, num_pages = results[0]
+        user_info = results[1]
         query_params['page'] = page
         query_params['num_pages'] = num_pages
-        user_info = cc.User.from_django_user(request.user).to_dict()
 
         with newrelic.agent.FunctionTrace(nr_transaction, "get_metadata_for_threads"):
             annotated_content_info = utils.get_metadata_for_threads(course_id, threads, request.user, user_info)
@@ -358,7 +372,7 @@ def user_profile(request, course_id, user_id):
             context = {
                 'course': course,
                 'user': request.user,
-                'django_user': User.objects.get(id=user_id),
+                'django_user': django_user,
                 'profiled_user': profiled_user.to_dict(),
                 'threads': saxutils.escape(json.dumps(threads), escapedict),
                 'user_info': saxutils.escape(json.dumps(user_info), escapedict),
@@ -377,6 +391,7 @@ def followed_threads(request, course_id, user_id):
 
     course = get_course_with_access(request.user, course_id, 'load_forum')
     try:
+        django_user = User.objects.get(id=user_id)
         profiled_user = cc.User(id=user_id, course_id=course_id)
 
         query_params = {
@@ -386,10 +401,17 @@ def followed_threads(request, course_id, user_id):
             'sort_order': request.GET.get('sort_order', 'desc'),
         }
 
-        threads, page, num_pages = profiled_user.subscribed_threads(query_params)
+        calls = [
+            lambda: profiled_user.subscribed_threads(query_params),
+            cc.User.from_django_user(request.user).to_dict,
+        ]
+        if not request.is_ajax():
+            calls.append(profiled_user.retrieve)
+        results = cc.utils.perform_concurrently(*calls)
+        threads, page, num_pages = results[0]
+        user_info = results[1]
         query_params['page'] = page
         query_params['num_pages'] = num_pages
-        user_info = cc.User.from_django_user(request.user).to_dict()
 
         with newrelic.agent.FunctionTrace(nr_transaction, "get_metadata_for_threads"):
             annotated_content_info = utils.get_metadata_for_threads(course_id, threads, request.user, user_info)
@@ -405,7 +427,7 @@ def followed_threads(request, course_id, user_id):
             context = {
                 'course': course,
                 'user': request.user,
-                'django_user': User.objects.get(id=user_id),
+                'django_user': django_user,
                 'profiled_user': profiled_user.to_dict(),
                 'threads': saxutils.escape(json.dumps(threads), escapedict),
                 'user_info': saxutils.escape(json.dumps(user_info), escapedict),
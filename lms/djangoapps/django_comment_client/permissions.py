@@ -5,22 +5,70 @@ Module for checking permissions with the comment_client backend
 import logging
 from django.core import cache
 
+from request_cache.middleware import RequestCache
+from xmodule.modulestore.django import modulestore
+from xmodule.course_module import CourseDescriptor
+from django_comment_common.models import FORUM_ROLE_STUDENT
+
 
 CACHE = cache.get_cache('default')
 CACHE_LIFESPAN = 60
 
+# Permissions that the Student role loses when a course disallows forum posts
+POSTING_PERMISSION_PREFIXES = ('edit', 'update', 'create')
+
 
 def cached_has_permission(user, permission, course_id=None):
     """
-    Call has_permission if it's not cached. A change in a user's role or
-    a role's permissions will only become effective after CACHE_LIFESPAN seconds.
+    Check `permission` against the user's full permission set for the course
+    (see get_user_permissions). A change in a user's role or a role's
+    permissions will only become effective after CACHE_LIFESPAN seconds.
+    """
+    return permission in get_user_permissions(user, course_id)
+
+
+def get_user_permissions(user, course_id=None):
+    """
+    Returns the frozenset of forum permission names `user` has in `course_id`.
+
+    The set is resolved with a single roles query, stored in CACHE for
+    CACHE_LIFESPAN seconds and memoized in the request cache, so checking any
+    number of permissions during one request costs at most one cache lookup.
+    """
+    key = "permissions_%d_%s" % (user.id, str(course_id))
+    request_cache = RequestCache.get_request_cache().data.setdefault('forum_permissions', {})
+    if key in request_cache:
+        return request_cache[key]
+
+    permissions = CACHE.get(key, None)
+    if permissions is None:
+        permissions = _get_user_permissions(user, course_id)
+        CACHE.set(key, permissions, CACHE_LIFESPAN)
+    request_cache[key] = permissions
+    return permissions
+
+
+def _get_user_permissions(user, course_id):
+    """
+    Computes the permission set for get_user_permissions, applying the same
+    forum_posts_allowed restriction as Role.has_permission.
     """
-    key = "permission_%d_%s_%s" % (user.id, str(course_id), permission)
-    val = CACHE.get(key, None)
-    if val not in [True, False]:
-        val = has_permission(user, permission, course_id=course_id)
-        CACHE.set(key, val, CACHE_LIFESPAN)
-    return val
+    permissions = set()
+    restricted = set()
+    for role_name, permission in user.roles.filter(course_id=course_id).values_list('name', 'permissions__name'):
+        if permission is None:
+            continue
+        if role_name == FORUM_ROLE_STUDENT and permission.startswith(POSTING_PERMISSION_PREFIXES):
+            restricted.add(permission)
+        else:
+            permissions.add(permission)
+
+    restricted -= permissions
+    if restricted:
+        course = modulestore().get_instance(course_id, CourseDescriptor.id_to_location(course_id))
+        if course.forum_posts_allowed:
+            permissions |= restricted
+    return frozenset(permissions)
 
 
 def has_permission(user, permission, course_id=None):
@@ -5,7 +5,8 @@ from django.contrib.auth.models import User
 from django.test import TestCase
 
 from student.models import CourseEnrollment
-from django_comment_client.permissions import has_permission
+from django_comment_client.permissions import has_permission, get_user_permissions, CACHE
+from request_cache.middleware import RequestCache
 from django_comment_common.models import Role
 
 
@@ -48,3 +49,17 @@ class PermissionsTestCase(TestCase):
 
         self.student_role.add_permission(name)
         self.assertTrue(has_permission(self.student, name, self.course_id))
+
+    def testUserPermissions(self):
+        RequestCache().clear_request_cache()
+        CACHE.clear()
+        names = [self.random_str() for __ in range(3)]
+        for name in names:
+            self.moderator_role.add_permission(name)
+
+        with self.assertNumQueries(1):
+            permissions = get_user_permissions(self.moderator, self.course_id)
+            for name in names:
+                self.assertIn(name, get_user_permissions(self.moderator, self.course_id))
+        self.assertTrue(set(names).issubset(permissions))
+        self.assertFalse(set(names) & get_user_permissions(self.student, self.course_id))
@@ -1,7 +1,9 @@
 from datetime import datetime
+from django.core.cache import get_cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.utils import override_settings
+from mock import patch
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from django_comment_common.models import Role, Permission
 from django_comment_client.tests.factories import RoleFactory
@@ -68,6 +70,25 @@ class AccessUtilsTestCase(TestCase):
         ret = utils.has_forum_access('student', self.course_id, 'NotARole')
         self.assertFalse(ret)
 
+    def test_get_author_roles(self):
+        content_list = [
+            {'user_id': str(user.id), 'course_id': self.course_id}
+            for user in (self.student1, self.moderator, self.community_ta1, self.community_ta2)
+        ]
+        content_list.append({'user_id': '12345', 'course_id': self.course_id})
+        content_list.append({'user_id': None, 'course_id': self.course_id})
+        with self.assertNumQueries(2):
+            author_roles = utils._get_author_roles(content_list)  # pylint: disable=protected-access
+        self.assertEqual(
+            author_roles,
+            {
+                (self.student1.id, self.course_id): {'name': 'student'},
+                (self.moderator.id, self.course_id): {'name': 'moderator'},
+                (self.community_ta1.id, self.course_id): {'name': 'community ta'},
+                (self.community_ta2.id, self.course_id): {'name': 'community ta'},
+            }
+        )
+
 
 @override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
 class CoursewareContextTestCase(ModuleStoreTestCase):
@@ -320,6 +341,21 @@ class CategoryMapTestCase(ModuleStoreTestCase):
             }
         )
 
+    def test_cached_map_invalidated_on_update(self):
+        with patch('django_comment_client.utils.cache', get_cache('django.core.cache.backends.locmem.LocMemCache')):
+            self.create_discussion("Chapter", "Discussion 1")
+            first_map = utils.get_discussion_category_map(self.course)
+            with patch('django_comment_client.utils._get_discussion_modules') as mock_get_modules:
+                self.assertEqual(utils.get_discussion_category_map(self.course), first_map)
+                self.assertFalse(mock_get_modules.called)
+
+            # Updating the course content must drop the cached map
+            self.create_discussion("Chapter", "Discussion 2")
+            self.assertItemsEqual(
+                utils.get_discussion_category_map(self.course)["subcategories"]["Chapter"]["children"],
+                ["Discussion 1", "Discussion 2"]
+            )
+
     def test_sort_inline_explicit(self):
         self.create_discussion("Chapter", "Discussion 1", sort_key="D")
         self.create_discussion("Chapter", "Discussion 2", sort_key="A")
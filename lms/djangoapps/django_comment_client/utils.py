@@ -15,9 +15,10 @@ from django_comment_client.permissions import check_permissions_by_view
 import edxmako
 import pystache_custom as pystache
 
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import modulestore, course_content_version
 from xmodule.modulestore import Location
 from django.utils.timezone import UTC
+from util.cache import cache
 
 log = logging.getLogger(__name__)
 
@@ -72,6 +73,19 @@ def _get_discussion_modules(course):
 
 
 def _get_discussion_id_map(course):
+    """
+    Returns a map of discussion_id to the location and title of the discussion
+    module, cached per course content version.
+    """
+    cache_key = u"discussion_id_map.{}.{}".format(course.id, course_content_version(course.location))
+    id_map = cache.get(cache_key)
+    if id_map is None:
+        id_map = _build_discussion_id_map(course)
+        cache.set(cache_key, id_map)
+    return id_map
+
+
+def _build_discussion_id_map(course):
     def get_entry(module):
         discussion_id = module.discussion_id
         title = module.discussion_target
@@ -132,7 +146,27 @@ def _sort_map_entries(category_map, sort_alpha):
 
 
 def get_discussion_category_map(course):
-    course_id = course.id
+    """
+    Returns the discussion category map for `course`, with the categories and
+    entries that have not started yet filtered out.
+
+    The (expensive) unfiltered map is cached per course content version, so
+    only the start date filtering is done on each call.
+    """
+    cache_key = u"discussion_category_map.{}.{}".format(course.id, course_content_version(course.location))
+    category_map = cache.get(cache_key)
+    if category_map is None:
+        category_map = _get_unfiltered_discussion_category_map(course)
+        cache.set(cache_key, category_map)
+
+    return _filter_unstarted_categories(category_map)
+
+
+def _get_unfiltered_discussion_category_map(course):
+    """
+    Builds and sorts the complete discussion category map for `course`,
+    including the start date of every category and entry.
+    """
 
     unexpanded_category_map = defaultdict(list)
 
@@ -194,7 +228,7 @@ def get_discussion_category_map(course):
 
     _sort_map_entries(category_map, course.discussion_sort_alpha)
 
-    return _filter_unstarted_categories(category_map)
+    return category_map
 
 
 class JsonResponse(HttpResponse):
@@ -324,13 +358,49 @@ def permalink(content):
                        args=[content['course_id'], content['commentable_id'], content['thread_id']]) + '#' + content['id']
 
 
-def extend_content(content):
+def _get_author_roles(content_list):
+    """
+    Returns a map of (user id, course_id) to the roles dict of the author of
+    each content in `content_list`, resolving all authors in two queries.
+    Authors that are not in our DB are left out of the map.
+    """
+    user_ids = set(content['user_id'] for content in content_list if content.get('user_id'))
+    if not user_ids:
+        return {}
+    course_ids = set(content['course_id'] for content in content_list if content.get('user_id'))
+
+    existing_ids = set(User.objects.filter(pk__in=user_ids).values_list('id', flat=True))
+    author_roles = dict(
+        ((user_id, course_id), {})
+        for user_id in existing_ids for course_id in course_ids
+    )
+    role_memberships = Role.users.through.objects.filter(
+        user__in=existing_ids,
+        role__course_id__in=course_ids
+    ).order_by('role').values_list('user_id', 'role__course_id', 'role__name')
+    for user_id, course_id, role_name in role_memberships:
+        author_roles[(user_id, course_id)]['name'] = role_name.lower()
+    return author_roles
+
+
+def extend_content_list(content_list):
+    """
+    Bulk variant of extend_content: the authors of all the content in
+    `content_list` and their course roles are looked up at once.
+    """
+    author_roles = _get_author_roles(content_list)
+    return [extend_content(content, author_roles) for content in content_list]
+
+
+def extend_content(content, author_roles=None):
+    if author_roles is None:
+        author_roles = _get_author_roles([content])
+
     roles = {}
     if content.get('user_id'):
         try:
-            user = User.objects.get(pk=content['user_id'])
-            roles = dict(('name', role.name.lower()) for role in user.roles.filter(course_id=content['course_id']))
-        except User.DoesNotExist:
+            roles = dict(author_roles[(int(content['user_id']), content['course_id'])])
+        except KeyError:
             log.error('User ID {0} in comment content {1} but not in our DB.'.format(content.get('user_id'), content.get('id')))
 
     content_info = {
@@ -12,6 +12,7 @@ from json import JSONEncoder
 from courseware import grades, models
 from courseware.courses import get_course_by_id
 from django.contrib.auth.models import User
+from student.models import CourseEnrollment
 
 
 class MyEncoder(JSONEncoder):
@@ -36,8 +37,6 @@ def offline_grade_calculation(course_id):
         courseenrollment__is_active=1
     ).prefetch_related("groups").order_by('username')
 
-    enc = MyEncoder()
-
     class DummyRequest(object):
         META = {}
         def __init__(self):
@@ -56,10 +55,7 @@ def offline_grade_calculation(course_id):
         request.session = {}
 
         gradeset = grades.grade(student, request, course, keep_raw_scores=True)
-        gs = enc.encode(gradeset)
-        ocg, created = models.OfflineComputedGrade.objects.get_or_create(user=student, course_id=course_id)
-        ocg.gradeset = gs
-        ocg.save()
+        store_offline_grade(student, course_id, gradeset)
         print "%s done" % student  	# print statement used because this is run by a management command
 
     tend = time.time()
@@ -71,6 +67,60 @@ def offline_grade_calculation(course_id):
     print "All Done!"
 
 
+def store_offline_grade(student, course_id, gradeset):
+    '''
+    Save `gradeset`, as computed by grades.grade, as the offline computed grade of student in the course.
+    '''
+    ocg, created = models.OfflineComputedGrade.objects.get_or_create(user=student, course_id=course_id)
+    ocg.gradeset = MyEncoder().encode(gradeset)
+    ocg.percent = gradeset.get('percent')
+    ocg.save()
+
+
+def offline_gradesets(course_id, students):
+    '''
+    Returns a dict mapping the id of each of students who has an offline computed grade in the course
+    to that gradeset, using one query.
+    '''
+    ocgs = models.OfflineComputedGrade.objects.filter(course_id=course_id, user__in=students)
+    return dict((ocg.user_id, json.loads(ocg.gradeset)) for ocg in ocgs)
+
+
+def students_with_stale_offline_grades(course_id, students):
+    '''
+    Returns the ids of those of students (a User queryset) who have no offline computed grade in the course,
+    or whose courseware state has changed since it was computed.  The comparison is made by the database, in
+    one query, and only for those students.
+    '''
+    up_to_date = models.OfflineComputedGrade.objects.filter(course_id=course_id).extra(where=[
+        'NOT EXISTS (SELECT 1 FROM courseware_studentmodule '
+        'WHERE courseware_studentmodule.student_id = courseware_offlinecomputedgrade.user_id '
+        'AND courseware_studentmodule.course_id = courseware_offlinecomputedgrade.course_id '
+        'AND courseware_studentmodule.modified > courseware_offlinecomputedgrade.updated)'
+    ]).values_list('user', flat=True)
+    return set(students.exclude(id__in=up_to_date).values_list('id', flat=True))
+
+
+def students_awaiting_offline_grades(course_id, students, gradesets):
+    '''
+    Returns those of students (a list of Users) with no offline computed grade in gradesets, leaving out any that
+    the last offline grade calculation already tried, and failed, to grade.  A student is kept if there's been no
+    calculation yet, or if they enrolled or their courseware state changed after the last one was logged.
+    '''
+    ungraded = [student for student in students if student.id not in gradesets]
+    last_run = offline_grades_available(course_id)
+    if not ungraded or not last_run:
+        return ungraded
+
+    changed_since = set(CourseEnrollment.objects.filter(
+        course_id=course_id, user__in=ungraded, created__gt=last_run.created,
+    ).values_list('user', flat=True))
+    changed_since.update(models.StudentModule.objects.filter(
+        course_id=course_id, student__in=ungraded, modified__gt=last_run.created,
+    ).values_list('student', flat=True))
+    return [student for student in ungraded if student.id in changed_since]
+
+
 def offline_grades_available(course_id):
     '''
     Returns False if no offline grades available for specified course.
@@ -1,15 +1,23 @@
 """
 Tests of the instructor dashboard gradebook
 """
+from datetime import datetime, timedelta
+import json
+
+from mock import patch, Mock
+from pytz import UTC
 
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, CourseEnrollmentFactory, AdminFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from courseware.tests.tests import TEST_DATA_MIXED_MODULESTORE
 from capa.tests.response_xml_factory import StringResponseXMLFactory
+from courseware.models import OfflineComputedGrade, StudentModule
 from courseware.tests.factories import StudentModuleFactory
+from instructor.offline_gradecalc import students_with_stale_offline_grades
 from xmodule.modulestore import Location
 from xmodule.modulestore.django import modulestore
 
@@ -67,6 +75,8 @@ class TestGradebook(ModuleStoreTestCase):
                     module_state_key=Location(item.location).url()
                 )
 
+        # The first view of the gradebook grades the students in the background
+        self.client.get(reverse('gradebook', args=(self.course.id,)))
         self.response = self.client.get(reverse('gradebook', args=(self.course.id,)))
 
     def test_response_code(self):
@@ -151,3 +161,67 @@ class TestLetterCutoffPolicy(TestGradebook):
         # User 0 has 0 on the class [1]
         # One use at the top of the page [1]
         self.assertEquals(3, self.response.content.count('grade_None'))
+
+
+class TestGradebookSnapshots(TestGradebook):
+    """
+    Test that the gradebook is served from, and fills in, offline computed grades
+    """
+    def test_grades_stored(self):
+        self.assertEquals(
+            USER_COUNT,
+            OfflineComputedGrade.objects.filter(course_id=self.course.id).count()
+        )
+        enrolled_students = CourseEnrollment.users_enrolled_in(self.course.id)
+        self.assertEquals(set(), students_with_stale_offline_grades(self.course.id, enrolled_students))
+        for ocg in OfflineComputedGrade.objects.filter(course_id=self.course.id):
+            self.assertIn('raw_scores', json.loads(ocg.gradeset))
+
+    @patch('courseware.grades.grade', Mock(side_effect=AssertionError))
+    def test_served_from_offline_grades(self):
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)))
+        self.assertEquals(200, response.status_code)
+        for user in self.users:
+            self.assertIn(user.username, response.content)
+
+    def test_stale_grades(self):
+        StudentModule.objects.filter(student=self.users[0]).update(modified=datetime.now(UTC) + timedelta(days=1))
+        enrolled_students = CourseEnrollment.users_enrolled_in(self.course.id)
+        self.assertEquals(
+            set([self.users[0].id]),
+            students_with_stale_offline_grades(self.course.id, enrolled_students)
+        )
+
+    @patch('instructor.views.legacy.submit_compute_offline_grades')
+    @patch('courseware.grades.grade', Mock(side_effect=AssertionError))
+    def test_ungraded_students(self, mock_submit):
+        OfflineComputedGrade.objects.filter(user=self.users[0]).delete()
+        StudentModule.objects.filter(student=self.users[0]).update(modified=datetime.now(UTC) + timedelta(days=1))
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)))
+        self.assertEquals(200, response.status_code)
+        self.assertIn('Not computed yet', response.content)
+        self.assertTrue(mock_submit.call_args[1]['only_stale'])
+
+    @patch('instructor.views.legacy.submit_compute_offline_grades')
+    @patch('courseware.grades.grade', Mock(side_effect=AssertionError))
+    def test_failed_students_not_regraded(self, mock_submit):
+        # A student with no offline grade, and no changes since grades were last computed, failed to be graded
+        OfflineComputedGrade.objects.filter(user=self.users[0]).delete()
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)))
+        self.assertEquals(200, response.status_code)
+        self.assertIn('See the logs', response.content)
+        self.assertFalse(mock_submit.called)
+
+    @patch('instructor.views.legacy.GRADEBOOK_PAGE_SIZE', 5)
+    def test_pagination(self):
+        usernames = sorted(user.username for user in self.users)
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)), {'page': 2})
+        for username in usernames[5:10]:
+            self.assertIn(username, response.content)
+        for username in usernames[:5] + usernames[10:]:
+            self.assertNotIn('>{}<'.format(username), response.content)
+
+    @patch('instructor.views.legacy.submit_compute_offline_grades')
+    def test_refresh(self, mock_submit):
+        self.client.post(reverse('gradebook', args=(self.course.id,)), {'action': 'refresh'})
+        self.assertTrue(mock_submit.call_args[1]['only_stale'])
@@ -16,6 +16,7 @@ from StringIO import StringIO
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.http import HttpResponse
 from django_future.csrf import ensure_csrf_cookie
 from django.views.decorators.cache import cache_control
@@ -42,7 +43,9 @@ from django_comment_common.models import (
     Role, FORUM_ROLE_ADMINISTRATOR, FORUM_ROLE_MODERATOR, FORUM_ROLE_COMMUNITY_TA
 )
 from django_comment_client.utils import has_forum_access
-from instructor.offline_gradecalc import student_grades, offline_grades_available
+from instructor.offline_gradecalc import (
+    student_grades, offline_grades_available, offline_gradesets, students_awaiting_offline_grades
+)
 from instructor.views.tools import strip_if_string
 from instructor_task.api import (
     get_running_instructor_tasks,
@@ -50,8 +53,10 @@ from instructor_task.api import (
     submit_rescore_problem_for_all_students,
     submit_rescore_problem_for_student,
     submit_reset_problem_attempts_for_all_students,
-    submit_bulk_course_email
+    submit_bulk_course_email,
+    submit_compute_offline_grades
 )
+from instructor_task.api_helper import AlreadyRunningError
 from instructor_task.views import get_task_completion_info
 from edxmako.shortcuts import render_to_response, render_to_string
 from psychometrics import psychoanalyze
@@ -65,6 +70,9 @@ from lms.lib.xblock.runtime import handler_prefix
 
 log = logging.getLogger(__name__)
 
+# number of students shown on each page of the gradebook
+GRADEBOOK_PAGE_SIZE = 50
+
 # internal commands for managing forum roles:
 FORUM_ROLE_ADD = 'add'
 FORUM_ROLE_REMOVE = 'remove'
@@ -766,7 +774,7 @@ def instructor_dashboard(request, course_id):
 
     elif action == 'Generate Histogram and IRT Plot':
         problem = request.POST['Problem']
-        nmsg, plots = psychoanalyze.generate_plots_for_problem(problem)
+        nmsg, plots = psychoanalyze.generate_plots_for_problem(problem, course_id)
         msg += nmsg
         track.views.server_track(request, "psychometrics-histogram-generation", {"problem": unicode(problem)}, page="idashboard")
 
@@ -1204,33 +1212,82 @@ def get_student_grade_summary_data(request, course, course_id, get_grades=True,
 #-----------------------------------------------------------------------------
 
 
+@ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 def gradebook(request, course_id):
     """
     Show the gradebook for this course:
     - only displayed to course staff
-    - shows students who are enrolled.
+    - shows students who are enrolled, a page at a time, sorted by
+      username or (with ?sort=percent) by grade.
+
+    Grades are read from the offline computed grades, which a background
+    task brings up to date when the "refresh" action is posted. Students on
+    the page who have never been graded offline are shown as not graded
+    yet, and the background task is started to grade them.
     """
     course = get_course_with_access(request.user, course_id, 'staff', depth=None)
 
+    msg = ''
+    if request.method == 'POST' and request.POST.get('action') in ('refresh', 'recompute'):
+        try:
+            submit_compute_offline_grades(request, course_id, only_stale=request.POST['action'] == 'refresh')
+            msg = _u("Grades are being computed in the background. Reload this page to see them.")
+        except AlreadyRunningError:
+            msg = _u("Grades are already being computed in the background.")
+
     enrolled_students = User.objects.filter(
         courseenrollment__course_id=course_id,
         courseenrollment__is_active=1
-    ).order_by('username').select_related("profile")
+    ).select_related("profile")
+
+    sort = request.GET.get('sort', 'username')
+    if sort == 'percent':
+        enrolled_students = enrolled_students.extra(
+            select={'offline_percent': (
+                'SELECT percent FROM courseware_offlinecomputedgrade '
+                'WHERE courseware_offlinecomputedgrade.user_id = auth_user.id '
+                'AND courseware_offlinecomputedgrade.course_id = %s'
+            )},
+            select_params=(course_id,),
+        ).order_by('-offline_percent', 'username')
+    else:
+        sort = 'username'
+        enrolled_students = enrolled_students.order_by('username')
 
-    # TODO (vshnayder): implement pagination.
-    enrolled_students = enrolled_students[:1000]   # HACK!
+    paginator = Paginator(enrolled_students, GRADEBOOK_PAGE_SIZE)
+    try:
+        page = paginator.page(request.GET.get('page', 1))
+    except PageNotAnInteger:
+        page = paginator.page(1)
+    except EmptyPage:
+        page = paginator.page(paginator.num_pages)
+
+    students = list(page.object_list)
+    gradesets = offline_gradesets(course_id, students)
+    if not msg and students_awaiting_offline_grades(course_id, students, gradesets):
+        try:
+            submit_compute_offline_grades(request, course_id, only_stale=True)
+        except AlreadyRunningError:
+            pass
+        msg = _u("Some students haven't been graded yet. They are being graded in the background.")
+    elif not msg and len(gradesets) < len(students):
+        msg = _u("Some students couldn't be graded. See the logs for details.")
 
     student_info = [{'username': student.username,
                      'id': student.id,
                      'email': student.email,
-                     'grade_summary': student_grades(student, request, course),
+                     'grade_summary': gradesets.get(student.id),
                      'realname': student.profile.name,
                      }
-                    for student in enrolled_students]
+                    for student in students]
 
     return render_to_response('courseware/gradebook.html', {
         'students': student_info,
+        'page': page,
+        'sort': sort,
+        'msg': msg,
+        'offline_grade_log': offline_grades_available(course_id),
         'course': course,
         'course_id': course_id,
         # Checked above
@@ -17,7 +17,9 @@ from instructor_task.tasks import (rescore_problem,
                                    reset_problem_attempts,
                                    delete_problem_state,
                                    send_bulk_course_email,
-                                   calculate_grades_csv)
+                                   calculate_grades_csv,
+                                   compute_offline_grades,
+                                   calculate_answer_distribution_csv)
 
 from instructor_task.api_helper import (check_arguments_for_rescoring,
                                         encode_problem_and_student_input,
@@ -219,3 +221,34 @@ def submit_calculate_grades_csv(request, course_id):
     task_key = ""
 
     return submit_task(request, task_type, task_class, course_id, task_input, task_key)
+
+
+def submit_compute_offline_grades(request, course_id, only_stale=True):
+    """
+    Request that the offline grades of a course, which back the instructor
+    gradebook, be brought up to date.  If `only_stale` is False, every
+    enrolled student is regraded, as is needed after grading policy changes.
+
+    AlreadyRunningError is raised if the course's offline grades are already being updated.
+    """
+    task_type = 'compute_offline_grades'
+    task_class = compute_offline_grades
+    task_input = {'only_stale': only_stale}
+    task_key = ""
+
+    return submit_task(request, task_type, task_class, course_id, task_input, task_key)
+
+
+def submit_calculate_answer_distribution_csv(request, course_id):
+    """
+    Request that the answer distribution of a course be counted, and stored
+    as a CSV for download.
+
+    AlreadyRunningError is raised if the course's answer distribution is already being counted.
+    """
+    task_type = 'answer_distribution'
+    task_class = calculate_answer_distribution_csv
+    task_input = {}
+    task_key = ""
+
+    return submit_task(request, task_type, task_class, course_id, task_input, task_key)
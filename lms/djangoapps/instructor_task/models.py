@@ -189,6 +189,28 @@ class InstructorTask(models.Model):
         return json.dumps({'message': 'Task revoked before running'})
 
 
+class AnswerDistributionBatch(models.Model):
+    """
+    Stores the answers counted by one subtask of an answer distribution
+    InstructorTask, until the last of its subtasks merges them into a report.
+
+    `entry` is the InstructorTask the subtask belongs to.
+    `subtask_id` is the id of the subtask that counted them.
+    `counts` stores the counts as a JSON-serialized list of
+        [module_state_key, problem part id, answer, count] lists.
+    """
+    class Meta:
+        unique_together = (('entry', 'subtask_id'),)
+
+    entry = models.ForeignKey(InstructorTask, db_index=True)
+    subtask_id = models.CharField(max_length=255)
+    counts = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __unicode__(self):
+        return u"[AnswerDistributionBatch] {}: {}".format(self.entry_id, self.subtask_id)
+
+
 class GradesStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for grades
@@ -305,6 +305,43 @@ def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querys
     return progress
 
 
+def queue_subtasks_for_ranges(entry, action_name, create_subtask_fcn, item_ranges, total_num_items):
+    """
+    Generates and queues a subtask for each of a list of ranges of "items", such as ranges of
+    primary keys.
+
+    Unlike `queue_subtasks_for_query`, the items themselves aren't read here, so the subtasks
+    are the same however the items change while they are being queued.
+
+    Arguments:
+        `entry` : the InstructorTask object for which subtasks are being queued.
+        `action_name` : a past-tense verb that can be used for constructing readable status messages.
+        `create_subtask_fcn` : a function of two arguments that constructs the desired kind of subtask object.
+            Arguments are the range to be processed by this subtask, and a SubtaskStatus
+            object reflecting initial status (and containing the subtask's id).
+        `item_ranges` : the ranges to pass to subtasks, one per subtask.
+        `total_num_items` : the number of items in all the ranges, for reporting progress.
+
+    Returns:  the task progress as stored in the InstructorTask object.
+
+    """
+    task_id = entry.task_id
+    subtask_id_list = [str(uuid4()) for _ in item_ranges]
+
+    TASK_LOG.info("Task %s: updating InstructorTask %s with subtask info for %s subtasks to process %s items.",
+             task_id, entry.id, len(subtask_id_list), total_num_items)  # pylint: disable=E1101
+    progress = initialize_subtask_info(entry, action_name, total_num_items, subtask_id_list)
+
+    TASK_LOG.info("Task %s: creating %s subtasks to process %s items.",
+             task_id, len(subtask_id_list), total_num_items)
+    for subtask_id, item_range in zip(subtask_id_list, item_ranges):
+        subtask_status = SubtaskStatus.create(subtask_id)
+        new_subtask = create_subtask_fcn(item_range, subtask_status)
+        new_subtask.apply_async()
+
+    return progress
+
+
 def _acquire_subtask_lock(task_id):
     """
     Mark the specified task_id as being in progress.
@@ -425,9 +462,12 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
     The subtask lock acquired in the call to check_subtask_is_valid() is released here, only when
     the attempting of retries has concluded.
+
+    Returns True if this update completed the last of the parent task's subtasks, so that
+    work that depends on all of them (such as merging their results) can be done exactly once.
     """
     try:
-        _update_subtask_status(entry_id, current_task_id, new_subtask_status)
+        return _update_subtask_status(entry_id, current_task_id, new_subtask_status)
     except DatabaseError:
         # If we fail, try again recursively.
         retry_count += 1
@@ -435,7 +475,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
             TASK_LOG.info("Retrying to update status for subtask %s of instructor task %d with status %s:  retry %d",
                           current_task_id, entry_id, new_subtask_status, retry_count)
             dog_stats_api.increment('instructor_task.subtask.retry_after_failed_update')
-            update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
+            return update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
         else:
             TASK_LOG.info("Failed to update status after %d retries for subtask %s of instructor task %d with status %s",
                           retry_count, current_task_id, entry_id, new_subtask_status)
@@ -475,6 +515,8 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
     is the value of the SubtaskStatus.to_dict(), but could be expanded in future to store information
     about failure messages, progress made, etc.
+
+    Returns True if this was the update that marked the InstructorTask as done.
     """
     TASK_LOG.info("Preparing to update status for subtask %s for instructor task %d with status %s",
                   current_task_id, entry_id, new_subtask_status)
@@ -525,6 +567,7 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         # At present, we mark the task as having succeeded.  In future, we should see
         # if there was a catastrophic failure that occurred, and figure out how to
         # report that here.
+        completed_task = num_remaining <= 0 and entry.task_state != SUCCESS
         if num_remaining <= 0:
             entry.task_state = SUCCESS
         entry.subtasks = json.dumps(subtask_dict)
@@ -542,3 +585,4 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     else:
         TASK_LOG.debug("about to commit....")
         transaction.commit()
+        return completed_task
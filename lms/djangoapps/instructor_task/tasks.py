@@ -31,6 +31,9 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     push_grades_to_s3,
+    update_offline_grades,
+    perform_delegate_answer_distribution_batches,
+    count_answer_distribution_batch,
 )
 from bulk_email.tasks import perform_delegate_email_batches
 
@@ -139,3 +142,51 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     action_name = ugettext_noop('graded')
     task_fn = partial(push_grades_to_s3, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def compute_offline_grades(entry_id, xmodule_instance_args):
+    """
+    Grade the students of a course whose grades are out of date, and store
+    the results as the snapshot the instructor gradebook is served from.
+    """
+    action_name = ugettext_noop('graded')
+    task_fn = partial(update_offline_grades, xmodule_instance_args)
+    return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def calculate_answer_distribution_csv(entry_id, _xmodule_instance_args):
+    """
+    Count the answers submitted to the problems of a course, in parallel
+    subtasks, and push the resulting answer distribution CSV for download.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('counted')
+
+    def _create_count_answers_subtask(course_id, first_pk, last_pk, initial_subtask_status):
+        """Creates a subtask to count the answers of submitted problems in a range of primary keys."""
+        return count_answer_distribution.subtask(
+            (
+                entry_id,
+                course_id,
+                first_pk,
+                last_pk,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    task_fn = partial(perform_delegate_answer_distribution_batches, _create_count_answers_subtask)
+    return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def count_answer_distribution(entry_id, course_id, first_pk, last_pk, subtask_status_dict):
+    """
+    Count the answers of the submitted problems of a course within a range
+    of StudentModule primary keys, as a subtask of
+    `calculate_answer_distribution_csv`.
+    """
+    return count_answer_distribution_batch(entry_id, course_id, first_pk, last_pk, subtask_status_dict)
@@ -5,25 +5,36 @@ running state of a course.
 """
 import json
 import urllib
+from collections import defaultdict
 from datetime import datetime
 from time import time
 
 from celery import Task, current_task
 from celery.utils.log import get_task_logger
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction, reset_queries
+from django.db.models import Max, Min
 from dogapi import dog_stats_api
 from pytz import UTC
 
 from xmodule.modulestore.django import modulestore
 from track.views import task_track
 
-from courseware.grades import iterate_grades_for
-from courseware.models import StudentModule
+from courseware.answer_distribution import answers_from_state
+from courseware.grades import iterate_grades_for, label_answer_counts
+from courseware.models import StudentModule, OfflineComputedGradeLog
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_task.models import GradesStore, InstructorTask, PROGRESS
+from instructor.offline_gradecalc import store_offline_grade, students_with_stale_offline_grades
+from instructor_task.models import AnswerDistributionBatch, GradesStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    queue_subtasks_for_ranges,
+    check_subtask_is_valid,
+    update_subtask_status,
+)
 from student.models import CourseEnrollment
 
 # define different loggers for use within tasks and on client side
@@ -572,3 +583,259 @@ def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input,
 
     # One last update before we close out...
     return update_task_progress()
+
+
+def update_offline_grades(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
+    """
+    For a given `course_id`, compute the grades of enrolled students and
+    store them as OfflineComputedGrades, from which the instructor
+    gradebook is served.
+
+    Unless `task_input` has 'only_stale' set to False, only students with
+    no offline grade yet, or whose courseware state has changed since it
+    was computed, are graded.
+    """
+    start_time = datetime.now(UTC)
+    status_interval = 100
+
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
+    if task_input.get('only_stale', True):
+        stale_ids = students_with_stale_offline_grades(course_id, enrolled_students)
+        students = (student for student in enrolled_students.iterator() if student.id in stale_ids)
+        num_total = len(stale_ids)
+    else:
+        students = enrolled_students.iterator()
+        num_total = enrolled_students.count()
+
+    num_attempted = 0
+    num_succeeded = 0
+    num_failed = 0
+
+    def update_task_progress():
+        """Return a dict containing info about current task"""
+        current_time = datetime.now(UTC)
+        progress = {
+            'action_name': action_name,
+            'attempted': num_attempted,
+            'succeeded': num_succeeded,
+            'failed': num_failed,
+            'total': num_total,
+            'duration_ms': int((current_time - start_time).total_seconds() * 1000),
+        }
+        _get_current_task().update_state(state=PROGRESS, meta=progress)
+
+        return progress
+
+    # Keep the raw scores, which the legacy dashboard's raw grades CSV reads from offline grades.
+    for student, gradeset, _err_msg in iterate_grades_for(course_id, students, keep_raw_scores=True):
+        # Periodically update task status (this is a cache write)
+        if num_attempted % status_interval == 0:
+            update_task_progress()
+        num_attempted += 1
+
+        if gradeset:
+            store_offline_grade(student, course_id, gradeset)
+            num_succeeded += 1
+        else:
+            # An empty gradeset means we failed to grade a student. Their
+            # previous offline grade, if any, is left alone.
+            num_failed += 1
+
+    OfflineComputedGradeLog.objects.create(
+        course_id=course_id,
+        seconds=int((datetime.now(UTC) - start_time).total_seconds()),
+        nstudents=num_attempted,
+    )
+
+    return update_task_progress()
+
+
+def _pk_ranges(queryset, first_pk, last_pk, rows_per_range):
+    """
+    Split the rows of `queryset` whose primary keys are between `first_pk`
+    and `last_pk` into ranges of consecutive primary keys, each of
+    `rows_per_range` rows (but the last).
+
+    Each range's end is found by a query that skips `rows_per_range` rows
+    along the primary key index, so the keys themselves are never read.
+    Rows that change meanwhile only make a range a little bigger or smaller.
+
+    Returns the list of (first pk, last pk) of each range, and the number of
+    rows the ranges held as they were found.
+    """
+    pk_ranges = []
+    num_rows = 0
+    range_start = first_pk
+    while True:
+        range_pks = queryset.filter(pk__gte=range_start, pk__lte=last_pk).order_by('pk').values_list('pk', flat=True)
+        next_range_start = list(range_pks[rows_per_range:rows_per_range + 1])
+        if not next_range_start:
+            pk_ranges.append((range_start, last_pk))
+            return pk_ranges, num_rows + range_pks.count()
+
+        pk_ranges.append((range_start, next_range_start[0] - 1))
+        num_rows += rows_per_range
+        range_start = next_range_start[0]
+
+
+def perform_delegate_answer_distribution_batches(create_subtask_fcn, entry_id, course_id, _task_input, action_name):
+    """
+    For a given `course_id`, split its submitted problems into ranges of
+    primary keys of settings.ANSWER_DISTRIBUTION_ROWS_PER_TASK
+    StudentModules, and queue a subtask to count the answers in each.
+    The last subtask to finish merges the counts into an answer distribution
+    CSV, stored using a `GradesStore` (see `store_answer_distribution_csv`).
+
+    Problems first submitted after the task starts aren't counted.
+
+    `create_subtask_fcn` is called with the course_id, the first and last
+    primary key of a range and the initial SubtaskStatus of its subtask, and
+    returns the subtask to queue.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the task was requeued after its subtasks were, leave them to it.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning("Task %s has already queued its subtasks!  InstructorTask = %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    submitted_problems = StudentModule.all_submitted_problems_read_only(course_id)
+    bounds = submitted_problems.aggregate(first_pk=Min('pk'), last_pk=Max('pk'))
+    if bounds['first_pk'] is None:
+        store_answer_distribution_csv(course_id, {})
+        return {
+            'action_name': action_name,
+            'attempted': 0,
+            'succeeded': 0,
+            'skipped': 0,
+            'failed': 0,
+            'total': 0,
+            'duration_ms': 0,
+        }
+
+    pk_ranges, num_rows = _pk_ranges(
+        submitted_problems,
+        bounds['first_pk'],
+        bounds['last_pk'],
+        settings.ANSWER_DISTRIBUTION_ROWS_PER_TASK
+    )
+
+    def _create_subtask(pk_range, initial_subtask_status):
+        """Creates a subtask to count the answers of the StudentModules in `pk_range`"""
+        first_pk, last_pk = pk_range
+        return create_subtask_fcn(course_id, first_pk, last_pk, initial_subtask_status)
+
+    return queue_subtasks_for_ranges(entry, action_name, _create_subtask, pk_ranges, num_rows)
+
+
+def count_answer_distribution_batch(entry_id, course_id, first_pk, last_pk, subtask_status_dict):
+    """
+    Count the answers of the submitted problems of `course_id` whose
+    StudentModule primary keys are between `first_pk` and `last_pk`, and
+    store them as an AnswerDistributionBatch of the InstructorTask `entry_id`.
+
+    Rows are streamed from the database without building StudentModule
+    instances. If this is the last of the task's subtasks to finish, the
+    counts of all of them are merged and stored as a CSV.
+
+    Returns the subtask's final status, as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Check that the subtask is known to the InstructorTask, and isn't
+    # already being (or done being) run by another worker.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        counts = defaultdict(int)
+        student_modules = StudentModule.all_submitted_problems_read_only(course_id).filter(
+            pk__gte=first_pk,
+            pk__lte=last_pk,
+        ).values_list('id', 'module_state_key', 'state')
+        for student_module_id, module_state_key, state in student_modules.iterator():
+            try:
+                answers = answers_from_state(state)
+            except ValueError:
+                TASK_LOG.error(
+                    "Answer Distribution: Could not parse module state for StudentModule id=%s, course=%s",
+                    student_module_id, course_id
+                )
+                subtask_status.increment(failed=1)
+                continue
+
+            for problem_part_id, answer in answers.iteritems():
+                counts[(module_state_key, problem_part_id, answer)] += 1
+            subtask_status.increment(succeeded=1)
+
+        AnswerDistributionBatch.objects.filter(entry_id=entry_id, subtask_id=current_task_id).delete()
+        AnswerDistributionBatch.objects.create(
+            entry_id=entry_id,
+            subtask_id=current_task_id,
+            counts=json.dumps([list(key) + [count] for key, count in counts.iteritems()]),
+        )
+    except Exception:
+        TASK_LOG.exception("Answer distribution subtask %s of instructor task %s: failed unexpectedly!",
+                           current_task_id, entry_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    if update_subtask_status(entry_id, current_task_id, subtask_status):
+        merge_answer_distribution_batches(entry_id, course_id)
+
+    return subtask_status.to_dict()
+
+
+def merge_answer_distribution_batches(entry_id, course_id):
+    """
+    Merge the answers counted by each subtask of the InstructorTask
+    `entry_id` and store them as an answer distribution CSV, unless any of
+    its subtasks failed (in which case the counts would be incomplete).
+    """
+    batches = AnswerDistributionBatch.objects.filter(entry_id=entry_id)
+
+    subtask_dict = json.loads(InstructorTask.objects.get(pk=entry_id).subtasks)
+    if subtask_dict['failed'] > 0:
+        TASK_LOG.error("Answer distribution task %s: %s of %s subtasks failed; not storing its CSV",
+                       entry_id, subtask_dict['failed'], subtask_dict['total'])
+        batches.delete()
+        return
+
+    counts = defaultdict(int)
+    for batch in batches.iterator():
+        for module_state_key, problem_part_id, answer, count in json.loads(batch.counts):
+            counts[(module_state_key, problem_part_id, answer)] += count
+
+    distributions = label_answer_counts(
+        course_id,
+        (key + (count,) for key, count in counts.iteritems())
+    )
+    store_answer_distribution_csv(course_id, distributions)
+    batches.delete()
+
+
+def store_answer_distribution_csv(course_id, distributions):
+    """
+    Store the answer `distributions` of `course_id`, as returned by
+    `courseware.grades.answer_distributions`, as a CSV using a `GradesStore`.
+    """
+    def _encode(value):
+        """Encode unicode values in utf-8, for the csv module"""
+        return value.encode('utf-8') if isinstance(value, unicode) else value
+
+    rows = [['url_name', 'display name', 'answer id', 'answer', 'count']]
+    rows.extend(
+        [_encode(url_name), _encode(display_name), _encode(answer_id), _encode(answer), answers[answer]]
+        for (url_name, display_name, answer_id), answers in sorted(distributions.items())
+        for answer in answers
+    )
+
+    timestamp_str = datetime.now(UTC).strftime("%Y-%m-%d-%H%M")
+    course_id_prefix = urllib.quote(course_id.replace("/", "_"))
+    GradesStore.from_config().store_rows(
+        course_id,
+        "{}_answer_distribution_{}.csv".format(course_id_prefix, timestamp_str),
+        rows
+    )
@@ -10,6 +10,8 @@ from uuid import uuid4
 
 from mock import Mock, MagicMock, patch
 
+from django.test.utils import override_settings
+
 from celery.states import SUCCESS, FAILURE
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
@@ -18,10 +20,16 @@ from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 
-from instructor_task.models import InstructorTask
-from instructor_task.tests.test_base import InstructorTaskModuleTestCase
+from instructor_task.models import AnswerDistributionBatch, InstructorTask
+from instructor_task.tests.test_base import InstructorTaskModuleTestCase, OPTION_1, OPTION_2
 from instructor_task.tests.factories import InstructorTaskFactory
-from instructor_task.tasks import rescore_problem, reset_problem_attempts, delete_problem_state
+from instructor_task.tasks import (
+    rescore_problem,
+    reset_problem_attempts,
+    delete_problem_state,
+    calculate_answer_distribution_csv,
+)
+from instructor_task import tasks_helper
 from instructor_task.tasks_helper import UpdateProblemModuleStateError
 
 PROBLEM_URL_NAME = "test_urlname"
@@ -437,3 +445,86 @@ class TestDeleteStateInstructorTask(TestInstructorTasks):
                 StudentModule.objects.get(course_id=self.course.id,
                                           student=student,
                                           module_state_key=self.problem_url)
+
+
+class TestAnswerDistributionInstructorTask(TestInstructorTasks):
+    """Tests instructor task that counts answer distributions in subtasks."""
+
+    def _run_answer_distribution_task(self):
+        """Run the task, and return its InstructorTask and the rows of the CSV it stored."""
+        task_entry = self._create_input_entry(use_problem_url=False)
+        with patch('instructor_task.tasks_helper.GradesStore') as mock_grades_store:
+            self._run_task_with_mock_celery(calculate_answer_distribution_csv, task_entry.id, task_entry.task_id)
+        mock_store_rows = mock_grades_store.from_config.return_value.store_rows
+        self.assertEquals(mock_store_rows.call_count, 1)
+        course_id, filename, rows = mock_store_rows.call_args[0]
+        self.assertEquals(course_id, self.course.id)
+        self.assertIn('answer_distribution', filename)
+        return InstructorTask.objects.get(id=task_entry.id), rows
+
+    def test_answer_distribution_with_no_state(self):
+        self.define_option_problem(PROBLEM_URL_NAME)
+        entry, rows = self._run_answer_distribution_task()
+        self.assertEquals(entry.task_state, SUCCESS)
+        self.assertEquals(rows, [['url_name', 'display name', 'answer id', 'answer', 'count']])
+
+    @override_settings(ANSWER_DISTRIBUTION_ROWS_PER_TASK=2)
+    def test_answer_distribution_merged_across_subtasks(self):
+        states = [
+            {'student_answers': {'part_1': OPTION_1}},
+            {'student_answers': {'part_1': OPTION_2}},
+            {'student_answers': {'part_1': OPTION_1, 'part_2': OPTION_2}},
+            "invalid json!",
+            {'student_answers': {'part_1': OPTION_1}},
+            {'student_answers': {'part_2': OPTION_2}},
+        ]
+        students = self._create_students_with_state(len(states))
+        for student, state in zip(students, states):
+            StudentModule.objects.filter(student=student).update(
+                state=state if isinstance(state, basestring) else json.dumps(state)
+            )
+
+        entry, rows = self._run_answer_distribution_task()
+
+        # Six StudentModules are split into three subtasks of two
+        self.assertEquals(entry.task_state, SUCCESS)
+        self.assertEquals(json.loads(entry.subtasks)['total'], 3)
+        output = json.loads(entry.task_output)
+        self.assertEquals(output['succeeded'], 5)
+        self.assertEquals(output['failed'], 1)
+
+        self.assertEquals(rows[0], ['url_name', 'display name', 'answer id', 'answer', 'count'])
+        self.assertEquals(set(row[0] for row in rows[1:]), set([PROBLEM_URL_NAME]))
+        self.assertEquals(
+            sorted(tuple(row[2:]) for row in rows[1:]),
+            [('part_1', OPTION_1, 3), ('part_1', OPTION_2, 1), ('part_2', OPTION_2, 2)]
+        )
+        # The subtasks' counts are cleaned up once merged
+        self.assertFalse(AnswerDistributionBatch.objects.filter(entry=entry).exists())
+
+    @override_settings(ANSWER_DISTRIBUTION_ROWS_PER_TASK=2)
+    def test_answer_distribution_submitted_while_queuing(self):
+        self._create_students_with_state(3, state=json.dumps({'student_answers': {'part_1': OPTION_1}}))
+        pk_ranges = tasks_helper._pk_ranges  # pylint: disable=protected-access
+
+        def submit_then_find_ranges(*args):
+            """Submit more problems after the task has found its bounds"""
+            for _ in xrange(2):
+                StudentModuleFactory.create(
+                    course_id=self.course.id,
+                    module_state_key=self.problem_url,
+                    student=UserFactory.create(),
+                    grade=0,
+                    max_grade=1,
+                    state=json.dumps({'student_answers': {'part_1': OPTION_2}}),
+                )
+            return pk_ranges(*args)
+
+        with patch('instructor_task.tasks_helper._pk_ranges', side_effect=submit_then_find_ranges):
+            entry, rows = self._run_answer_distribution_task()
+
+        # Only the problems submitted before the task started are counted
+        self.assertEquals(entry.task_state, SUCCESS)
+        self.assertEquals(json.loads(entry.subtasks)['total'], 2)
+        self.assertEquals(json.loads(entry.task_output)['succeeded'], 3)
+        self.assertEquals([tuple(row[2:]) for row in rows[1:]], [('part_1', OPTION_1, 3)])
@@ -58,7 +58,7 @@ class Command(BaseCommand):
                 tset = tset.filter(event_source='server')
                 tset = tset.filter(event__contains="'%s'" % url)
                 checktimes = [x.dtcreated for x in tset]
-                pmd.checktimes = checktimes
+                pmd.set_checktimes(checktimes)
                 if not len(checktimes) == pmd.attempts:
                     print "Oops, mismatch in number of attempts and check times for %s" % pmd
 
@@ -4,9 +4,39 @@
 # this data is collected in real time
 #
 
+import json
+import re
+from datetime import datetime
+
 from django.db import models
+from pytz import UTC
+
 from courseware.models import StudentModule
 
+# format of the timestamps (all UTC) stored in checktimes
+CHECKTIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+# checktimes used to be stored as the repr of a list of datetimes
+LEGACY_CHECKTIME_RE = re.compile(r'datetime\.datetime\(([0-9, ]+)')
+
+
+def parse_checktimes(checktimes):
+    """
+    Return the check times stored in the text `checktimes` of a
+    PsychometricData, as a list of timezone-aware datetimes.
+    """
+    if not checktimes:
+        return []
+    try:
+        timestamps = json.loads(checktimes)
+    except ValueError:
+        # Parse the repr of a list of datetimes, as checktimes used to be stored
+        return [
+            datetime(*[int(part) for part in match.split(',') if part.strip()], tzinfo=UTC)
+            for match in LEGACY_CHECKTIME_RE.findall(checktimes)
+        ]
+    return [datetime.strptime(timestamp, CHECKTIME_FORMAT).replace(tzinfo=UTC) for timestamp in timestamps or []]
+
 
 class PsychometricData(models.Model):
     """
@@ -20,13 +50,14 @@ class PsychometricData(models.Model):
     and for capa problems, category = "problem".
 
     checktimes is extracted from tracking logs, or added by capa module via psychometrics callback.
+    It is stored as a JSON list of UTC timestamps; use get_checktimes and set_checktimes to access it.
     """
 
     studentmodule = models.ForeignKey(StudentModule, db_index=True, unique=True)   # contains student, module_state_key, course_id
 
     done = models.BooleanField(default=False)
     attempts = models.IntegerField(default=0)			# extracted from studentmodule.state
-    checktimes = models.TextField(null=True, blank=True)  	# internally stored as list of datetime objects
+    checktimes = models.TextField(null=True, blank=True)  	# JSON list of timestamps, see CHECKTIME_FORMAT
 
     # keep in mind
     # grade = studentmodule.grade
@@ -35,6 +66,22 @@ class PsychometricData(models.Model):
     # course_id = studentmodule.course_id
     # location = studentmodule.module_state_key
 
+    def get_checktimes(self):
+        """
+        Return the times at which the problem was checked, as a list of
+        timezone-aware datetimes.
+        """
+        return parse_checktimes(self.checktimes)
+
+    def set_checktimes(self, checktimes):
+        """
+        Store `checktimes`, a list of datetimes. Naive datetimes are taken to be UTC.
+        """
+        self.checktimes = json.dumps([
+            (checktime.astimezone(UTC) if checktime.tzinfo else checktime).strftime(CHECKTIME_FORMAT)
+            for checktime in checktimes
+        ])
+
     def __unicode__(self):
         sm = self.studentmodule
         return "[PsychometricData] %s url=%s, grade=%s, max=%s, attempts=%s, ct=%s" % (sm.student,
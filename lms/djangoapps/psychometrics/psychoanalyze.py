@@ -12,11 +12,14 @@ import math
 import numpy as np
 from scipy.optimize import curve_fit
 
+from collections import defaultdict
+
 from django.conf import settings
-from django.db.models import Sum, Max
-from psychometrics.models import PsychometricData
+from django.db.models import Count
+from psychometrics.models import PsychometricData, parse_checktimes
 from courseware.models import StudentModule
 from pytz import UTC
+from util.cache import cache
 
 log = logging.getLogger("edx.psychometrics")
 
@@ -25,6 +28,9 @@ log = logging.getLogger("edx.psychometrics")
 
 db = getattr(settings, 'DATABASE_FOR_PSYCHOMETRICS', 'default')
 
+# How long the plots generated for a course are cached
+PLOTS_CACHE_TIMEOUT = 10 * 60
+
 #-----------------------------------------------------------------------------
 # fit functions
 
@@ -87,6 +93,20 @@ class StatVar(object):
         else:
             return 0
 
+    @classmethod
+    def from_array(cls, xdata, unit=1):
+        """
+        Return a StatVar of all the numbers in the NumPy array `xdata`
+        """
+        statvar = cls(unit)
+        if len(xdata):
+            statvar.sum = xdata.sum()
+            statvar.sum2 = (xdata ** 2).sum()
+            statvar.cnt = len(xdata)
+            statvar.min = xdata.min()
+            statvar.max = xdata.max()
+        return statvar
+
     def __str__(self):
         return 'cnt=%d, avg=%f, sdv=%f' % (self.cnt, self.avg(), self.sdv())
 
@@ -109,13 +129,12 @@ def make_histogram(ydata, bins=None):
     if bins is None:
         bins = range(0, 100, 10)
 
-    nbins = len(bins)
-    hist = dict(zip(bins, [0] * nbins))
-    for y in ydata:
-        for b in bins[::-1]:  # in reverse order
-            if y > b:
-                hist[b] += 1
-                break
+    # each y is counted in the highest bin it is above
+    ydata = np.asarray(ydata, dtype=float)
+    ydata = ydata[~np.isnan(ydata)]
+    bin_indexes = np.searchsorted(bins, ydata, side='left') - 1
+    counts = np.bincount(bin_indexes[bin_indexes >= 0], minlength=len(bins))
+    hist = dict(zip(bins, [int(count) for count in counts]))
     # hist['bins'] = bins
     return hist
 
@@ -128,18 +147,116 @@ def problems_with_psychometric_data(course_id):
     Does this for a given course_id.
     '''
     pmdset = PsychometricData.objects.using(db).filter(studentmodule__course_id=course_id)
-    plist = [p['studentmodule__module_state_key'] for p in pmdset.values('studentmodule__module_state_key').distinct()]
-    problems = dict((p, pmdset.filter(studentmodule__module_state_key=p).count()) for p in plist)
+    counts = pmdset.values('studentmodule__module_state_key').annotate(count=Count('id'))
+    return dict((p['studentmodule__module_state_key'], p['count']) for p in counts)
+
+#-----------------------------------------------------------------------------
+# batch loading of psychometric data
+
+
+class ProblemData(object):
+    """
+    The psychometric data of all students for one problem, as NumPy arrays
+    (one entry per student) of grades (NaN when not graded), max grades and
+    attempts, and a list of each student's check times.
+    """
+    def __init__(self, grades, max_grades, attempts, checktimes):
+        self.grades = np.array(grades, dtype=float)
+        self.max_grades = np.array(max_grades, dtype=float)
+        self.attempts = np.array(attempts, dtype=int)
+        self.checktimes = checktimes
+
+    def __len__(self):
+        return len(self.attempts)
+
 
-    return problems
+def load_psychometric_data(pmdset):
+    """
+    Return a dict mapping each problem (location url) with PsychometricData
+    in `pmdset` to its ProblemData, read in a single query.
+    """
+    rows = defaultdict(lambda: ([], [], [], []))
+    values = pmdset.values_list(
+        'studentmodule__module_state_key',
+        'studentmodule__grade',
+        'studentmodule__max_grade',
+        'attempts',
+        'checktimes',
+    )
+    for problem, grade, max_grade, attempts, checktimes in values.iterator():
+        grades, max_grades, attempts_list, checktimes_list = rows[problem]
+        grades.append(np.nan if grade is None else grade)
+        max_grades.append(np.nan if max_grade is None else max_grade)
+        attempts_list.append(attempts)
+        checktimes_list.append(checktimes)
+
+    return dict((problem, ProblemData(*problem_rows)) for problem, problem_rows in rows.iteritems())
+
+
+def _check_time_differences(checktimes_list):
+    """
+    Return a NumPy array of the time differences (in minutes) between
+    consecutive checks of each student, ignoring those of 20 minutes or more
+    """
+    dtsets = []
+    for checktimes in checktimes_list:
+        checktimes = parse_checktimes(checktimes)
+        if len(checktimes) < 2:
+            continue
+        seconds = np.array([(ct - checktimes[0]).total_seconds() for ct in checktimes])
+        dtsets.append(np.diff(seconds) / 60.0)
+    if not dtsets:
+        return np.array([])
+    dtset = np.concatenate(dtsets)
+    return dtset[dtset < 20]  # ignore if dt too long
 
 #-----------------------------------------------------------------------------
 
 
-def generate_plots_for_problem(problem):
+def generate_plots_for_problem(problem, course_id=None):
+    """
+    Return (msg, plots) describing the psychometrics of `problem`: grade
+    and check time histograms, and IRT plots for each grade.
+
+    If the `course_id` of the problem is given, the plots of all of the
+    course's problems are generated at once and cached (see
+    `generate_plots_for_course`).
+    """
+    if course_id is not None:
+        plots_by_problem = generate_plots_for_course(course_id)
+        if problem in plots_by_problem:
+            return plots_by_problem[problem]
 
     pmdset = PsychometricData.objects.using(db).filter(studentmodule__module_state_key=problem)
-    nstudents = pmdset.count()
+    data = load_psychometric_data(pmdset).get(problem, ProblemData([], [], [], []))
+    return _generate_plots(problem, data)
+
+
+def generate_plots_for_course(course_id):
+    """
+    Return a dict mapping each problem of `course_id` with psychometric
+    data to its (msg, plots), as returned by `generate_plots_for_problem`.
+
+    The data of all problems is read at once, and the results are cached
+    for PLOTS_CACHE_TIMEOUT.
+    """
+    cache_key = u'psychometrics.plots.{}'.format(course_id)
+    plots_by_problem = cache.get(cache_key)
+    if plots_by_problem is None:
+        pmdset = PsychometricData.objects.using(db).filter(studentmodule__course_id=course_id)
+        plots_by_problem = dict(
+            (problem, _generate_plots(problem, data))
+            for problem, data in load_psychometric_data(pmdset).iteritems()
+        )
+        cache.set(cache_key, plots_by_problem, PLOTS_CACHE_TIMEOUT)
+    return plots_by_problem
+
+
+def _generate_plots(problem, data):
+    """
+    Return (msg, plots) for `problem`, given its ProblemData `data`
+    """
+    nstudents = len(data)
     msg = ""
     plots = []
 
@@ -147,11 +264,11 @@ def generate_plots_for_problem(problem):
         msg += "%s nstudents=%d --> skipping, too few" % (problem, nstudents)
         return msg, plots
 
-    max_grade = pmdset[0].studentmodule.max_grade
+    max_grade = data.max_grades[0]
+    if np.isnan(max_grade):
+        max_grade = 0
 
-    agdat = pmdset.aggregate(Sum('attempts'), Max('attempts'))
-    max_attempts = agdat['attempts__max']
-    total_attempts = agdat['attempts__sum']  # not used yet
+    max_attempts = int(data.attempts.max())
 
     msg += "max attempts = %d" % max_attempts
 
@@ -159,10 +276,8 @@ def generate_plots_for_problem(problem):
     dataset = {'xdat': xdat}
 
     # compute grade statistics
-    grades = [pmd.studentmodule.grade for pmd in pmdset]
-    gsv = StatVar()
-    for g in grades:
-        gsv += g
+    grades = data.grades[~np.isnan(data.grades)]
+    gsv = StatVar.from_array(grades)
     msg += "<br><p><font color='blue'>Grade distribution: %s</font></p>" % gsv
 
     # generate grade histogram
@@ -183,7 +298,7 @@ def generate_plots_for_problem(problem):
         max_grade = gsv.max
 
     if max_grade > 1:
-        ghist = make_histogram(grades, np.linspace(0, max_grade, max_grade + 1))
+        ghist = make_histogram(grades, np.linspace(0, max_grade, int(max_grade) + 1))
         ghist_json = json.dumps(ghist.items())
 
         plot = {'title': "Grade histogram for %s" % problem,
@@ -197,23 +312,8 @@ def generate_plots_for_problem(problem):
         msg += "<br/>Not generating histogram: max_grade=%s" % max_grade
 
     # histogram of time differences between checks
-    # Warning: this is inefficient - doesn't scale to large numbers of students
-    dtset = []  # time differences in minutes
-    dtsv = StatVar()
-    for pmd in pmdset:
-        try:
-            checktimes = eval(pmd.checktimes)  # update log of attempt timestamps
-        except:
-            continue
-        if len(checktimes) < 2:
-            continue
-        ct0 = checktimes[0]
-        for ct in checktimes[1:]:
-            dt = (ct - ct0).total_seconds() / 60.0
-            if dt < 20:  # ignore if dt too long
-                dtset.append(dt)
-                dtsv += dt
-            ct0 = ct
+    dtset = _check_time_differences(data.checktimes)  # time differences in minutes
+    dtsv = StatVar.from_array(dtset)
     if dtsv.cnt > 2:
         msg += "<br/><p><font color='brown'>Time differences between checks: %s</font></p>" % dtsv
         bins = np.linspace(0, 1.5 * dtsv.sdv(), 30)
@@ -234,16 +334,13 @@ def generate_plots_for_problem(problem):
     # one IRT plot curve for each grade received (TODO: this assumes integer grades)
     for grade in range(1, int(max_grade) + 1):
         yset = {}
-        gset = pmdset.filter(studentmodule__grade=grade)
-        ngset = gset.count()
+        gattempts = data.attempts[data.grades == grade]
+        ngset = len(gattempts)
         if ngset == 0:
             continue
-        ydat = []
-        ylast = 0
-        for x in xdat:
-            y = gset.filter(attempts=x).count() / ngset
-            ydat.append(y + ylast)
-            ylast = y + ylast
+        # cumulative fraction of the students with this grade who took at most x attempts
+        attempt_counts = np.bincount(gattempts, minlength=max_attempts + 1)[1:max_attempts + 1]
+        ydat = list(np.cumsum(attempt_counts) / ngset)
         yset['ydat'] = ydat
 
         if len(ydat) > 3:  # try to fit to logistic function if enough data points
@@ -305,18 +402,10 @@ def make_psychometrics_data_update_handler(course_id, user, module_state_key):
     """
     Construct and return a procedure which may be called to update
     the PsychometricData instance for the given StudentModule instance.
+
+    This is done for every problem a student is shown, so no database work
+    is done until the procedure is called, when the problem is checked.
     """
-    sm, status = StudentModule.objects.get_or_create(
-                       course_id=course_id,
-                       student=user,
-                       module_state_key=module_state_key,
-                       defaults={'state': '{}', 'module_type': 'problem'},
-                 )
-
-    try:
-        pmd = PsychometricData.objects.using(db).get(studentmodule=sm)
-    except PsychometricData.DoesNotExist:
-        pmd = PsychometricData(studentmodule=sm)
 
     def psychometrics_data_update_handler(state):
         """
@@ -325,6 +414,13 @@ def make_psychometrics_data_update_handler(course_id, user, module_state_key):
 
         state = instance state (a nice, uniform way to interface - for more future psychometric feature extraction)
         """
+        sm, status = StudentModule.objects.get_or_create(
+                           course_id=course_id,
+                           student=user,
+                           module_state_key=module_state_key,
+                           defaults={'state': '{}', 'module_type': 'problem'},
+                     )
+
         try:
             state = json.loads(sm.state)
             done = state['done']
@@ -332,18 +428,19 @@ def make_psychometrics_data_update_handler(course_id, user, module_state_key):
             log.exception("Oops, failed to eval state for %s (state=%s)" % (sm, sm.state))
             return
 
+        try:
+            pmd = PsychometricData.objects.using(db).get(studentmodule=sm)
+        except PsychometricData.DoesNotExist:
+            pmd = PsychometricData(studentmodule=sm)
+
         pmd.done = done
         try:
             pmd.attempts = state.get('attempts', 0)
         except:
             log.exception("no attempts for %s (state=%s)" % (sm, sm.state))
 
-        try:
-            checktimes = eval(pmd.checktimes)  # update log of attempt timestamps
-        except:
-            checktimes = []
-        checktimes.append(datetime.datetime.now(UTC))
-        pmd.checktimes = checktimes
+        # update log of attempt timestamps
+        pmd.set_checktimes(pmd.get_checktimes() + [datetime.datetime.now(UTC)])
         try:
             pmd.save()
         except:
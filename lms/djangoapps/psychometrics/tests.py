@@ -0,0 +1,133 @@
+"""
+Unit tests for the psychometrics app.
+"""
+import json
+from datetime import datetime
+
+from django.test import TestCase
+from pytz import UTC
+
+from courseware.models import StudentModule
+from courseware.tests.factories import StudentModuleFactory
+from psychometrics.models import PsychometricData
+from psychometrics.psychoanalyze import (
+    generate_plots_for_problem,
+    make_histogram,
+    make_psychometrics_data_update_handler,
+    problems_with_psychometric_data,
+)
+from student.tests.factories import UserFactory
+
+
+class PsychometricDataTest(TestCase):
+    """Tests the storage of PsychometricData check times."""
+
+    def test_checktimes_round_trip(self):
+        checktimes = [
+            datetime(2013, 10, 1, 12, 30, 5, 123456, tzinfo=UTC),
+            datetime(2013, 10, 1, 12, 31, tzinfo=UTC),
+        ]
+        pmd = PsychometricData()
+        pmd.set_checktimes(checktimes)
+        self.assertEqual(json.loads(pmd.checktimes), ['2013-10-01T12:30:05.123456', '2013-10-01T12:31:00.000000'])
+        self.assertEqual(pmd.get_checktimes(), checktimes)
+
+    def test_naive_checktimes_are_utc(self):
+        pmd = PsychometricData()
+        pmd.set_checktimes([datetime(2013, 10, 1, 12, 30)])
+        self.assertEqual(pmd.get_checktimes(), [datetime(2013, 10, 1, 12, 30, tzinfo=UTC)])
+
+    def test_legacy_checktimes(self):
+        pmd = PsychometricData(
+            checktimes="[datetime.datetime(2013, 10, 1, 12, 30, 5, 123456, tzinfo=<UTC>), "
+                       "datetime.datetime(2013, 10, 1, 12, 31, tzinfo=<UTC>)]"
+        )
+        self.assertEqual(
+            pmd.get_checktimes(),
+            [datetime(2013, 10, 1, 12, 30, 5, 123456, tzinfo=UTC), datetime(2013, 10, 1, 12, 31, tzinfo=UTC)]
+        )
+
+    def test_no_checktimes(self):
+        self.assertEqual(PsychometricData().get_checktimes(), [])
+
+
+class PsychometricsHandlerTest(TestCase):
+    """Tests the handler that capa problems call when they are checked."""
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.course_id = 'edX/test/psychometrics'
+        self.module_state_key = 'i4x://edX/test/problem/p1'
+
+    def test_no_queries_until_called(self):
+        with self.assertNumQueries(0):
+            make_psychometrics_data_update_handler(self.course_id, self.user, self.module_state_key)
+        self.assertFalse(StudentModule.objects.exists())
+
+    def test_checks_recorded(self):
+        StudentModuleFactory.create(
+            course_id=self.course_id,
+            student=self.user,
+            module_state_key=self.module_state_key,
+            state=json.dumps({'done': True, 'attempts': 2}),
+        )
+        handler = make_psychometrics_data_update_handler(self.course_id, self.user, self.module_state_key)
+        handler({'done': True})
+        handler({'done': True})
+
+        pmd = PsychometricData.objects.get(studentmodule__module_state_key=self.module_state_key)
+        self.assertTrue(pmd.done)
+        self.assertEqual(pmd.attempts, 2)
+        self.assertEqual(len(pmd.get_checktimes()), 2)
+
+
+class PsychoanalyzeTest(TestCase):
+    """Tests the psychometrics computed for the instructor dashboard."""
+
+    def setUp(self):
+        self.course_id = 'edX/test/psychometrics'
+        self.problem = 'i4x://edX/test/problem/p1'
+        # (grade, attempts) of each student
+        for grade, attempts in [(2, 1), (2, 2), (1, 3), (2, 2), (0, 4), (2, 1)]:
+            student_module = StudentModuleFactory.create(
+                course_id=self.course_id,
+                module_state_key=self.problem,
+                grade=grade,
+                max_grade=2,
+            )
+            pmd = PsychometricData(studentmodule=student_module, done=True, attempts=attempts)
+            pmd.set_checktimes([
+                datetime(2013, 10, 1, 12, minute, tzinfo=UTC) for minute in range(attempts)
+            ])
+            pmd.save()
+
+    def test_make_histogram(self):
+        # Each value is counted in the highest bin it is above
+        self.assertEqual(make_histogram([0, 0.5, 1, 1.5, 2, 7], [0, 1, 2]), {0: 2, 1: 2, 2: 1})
+
+    def test_problems_with_psychometric_data(self):
+        StudentModuleFactory.create(course_id=self.course_id, module_state_key='i4x://edX/test/problem/p2')
+        with self.assertNumQueries(1):
+            self.assertEqual(problems_with_psychometric_data(self.course_id), {self.problem: 6})
+
+    def test_generate_plots(self):
+        msg, plots = generate_plots_for_problem(self.problem, self.course_id)
+        self.assertIn("max attempts = 4", msg)
+        self.assertEqual(
+            [plot['id'] for plot in plots],
+            ['histogram', 'thistogram', 'irt1', 'irt2']
+        )
+        # Of the four students with a grade of 2, half took one attempt and
+        # the rest took two
+        self.assertIn("var d2 = %s;" % json.dumps([[1, 0.5], [2, 1.0], [3, 1.0], [4, 1.0]]), plots[3]['data'])
+
+    def test_generate_plots_without_course(self):
+        self.assertEqual(
+            generate_plots_for_problem(self.problem),
+            generate_plots_for_problem(self.problem, self.course_id)
+        )
+
+    def test_too_few_students(self):
+        msg, plots = generate_plots_for_problem('i4x://edX/test/problem/missing', self.course_id)
+        self.assertIn("too few", msg)
+        self.assertEqual(plots, [])
@@ -345,3 +345,4 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+ANSWER_DISTRIBUTION_ROWS_PER_TASK = ENV_TOKENS.get('ANSWER_DISTRIBUTION_ROWS_PER_TASK', ANSWER_DISTRIBUTION_ROWS_PER_TASK)
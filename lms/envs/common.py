@@ -138,6 +138,10 @@ FEATURES = {
     # Staff Debug tool.
     'ENABLE_STUDENT_HISTORY_VIEW': True,
 
+    # Write StudentModule history compressed, in batches, from a background
+    # task, instead of inserting a full copy of the state on every save.
+    'ENABLE_COMPRESSED_STUDENT_MODULE_HISTORY': False,
+
     # segment.io for LMS--need to explicitly turn it on for production.
     'SEGMENT_IO_LMS': False,
 
@@ -630,6 +634,8 @@ MIDDLEWARE_CLASSES = (
     # Detects user-requested locale from 'accept-language' header in http request
     'django.middleware.locale.LocaleMiddleware',
 
+    # Must come just before TransactionMiddleware
+    'courseware.middleware.AnswerCountsMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
 
@@ -1100,3 +1106,7 @@ GRADES_DOWNLOAD = {
     'BUCKET': 'edx-grades',
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
+
+# Parameters for breaking down the submitted problems of a course into
+# subtasks, when counting its answer distribution.
+ANSWER_DISTRIBUTION_ROWS_PER_TASK = 10000
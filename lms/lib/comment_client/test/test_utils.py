@@ -0,0 +1,80 @@
+"""
+Tests of the comment service client utilities
+"""
+import threading
+from unittest import TestCase
+
+from mock import Mock, patch
+from requests import Session
+
+from lms.lib.comment_client import utils
+
+
+class PerformConcurrentlyTest(TestCase):
+    """Tests perform_concurrently"""
+
+    def test_results_in_order(self):
+        event = threading.Event()
+
+        def slow():
+            """Returns once the last function has run"""
+            event.wait(5)
+            return 'slow'
+
+        def fast():
+            """Lets the first function return"""
+            event.set()
+            return 'fast'
+
+        self.assertEqual(utils.perform_concurrently(slow, lambda: 2, fast), ['slow', 2, 'fast'])
+
+    def test_exception_propagates(self):
+        def fail():
+            """Raises an error"""
+            raise utils.CommentClientError("failed")
+
+        with self.assertRaises(utils.CommentClientError):
+            utils.perform_concurrently(lambda: 1, fail)
+
+    def test_runs_concurrently(self):
+        threads = []
+
+        def record_thread():
+            """Records the thread it runs on"""
+            threads.append(threading.current_thread())
+
+        utils.perform_concurrently(record_thread, record_thread)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_single_function_runs_inline(self):
+        threads = []
+
+        def record_thread():
+            """Records the thread it runs on"""
+            threads.append(threading.current_thread())
+            return 1
+
+        with patch('lms.lib.comment_client.utils._get_thread_pool') as mock_get_thread_pool:
+            self.assertEqual(utils.perform_concurrently(record_thread), [1])
+            self.assertEqual(utils.perform_concurrently(), [])
+        self.assertFalse(mock_get_thread_pool.called)
+        self.assertEqual(threads, [threading.current_thread()])
+
+    def test_thread_pool_is_shared(self):
+        self.assertIs(utils._get_thread_pool(), utils._get_thread_pool())  # pylint: disable=protected-access
+
+
+class PerformRequestTest(TestCase):
+    """Tests perform_request"""
+
+    def test_session_pools_connections(self):
+        self.assertIsInstance(utils.SESSION, Session)
+        adapter = utils.SESSION.get_adapter('http://localhost:4567/api/v1')
+        self.assertEqual(adapter._pool_maxsize, utils.settings.POOL_SIZE)  # pylint: disable=protected-access
+
+    @patch('lms.lib.comment_client.utils.SESSION.request')
+    def test_request_uses_session(self, mock_request):
+        mock_request.return_value = Mock(status_code=200, text='{"id": "1"}')
+        self.assertEqual(utils.perform_request('get', 'http://localhost:4567/api/v1/threads/1'), {'id': '1'})
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_request.call_args[0], ('get', 'http://localhost:4567/api/v1/threads/1'))
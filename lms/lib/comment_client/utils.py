@@ -2,8 +2,11 @@ from contextlib import contextmanager
 from dogapi import dog_stats_api
 import json
 import logging
+from multiprocessing.pool import ThreadPool
 import requests
+from requests.adapters import HTTPAdapter
 import settings
+from threading import Lock
 from time import time
 from uuid import uuid4
 
@@ -31,6 +34,51 @@ def merge_dict(dic1, dic2):
     return dict(dic1.items() + dic2.items())
 
 
+def _create_session():
+    """
+    Returns a requests Session that keeps up to settings.POOL_SIZE connections
+    to the comments service alive, so that subsequent requests do not pay for
+    a new TCP (and TLS) handshake.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.POOL_SIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+SESSION = _create_session()
+
+_thread_pool = None
+_thread_pool_lock = Lock()
+
+
+def _get_thread_pool():
+    """
+    Lazily creates the pool of threads used by perform_concurrently
+    """
+    global _thread_pool  # pylint: disable=global-statement
+    with _thread_pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPool(settings.POOL_SIZE)
+    return _thread_pool
+
+
+def perform_concurrently(*funcs):
+    """
+    Calls each of `funcs` (callables taking no arguments, typically making a
+    request to the comments service) concurrently, and returns the list of
+    their return values in the same order. If any of them raises, the
+    exception is re-raised here.
+
+    Only use this for calls that are independent of each other and that do
+    not touch the database or any other thread-local state.
+    """
+    if len(funcs) < 2:
+        return [func() for func in funcs]
+    return _get_thread_pool().map(lambda func: func(), funcs)
+
+
 @contextmanager
 def request_timer(request_id, method, url):
     start = time()
@@ -63,7 +111,7 @@ def perform_request(method, url, data_or_params=None, *args, **kwargs):
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url):
-        response = requests.request(
+        response = SESSION.request(
             method,
             url,
             data=data,